@@ -0,0 +1,476 @@
+import io
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+STAGES = ['decode', 'preprocess', 'segment', 'measure', 'classify']
+TIMING_KEY = 'wound-analysis-timings:{}'
+
+
+class WoundAnalyzer:
+    """
+    Interface for wound image analysis engines.
+    analyze_batch() takes a list of encoded images and returns one result
+    dict per image with at least width, depth (cm), area (cm²) and stage.
+    """
+    name = 'base'
+
+    def load(self):
+        """Loads weights; called once per process before the first batch."""
+
+    def warm_up(self):
+        """
+        Loads weights and runs one inference on a synthetic photo so
+        allocations and lazy imports happen before the first real upload.
+        """
+        self.load()
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), (224, 182, 160)).save(buffer, format='JPEG')
+        self.analyze_batch([buffer.getvalue()])
+
+    def weights_info(self):
+        return None
+
+    def analyze_batch(self, images):
+        raise NotImplementedError
+
+    def analyze(self, image):
+        return self.analyze_batch([image])[0]
+
+
+class ClassicalWoundAnalyzer(WoundAnalyzer):
+    """
+    CPU-only reference analyzer: colour segmentation of wound tissue
+    (granulation, slough, necrosis) with NumPy, vectorised over the batch.
+
+    The colour rules are compiled into a 16 MB lookup table (one tissue
+    class per 24-bit RGB value), the analyzer's weights. With `weights`
+    set the table is built once into that file and memory-mapped read-only,
+    so every worker process shares the same physical pages.
+
+    Measurements assume the photo frames `frame_width_cm` of skin across
+    its width. Depth cannot be observed in a single RGB photo; it is a
+    coarse proxy from wound bed darkness and composition. Not a diagnostic
+    device: findings are for triage and are reviewed by a clinician.
+    """
+    name = 'classical-v1'
+
+    def __init__(self, resolution=256, frame_width_cm=20.0, min_coverage=0.005, weights=None):
+        self.resolution = resolution
+        self.frame_width_cm = frame_width_cm
+        self.min_coverage = min_coverage
+        self.weights_path = weights
+        self.lut = None
+
+    def load(self):
+        if self.lut is not None:
+            return
+        if not self.weights_path:
+            self.lut = build_tissue_lut()
+            return
+        if not os.path.exists(self.weights_path):
+            save_weights(self.weights_path, build_tissue_lut())
+        self.lut = np.load(self.weights_path, mmap_mode='r')
+
+    def warm_up(self):
+        super().warm_up()
+        # Fault in every page of the mapping up front (one read per 4 KB page)
+        int(self.lut[::4096].sum())
+
+    def weights_info(self):
+        if self.lut is None:
+            return None
+        return {
+            'path': self.weights_path,
+            'bytes': int(self.lut.nbytes),
+            'memory_mapped': isinstance(self.lut, np.memmap),
+        }
+
+    def analyze_batch(self, images):
+        self.load()
+        timings = {}
+
+        # 1. Decode at analysis resolution (JPEG draft mode skips most of the work)
+        start = time.perf_counter()
+        decoded = [self.decode(data) for data in images]
+        timings['decode'] = time.perf_counter() - start
+
+        # 2. Letterbox into one (N, R, R, 3) batch plus a validity mask
+        start = time.perf_counter()
+        pixels, valid, cm_per_px = self.preprocess(decoded)
+        timings['preprocess'] = time.perf_counter() - start
+
+        # 3. Classify every pixel into tissue types (table lookup)
+        start = time.perf_counter()
+        tissue = self.segment(pixels, valid)
+        timings['segment'] = time.perf_counter() - start
+
+        # 4. Area, extent and depth proxy per image
+        start = time.perf_counter()
+        measures = self.measure(pixels, tissue, valid, cm_per_px)
+        timings['measure'] = time.perf_counter() - start
+
+        # 5. Stage from wound composition
+        start = time.perf_counter()
+        stages = self.classify(measures)
+        timings['classify'] = time.perf_counter() - start
+
+        timings_ms = {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+        results = []
+        for i, stage in enumerate(stages):
+            results.append({
+                'analyzer': self.name,
+                'stage': stage,
+                'width': round(float(measures['width'][i]), 1),
+                'length': round(float(measures['length'][i]), 1),
+                'depth': round(float(measures['depth'][i]), 1),
+                'area': round(float(measures['area'][i]), 2),
+                'coverage': round(float(measures['coverage'][i]), 4),
+                'tissue': {
+                    name: round(float(measures[name][i]), 3)
+                    for name in ('granulation', 'slough', 'necrotic')
+                },
+                'batch_size': len(images),
+                'timings_ms': timings_ms,
+            })
+        return results
+
+    def decode(self, data):
+        img = Image.open(io.BytesIO(data))
+        img.draft('RGB', (self.resolution, self.resolution))
+        img = img.convert('RGB')
+        img.thumbnail((self.resolution, self.resolution), Image.Resampling.BILINEAR)
+        return np.asarray(img)
+
+    def preprocess(self, decoded):
+        size = self.resolution
+        pixels = np.zeros((len(decoded), size, size, 3), dtype=np.uint8)
+        valid = np.zeros((len(decoded), size, size), dtype=bool)
+        cm_per_px = np.empty(len(decoded), dtype=np.float32)
+        for i, arr in enumerate(decoded):
+            h, w = arr.shape[:2]
+            pixels[i, :h, :w] = arr
+            valid[i, :h, :w] = True
+            cm_per_px[i] = self.frame_width_cm / w
+        return pixels, valid, cm_per_px
+
+    def segment(self, pixels, valid):
+        """
+        Returns an (N, R, R) int8 map: 0 skin/background, 1 granulation,
+        2 slough, 3 necrotic.
+        """
+        rgb = pixels.astype(np.int32)
+        tissue = self.lut[(rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]]
+
+        # Letterbox padding is black; keep it from reading as eschar
+        tissue[~valid] = 0
+
+        # Majority filter drops speckle (hair, reflections, JPEG noise)
+        wound = _box_mean((tissue > 0).astype(np.float32), 5) > 0.5
+        tissue[~wound] = 0
+        return tissue
+
+    def measure(self, pixels, tissue, valid, cm_per_px):
+        wound = tissue > 0
+        wound_px = wound.sum(axis=(1, 2))
+        safe_px = np.maximum(wound_px, 1)
+
+        rows, cols = wound.any(axis=2), wound.any(axis=1)
+        height_px = _extent(rows)
+        width_px = _extent(cols)
+
+        luminance = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32) / 255.0
+        bed_luminance = (luminance * wound).sum(axis=(1, 2)) / safe_px
+
+        measures = {
+            'coverage': wound_px / valid.sum(axis=(1, 2)),
+            'area': wound_px * cm_per_px ** 2,
+            'width': np.minimum(width_px, height_px) * cm_per_px,
+            'length': np.maximum(width_px, height_px) * cm_per_px,
+            'granulation': (tissue == 1).sum(axis=(1, 2)) / safe_px,
+            'slough': (tissue == 2).sum(axis=(1, 2)) / safe_px,
+            'necrotic': (tissue == 3).sum(axis=(1, 2)) / safe_px,
+        }
+        # Darker, sloughy beds are deeper; capped at 3 cm
+        depth = (1.0 - bed_luminance) * (1.0 + measures['slough']) * 2.0
+        measures['depth'] = np.where(wound_px > 0, np.clip(depth, 0.1, 3.0), 0.0)
+        return measures
+
+    def classify(self, measures):
+        """
+        NPUAP-style rules: a base obscured by eschar/slough is Unstageable,
+        slough or a deep bed means full thickness (Stage 3), a shallow open
+        bed is partial thickness (Stage 2), no open wound is Stage 1.
+        """
+        stages = np.full(len(measures['area']), 'Stage 2', dtype=object)
+        stages[(measures['slough'] > 0.1) | (measures['depth'] >= 1.0)] = 'Stage 3'
+        stages[(measures['necrotic'] + measures['slough']) > 0.5] = 'Unstageable'
+        stages[measures['coverage'] < self.min_coverage] = 'Stage 1'
+        return stages.tolist()
+
+
+def classify_colours(rgb):
+    """
+    Tissue class (0-3, see segment()) for an (..., 3) float array of RGB
+    values in [0, 1].
+    """
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    value = rgb.max(axis=-1)
+    saturation = (value - rgb.min(axis=-1)) / (value + 1e-6)
+    total = r + g + b + 1e-6
+    red_share, green_share = r / total, g / total
+
+    necrotic = value < 0.22
+    slough = ~necrotic & (saturation > 0.3) & (red_share > 0.36) & (green_share > 0.33) & (b < 0.6 * g)
+    granulation = ~necrotic & ~slough & (saturation > 0.35) & (red_share > 0.5)
+
+    tissue = np.zeros(value.shape, dtype=np.int8)
+    tissue[granulation] = 1
+    tissue[slough] = 2
+    tissue[necrotic] = 3
+    return tissue
+
+
+def build_tissue_lut():
+    """
+    Evaluates classify_colours() for every 24-bit colour. Returns a flat
+    int8 table indexed by (r << 16) | (g << 8) | b.
+    """
+    lut = np.empty(1 << 24, dtype=np.int8)
+    plane = np.empty((256, 256, 3), dtype=np.float32)
+    plane[..., 1] = np.arange(256, dtype=np.float32)[:, None] / 255.0
+    plane[..., 2] = np.arange(256, dtype=np.float32)[None, :] / 255.0
+    for r in range(256):
+        plane[..., 0] = r / 255.0
+        lut[r << 16:(r + 1) << 16] = classify_colours(plane).ravel()
+    return lut
+
+
+def save_weights(path, array):
+    """
+    Writes an .npy file atomically, so processes that race to build the
+    weights never map a partially written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.npy')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            np.save(fh, array)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _box_mean(arr, k):
+    """k x k box filter over the last two axes using summed-area tables."""
+    pad = k // 2
+    padded = np.pad(arr, [(0, 0), (pad + 1, pad), (pad + 1, pad)])
+    sat = padded.cumsum(axis=1).cumsum(axis=2)
+    total = sat[:, k:, k:] - sat[:, :-k, k:] - sat[:, k:, :-k] + sat[:, :-k, :-k]
+    return total / (k * k)
+
+
+def _extent(present):
+    """Span in pixels between the first and last True along axis 1."""
+    size = present.shape[1]
+    first = present.argmax(axis=1)
+    last = size - 1 - present[:, ::-1].argmax(axis=1)
+    return np.where(present.any(axis=1), last - first + 1, 0)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent analyze() calls from request threads into single
+    analyze_batch() calls. A batch is dispatched when it is full or
+    max_wait seconds after its first image arrived.
+    """
+
+    def __init__(self, analyzer, max_batch_size=8, max_wait=0.01):
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def analyze(self, image, timeout=None):
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((image, future))
+        return future.result(timeout)
+
+    def _ensure_thread(self):
+        # Threads don't survive fork(); restart the dispatcher in each worker
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, args=(self._queue,), daemon=True).start()
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results = self.analyzer.analyze_batch([image for image, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            record_timings(results)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+_analyzer = None
+_batcher = None
+_analyzer_lock = threading.Lock()
+
+# Warm-up state of this process: cold -> warming -> ready (or failed)
+_readiness = {'state': 'cold', 'pid': None, 'error': None, 'seconds': None}
+_readiness_lock = threading.Lock()
+
+
+def get_analyzer():
+    """
+    Returns the configured analyzer (settings.WOUND_ANALYZER).
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                config = settings.WOUND_ANALYZER
+                backend = import_string(config['BACKEND'])
+                _analyzer = backend(**config.get('OPTIONS', {}))
+    return _analyzer
+
+
+def get_batcher():
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(
+            get_analyzer(),
+            max_batch_size=settings.WOUND_ANALYSIS_BATCH_SIZE,
+            max_wait=settings.WOUND_ANALYSIS_BATCH_WAIT_MS / 1000
+        )
+    return _batcher
+
+
+def start_warm_up():
+    """
+    Loads and exercises the analyzer in a background thread so the first
+    upload is served hot. Returns immediately.
+    """
+    with _readiness_lock:
+        if _readiness['pid'] == os.getpid() and _readiness['state'] in ('warming', 'ready'):
+            return
+        _readiness.update(state='warming', pid=os.getpid(), error=None, seconds=None)
+    threading.Thread(target=warm_up_analyzer, name='wound-analyzer-warm-up', daemon=True).start()
+
+
+def warm_up_analyzer():
+    start = time.perf_counter()
+    try:
+        get_analyzer().warm_up()
+    except Exception as e:
+        logger.exception("Wound analyzer warm-up failed")
+        _readiness.update(state='failed', error=str(e))
+        return
+    _readiness.update(state='ready', seconds=round(time.perf_counter() - start, 3))
+
+
+def get_readiness():
+    """
+    Warm-up state of this process. A worker forked before the parent
+    finished warming up (the thread does not survive fork) starts over.
+    """
+    if _readiness['pid'] != os.getpid() and _readiness['state'] != 'ready':
+        start_warm_up()
+    readiness = dict(_readiness)
+    readiness.pop('pid')
+    if readiness['state'] == 'ready':
+        readiness['weights'] = get_analyzer().weights_info()
+    return readiness
+
+
+def analyze_wound_image(data):
+    """
+    Analyses one encoded image, sharing a batch with concurrent callers.
+    """
+    return get_batcher().analyze(data)
+
+
+def analyze_wound_images(images):
+    """
+    Analyses a list of encoded images in one batch (e.g. the image worker).
+    """
+    if not images:
+        return []
+    results = get_analyzer().analyze_batch(images)
+    record_timings(results)
+    return results
+
+
+def record_timings(results):
+    """
+    Accumulates per-stage latency (µs) of one batch in the default cache,
+    the same way upload rejections are counted.
+    """
+    counters = {stage: int(ms * 1000) for stage, ms in results[0]['timings_ms'].items()}
+    counters['batches'] = 1
+    counters['images'] = len(results)
+    for name, value in counters.items():
+        key = TIMING_KEY.format(name)
+        if not cache.add(key, value, timeout=None):
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                cache.set(key, value, timeout=None)
+
+
+def get_timing_stats():
+    """
+    Mean per-stage latency per batch, in milliseconds.
+    """
+    batches = cache.get(TIMING_KEY.format('batches'), 0)
+    images = cache.get(TIMING_KEY.format('images'), 0)
+    stats = {'batches': batches, 'images': images, 'mean_ms': {}}
+    for stage in STAGES:
+        total_us = cache.get(TIMING_KEY.format(stage), 0)
+        stats['mean_ms'][stage] = round(total_us / 1000 / batches, 2) if batches else None
+    return stats
+
+
+@receiver(setting_changed)
+def reset_analyzer(setting, **kwargs):
+    global _analyzer, _batcher
+    if setting in ('WOUND_ANALYZER', 'WOUND_ANALYSIS_BATCH_SIZE', 'WOUND_ANALYSIS_BATCH_WAIT_MS'):
+        _analyzer = None
+        _batcher = None
+        _readiness.update(state='cold', pid=None, error=None, seconds=None)
@@ -1,5 +1,23 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
 
 class ClinicalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clinical'
+
+    def ready(self):
+        # Signal handlers that keep the dashboard counters current
+        from . import counters  # noqa: F401
+        # ...and drop the cached dashboard responses
+        from core import response_cache  # noqa: F401
+
+        # Warm the analysis engine at boot (in the gunicorn master when
+        # started with --preload, so forked workers inherit it hot).
+        # Other management commands (migrate, test, ...) don't serve uploads.
+        is_command = os.path.basename(sys.argv[0]) == 'manage.py' and sys.argv[1:2] != ['runserver']
+        if settings.WOUND_ANALYZER_WARM_UP and not is_command:
+            from .analysis import start_warm_up
+            start_warm_up()
@@ -0,0 +1,307 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import DashboardCounter, Task, Alert, WoundAssessment
+from users.audit import audit_logs_flushed
+from users.models import User, SystemLog
+
+# Dashboard counts kept as DashboardCounter rows, so the dashboards read a
+# handful of rows instead of running COUNT(*) over the tables.
+#
+# Each model maps an instance to the counter keys (name, scope, period) it
+# adds one to. The keys are remembered when an instance is loaded; on save
+# the counters move by the difference, on delete the instance's keys drop
+# by one. Queryset update()/delete() and raw SQL bypass the signals, so
+# `manage.py rebuild_dashboard_counters` recomputes everything from the
+# tables (migration 0018 did so once; run it after bulk fixes).
+#
+# Distinct patient counts ("patients with tasks") use per-patient task
+# counters ('tasks', 'patient:<id>'): when one goes 0 -> 1 or 1 -> 0 the
+# matching patients_with_tasks counter follows.
+SECURITY_SEVERITIES = ('Error', 'Warning')
+KEYS_ATTR = '_dashboard_counter_keys'
+LOG_DELTAS_ATTR = '_dashboard_log_deltas'
+
+
+def day(value):
+    return timezone.localtime(value).date().isoformat() if value else ''
+
+
+def task_keys(task):
+    keys = [('tasks', f'patient:{task.patient_id}', '')]
+    nurse = f'nurse:{task.assigned_to_id}' if task.assigned_to_id else None
+    if nurse:
+        keys.append(('tasks', f'{nurse}:patient:{task.patient_id}', ''))
+    if task.status == 'PENDING':
+        keys.append(('tasks_pending', '', ''))
+        if nurse:
+            keys.append(('tasks_pending', nurse, ''))
+    elif task.status == 'COMPLETED':
+        if task.completed_at:
+            keys.append(('tasks_completed', '', day(task.completed_at)))
+        if nurse:
+            keys.append(('tasks_completed', nurse, ''))
+    return keys
+
+
+def alert_keys(alert):
+    keys = []
+    if not alert.is_dismissed:
+        keys.append(('alerts_active', '', ''))
+        if alert.severity == 'Critical':
+            keys.append(('alerts_active_critical', '', ''))
+    if alert.is_resolved and alert.severity == 'Critical':
+        keys.append(('alerts_resolved_critical', '', ''))
+    return keys
+
+
+def assessment_keys(assessment):
+    return [('assessments', '', day(assessment.created_at))]
+
+
+def user_keys(user):
+    return [('users_active', '', '')] if user.isActive else []
+
+
+def log_keys(log):
+    keys = [('logs', '', '')]
+    if log.severity in SECURITY_SEVERITIES:
+        keys.append(('logs_security', '', ''))
+    return keys
+
+
+# model: (keys function, fields it reads)
+TRACKED = {
+    Task: (task_keys, {'patient_id', 'assigned_to_id', 'status', 'completed_at'}),
+    Alert: (alert_keys, {'is_dismissed', 'is_resolved', 'severity'}),
+    WoundAssessment: (assessment_keys, {'created_at'}),
+    User: (user_keys, {'isActive'}),
+}
+
+
+def patients_counter_for(key):
+    """The patients_with_tasks key a per-patient task counter feeds, if any."""
+    name, scope, _ = key
+    if name != 'tasks':
+        return None
+    nurse, _, _ = scope.rpartition(':patient:')
+    return ('patients_with_tasks', nurse, '')
+
+
+def bump(deltas):
+    """Applies {key: delta} to the counters."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        # Missing counters start at 0; existing rows are left alone
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(name=name, scope=scope, period=period) for name, scope, period in deltas],
+            ignore_conflicts=True
+        )
+        for (name, scope, period), delta in sorted(deltas.items()):
+            counter = DashboardCounter.objects.filter(name=name, scope=scope, period=period)
+            patients_key = patients_counter_for((name, scope, period))
+            if patients_key is None:
+                counter.update(value=F('value') + delta)
+                continue
+
+            # Per-patient task counters: lock the row to see 0 <-> 1 changes
+            counter = counter.select_for_update().get()
+            before = counter.value
+            counter.value = before + delta
+            counter.save(update_fields=['value'])
+            if (before == 0) != (counter.value == 0):
+                bump({patients_key: 1 if before == 0 else -1})
+
+
+def compute_counters():
+    """Every counter recomputed from the source tables: {key: value}."""
+    values = Counter()
+
+    tasks = Task.objects.all()
+    for row in tasks.values('patient_id').annotate(n=Count('id')):
+        values['tasks', f"patient:{row['patient_id']}", ''] = row['n']
+    for row in tasks.filter(assigned_to__isnull=False).values('assigned_to_id', 'patient_id').annotate(n=Count('id')):
+        values['tasks', f"nurse:{row['assigned_to_id']}:patient:{row['patient_id']}", ''] = row['n']
+    for key in list(values):
+        values[patients_counter_for(key)] += 1
+
+    pending = tasks.filter(status='PENDING')
+    values['tasks_pending', '', ''] = pending.count()
+    for row in pending.filter(assigned_to__isnull=False).values('assigned_to_id').annotate(n=Count('id')):
+        values['tasks_pending', f"nurse:{row['assigned_to_id']}", ''] = row['n']
+    completed = tasks.filter(status='COMPLETED')
+    for row in completed.filter(assigned_to__isnull=False).values('assigned_to_id').annotate(n=Count('id')):
+        values['tasks_completed', f"nurse:{row['assigned_to_id']}", ''] = row['n']
+    by_day = completed.filter(completed_at__isnull=False).annotate(day=TruncDate('completed_at'))
+    for row in by_day.values('day').annotate(n=Count('id')):
+        values['tasks_completed', '', row['day'].isoformat()] = row['n']
+
+    active = Alert.objects.filter(is_dismissed=False)
+    values['alerts_active', '', ''] = active.count()
+    values['alerts_active_critical', '', ''] = active.filter(severity='Critical').count()
+    values['alerts_resolved_critical', '', ''] = Alert.objects.filter(severity='Critical', is_resolved=True).count()
+
+    by_day = WoundAssessment.objects.annotate(day=TruncDate('created_at'))
+    for row in by_day.values('day').annotate(n=Count('id')):
+        values['assessments', '', row['day'].isoformat()] = row['n']
+
+    values['users_active', '', ''] = User.objects.filter(isActive=True).count()
+    values.update(compute_log_counters())
+    return values
+
+
+def compute_log_counters():
+    return {
+        ('logs', '', ''): SystemLog.objects.count(),
+        ('logs_security', '', ''): SystemLog.objects.filter(severity__in=SECURITY_SEVERITIES).count(),
+    }
+
+
+def lock_counters():
+    """
+    Holds off bump() (and other rebuilds) until the current transaction
+    ends; dashboards keep reading. Must run inside transaction.atomic().
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(DashboardCounter._meta.db_table)} IN EXCLUSIVE MODE')
+    else:
+        # Row locks where supported (SQLite serializes writers anyway)
+        list(DashboardCounter.objects.select_for_update().values_list('pk', flat=True))
+
+
+def store_counters(values, names=None):
+    """
+    Replaces the stored counters (only those called `names`, if given)
+    with `values`, under lock_counters() so no concurrent bump() is lost
+    or collides with the reinserted rows.
+    """
+    with transaction.atomic():
+        lock_counters()
+        stale = DashboardCounter.objects.all()
+        if names is not None:
+            stale = stale.filter(name__in=names)
+        stale.delete()
+        DashboardCounter.objects.bulk_create([
+            DashboardCounter(name=name, scope=scope, period=period, value=value)
+            for (name, scope, period), value in values.items() if value
+        ])
+
+
+def rebuild_counters(compute=compute_counters, names=None):
+    """
+    Recomputes the counters with `compute` and stores them (only those
+    called `names`, if given). Counting happens under the lock too, so
+    changes made meanwhile are bumped onto the new values rather than
+    overwritten by them. Returns the values.
+    """
+    with transaction.atomic():
+        lock_counters()
+        values = compute()
+        store_counters(values, names)
+    return values
+
+
+def get_counters(*keys):
+    """
+    Current values for (name, scope, period) keys, as a dict; missing
+    counters are 0. One query.
+    """
+    condition = Q(pk__in=[])
+    for name, scope, period in keys:
+        condition |= Q(name=name, scope=scope, period=period)
+    values = {
+        (c.name, c.scope, c.period): c.value
+        for c in DashboardCounter.objects.filter(condition)
+    }
+    return {key: values.get(key, 0) for key in keys}
+
+
+def remember_keys(sender, instance, **kwargs):
+    # Only rows loaded from the database (or built with a pk) have a saved
+    # state to compare against. Reading a deferred field would cost a query,
+    # pre_save looks those up instead.
+    keys, fields = TRACKED[sender]
+    if instance.pk is None or fields & instance.get_deferred_fields():
+        return
+    setattr(instance, KEYS_ATTR, keys(instance))
+
+
+def load_saved_keys(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, KEYS_ATTR):
+        return
+    keys, _ = TRACKED[sender]
+    saved = sender._base_manager.filter(pk=instance.pk).first()
+    setattr(instance, KEYS_ATTR, keys(saved) if saved else [])
+
+
+def update_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    keys, _ = TRACKED[sender]
+    new = keys(instance)
+    deltas = Counter(new)
+    if not created:
+        deltas.subtract(getattr(instance, KEYS_ATTR, []))
+    bump(deltas)
+    setattr(instance, KEYS_ATTR, new)
+
+
+def drop_counters(sender, instance, **kwargs):
+    keys, _ = TRACKED[sender]
+    old = getattr(instance, KEYS_ATTR, None)
+    bump({key: -count for key, count in Counter(keys(instance) if old is None else old).items()})
+
+
+for model in TRACKED:
+    post_init.connect(remember_keys, sender=model)
+    pre_save.connect(load_saved_keys, sender=model)
+    post_save.connect(update_counters, sender=model)
+    post_delete.connect(drop_counters, sender=model)
+
+
+# System logs are only ever inserted. They leave in bulk: with their user
+# (counted below, so the delete stays a fast one) or through retention,
+# after which archive_system_logs recounts them. A deleted user's tasks are
+# unassigned by the FK's SET_NULL, so their nurse counters simply go.
+@receiver(post_save, sender=SystemLog)
+def count_log(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump(Counter(log_keys(instance)))
+
+
+@receiver(audit_logs_flushed)
+def count_flushed_logs(sender, logs, **kwargs):
+    # bulk_create doesn't send post_save
+    deltas = Counter()
+    for log in logs:
+        deltas.update(log_keys(log))
+    bump(deltas)
+
+
+@receiver(pre_delete, sender=User)
+def count_user_logs(sender, instance, **kwargs):
+    logs = SystemLog.objects.filter(user=instance).aggregate(
+        logs=Count('id'), security=Count('id', filter=Q(severity__in=SECURITY_SEVERITIES))
+    )
+    setattr(instance, LOG_DELTAS_ATTR, {
+        ('logs', '', ''): -logs['logs'],
+        ('logs_security', '', ''): -logs['security'],
+    })
+
+
+@receiver(post_delete, sender=User)
+def drop_user_counters(sender, instance, **kwargs):
+    bump(getattr(instance, LOG_DELTAS_ATTR, {}))
+    # Their tasks were unassigned by an UPDATE, which sends no signals
+    DashboardCounter.objects.filter(
+        Q(scope=f'nurse:{instance.pk}') | Q(scope__startswith=f'nurse:{instance.pk}:')
+    ).delete()
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from PIL import Image, UnidentifiedImageError
+from rest_framework import status
+
+from .imaging import sniff_format
+
+REJECTION_REASONS = ['too_large', 'too_many_pixels', 'unsupported_format']
+COUNTER_KEY = 'wound-upload-rejections:{}'
+
+# Slack for multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadRejected(Exception):
+    STATUS_CODES = {
+        'too_large': status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        'too_many_pixels': status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        'unsupported_format': status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+    }
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = self.STATUS_CODES[reason]
+
+
+class WoundImageUploadGuard(FileUploadHandler):
+    """
+    Upload handler that enforces the byte limit and format allow-list while
+    the multipart body is still streaming in. On violation the upload is
+    aborted without reading the rest of the body and the reason is kept on
+    `self.rejection` for the view to report.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.WOUND_UPLOAD_MAX_BYTES
+        self.received = 0
+        self.rejection = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.reject(too_large_error())
+
+        if start == 0:
+            try:
+                check_format(sniff_format(raw_data[:16]))
+            except UploadRejected as e:
+                self.reject(e)
+
+        # Pass the chunk on to the next handler (memory / temporary file)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def reject(self, error):
+        self.rejection = error
+        raise StopUpload(connection_reset=True)
+
+
+def install_upload_guard(request):
+    """
+    Adds the guard in front of Django's upload handlers; must run before
+    request.data / request.FILES is first accessed.
+    Raises UploadRejected straight away if Content-Length is already too big.
+    """
+    content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if content_length > settings.WOUND_UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise too_large_error()
+
+    guard = WoundImageUploadGuard(request._request)
+    request._request.upload_handlers.insert(0, guard)
+    return guard
+
+
+def check_image_header(fileobj):
+    """
+    Validates format and pixel count from the image header only (no decode).
+    """
+    try:
+        with Image.open(fileobj) as img:
+            image_format = img.format
+            width, height = img.size
+    except Image.DecompressionBombError:
+        raise too_many_pixels_error()
+    except UnidentifiedImageError:
+        raise UploadRejected('unsupported_format', "File is not a recognised image")
+    finally:
+        fileobj.seek(0)
+
+    check_format(image_format)
+    if width * height > settings.WOUND_IMAGE_MAX_PIXELS:
+        raise too_many_pixels_error()
+
+
+def check_format(image_format):
+    allowed = settings.WOUND_IMAGE_ALLOWED_FORMATS
+    if image_format not in allowed:
+        raise UploadRejected(
+            'unsupported_format',
+            f"Unsupported image format. Allowed: {', '.join(allowed)}"
+        )
+
+
+def too_large_error():
+    limit_mb = settings.WOUND_UPLOAD_MAX_BYTES / (1024 ** 2)
+    return UploadRejected('too_large', f"Image exceeds the {round(limit_mb, 1):g} MB upload limit")
+
+
+def too_many_pixels_error():
+    limit_mp = settings.WOUND_IMAGE_MAX_PIXELS / 1_000_000
+    return UploadRejected('too_many_pixels', f"Image exceeds the {round(limit_mp, 1):g} megapixel limit")
+
+
+def record_rejection(reason):
+    """
+    Counts a rejected upload. Counters live in the default cache, so they
+    are shared across workers when a shared cache backend is configured.
+    """
+    key = COUNTER_KEY.format(reason)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_rejection_counts():
+    return {reason: cache.get(COUNTER_KEY.format(reason), 0) for reason in REJECTION_REASONS}
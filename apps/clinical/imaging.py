@@ -0,0 +1,159 @@
+import io
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from .storage import get_blob_store
+
+JPEG_QUALITY = 70
+ORIGINAL = 'original'
+
+CONTENT_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'GIF': 'image/gif',
+}
+
+
+def get_rendition_sizes():
+    """
+    Returns {name: max_edge_px} for the configured derivatives, largest first.
+    """
+    sizes = settings.WOUND_IMAGE_RENDITIONS
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+
+def get_primary_rendition():
+    """
+    The largest derivative is the clinical image referenced by image_hash.
+    """
+    return next(iter(get_rendition_sizes()))
+
+
+def get_smallest_rendition():
+    return next(reversed(get_rendition_sizes()))
+
+
+def is_valid_rendition(name):
+    return name == ORIGINAL or name in settings.WOUND_IMAGE_RENDITIONS
+
+
+def encode_jpeg(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def open_scaled(data, max_edge, reducing_gap):
+    """
+    Decodes an image just large enough to produce a max_edge rendition.
+    JPEGs use draft mode so libjpeg scales by 1/2, 1/4 or 1/8 during the
+    DCT instead of materialising every pixel of a 50 MP phone photo. EXIF
+    orientation is applied afterwards, on the already reduced image.
+    """
+    img = Image.open(io.BytesIO(data))
+
+    if img.format == 'JPEG':
+        # The target box is square, so the requested size is the same
+        # before and after the EXIF rotation.
+        scale = min(max_edge / img.width, max_edge / img.height, 1)
+        img.draft('RGB', (
+            int(img.width * scale * reducing_gap),
+            int(img.height * scale * reducing_gap)
+        ))
+
+    ImageOps.exif_transpose(img, in_place=True)
+    return img
+
+
+def process_wound_image(data, names=None):
+    """
+    Decodes an uploaded image and builds the JPEG derivatives.
+    Returns ({rendition_name: jpeg_bytes}, perceptual_hash). Pass names to
+    build only a subset; the untouched upload is stored separately.
+    """
+    sizes = get_rendition_sizes()
+    reducing_gap = settings.WOUND_IMAGE_REDUCING_GAP
+    img = open_scaled(data, max(sizes.values()), reducing_gap)
+
+    # Palette images can only be resampled with NEAREST, convert them up front
+    if img.mode in ("P", "1"):
+        img = img.convert("RGB")
+
+    renditions = {}
+    # Each derivative is scaled from the previous (larger) one,
+    # so the full-size image is only resampled once.
+    for name, edge in sizes.items():
+        img.thumbnail((edge, edge), Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
+        # Handle Color Profiles (Convert RGBA/CMYK etc. to JPEG friendly RGB)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if names is None or name in names:
+            renditions[name] = encode_jpeg(img)
+
+    # Hashed from the smallest derivative, which is already in memory
+    return renditions, difference_hash(img)
+
+
+def difference_hash(img, size=8):
+    """
+    64-bit difference hash (dHash) as 16 hex chars: one bit per pair of
+    horizontally adjacent pixels of a 9x8 greyscale thumbnail. Re-encoded
+    or rescaled copies of a photo stay within a few bits of each other.
+    """
+    small = img.convert('L').resize((size + 1, size), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def hash_distance(a, b):
+    """Number of differing bits between two hex perceptual hashes."""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def store_renditions(renditions):
+    """
+    Writes each rendition to the blob store and returns {name: content_key}.
+    """
+    store = get_blob_store()
+    return {name: store.put(data) for name, data in renditions.items()}
+
+
+def sniff_format(header):
+    """
+    Identifies an image format from its leading bytes (magic numbers).
+    Returns a Pillow format name, or None if unrecognised.
+    """
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'GIF'
+    return None
+
+
+def sniff_content_type(header):
+    """
+    Best-effort content type from the leading bytes of an image.
+    """
+    return CONTENT_TYPES.get(sniff_format(header), CONTENT_TYPES['JPEG'])
+
+
+def render_upload(path):
+    """
+    Builds the renditions for a spooled upload without storing them, so
+    duplicates can be resolved first. Safe to run in a worker process;
+    returns ({name: jpeg_bytes}, perceptual_hash).
+    """
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    return process_wound_image(data)
@@ -0,0 +1,25 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from clinical.analysis import get_analyzer, save_weights, build_tissue_lut
+
+
+class Command(BaseCommand):
+    help = 'Build the wound analyzer weights file ahead of starting the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='Rebuild even if the weights file already exists')
+
+    def handle(self, *args, **options):
+        analyzer = get_analyzer()
+        path = getattr(analyzer, 'weights_path', None)
+        if not path:
+            raise CommandError("The configured analyzer has no weights file (WOUND_ANALYZER['OPTIONS']['weights'])")
+
+        if os.path.exists(path) and not options['force']:
+            self.stdout.write(f"Weights already present at {path} (use --force to rebuild)")
+            return
+
+        save_weights(path, build_tissue_lut())
+        self.stdout.write(self.style.SUCCESS(f"✅ Wrote {os.path.getsize(path) / (1024 ** 2):.1f} MB of weights to {path}"))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from clinical.models import WoundAssessment
+from clinical.storage import decode_data_uri
+from clinical.imaging import process_wound_image, store_renditions, get_primary_rendition, get_rendition_sizes, ORIGINAL
+
+
+class Command(BaseCommand):
+    help = 'Move legacy base64 wound images into the blob store in resumable batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of assessments processed per transaction')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Stop after migrating this many assessments')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report pending rows without writing anything')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        limit = options['limit']
+
+        # Rows that still carry inline data are exactly the unfinished work,
+        # so an interrupted run simply picks up where it left off.
+        pending = WoundAssessment.objects.filter(image_hash='').exclude(image='')
+        total = pending.count()
+        self.stdout.write(f"Assessments with inline images: {total}")
+        if options['dry_run'] or total == 0:
+            return
+
+        primary = get_primary_rendition()
+        smaller = [name for name in get_rendition_sizes() if name != primary]
+        migrated = 0
+        failed = 0
+        last_id = 0
+
+        while limit is None or migrated < limit:
+            size = batch_size if limit is None else min(batch_size, limit - migrated)
+            ids = list(
+                pending.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                rows = WoundAssessment.objects.select_for_update().filter(id__in=ids, image_hash='')
+                for assessment_id, image in rows.values_list('id', 'image'):
+                    try:
+                        data = decode_data_uri(image)
+                        # The legacy JPEG already is the clinical image; only
+                        # the smaller derivatives need to be generated.
+                        renditions, perceptual_hash = process_wound_image(data, names=smaller)
+                        renditions[primary] = renditions[ORIGINAL] = data
+                        keys = store_renditions(renditions)
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"Assessment {assessment_id}: could not decode image ({e})")
+                        continue
+                    WoundAssessment.objects.filter(id=assessment_id).update(
+                        image_hash=keys[primary], image_renditions=keys,
+                        perceptual_hash=perceptual_hash, image=''
+                    )
+                    migrated += 1
+
+            self.stdout.write(f"Migrated {migrated}/{total} (last id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Migrated {migrated} images, {failed} failed"))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from clinical.models import ChunkedUpload
+from clinical.processing import discard_spool
+
+
+class Command(BaseCommand):
+    help = 'Remove abandoned resumable uploads and their spooled chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.WOUND_CHUNKED_UPLOAD_TTL_HOURS,
+                            help='Purge uploads untouched for this many hours')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = ChunkedUpload.objects.filter(updated_at__lt=cutoff)
+
+        abandoned = 0
+        for upload in stale.filter(status='UPLOADING'):
+            discard_spool(upload.spool_path)
+            abandoned += 1
+
+        # Finalized uploads handed their spool file to the image pipeline,
+        # only the bookkeeping rows are left.
+        deleted, _ = stale.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Purged {deleted} uploads ({abandoned} abandoned before completion)"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from clinical.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from the patient, task, alert, assessment, user and log tables'
+
+    def handle(self, *args, **options):
+        values = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {sum(1 for value in values.values() if value)} dashboard counters"
+        ))
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from clinical.analysis import analyze_wound_images
+from clinical.imaging import render_upload, get_primary_rendition
+from clinical.processing import claim_image_jobs, requeue_stale_jobs, complete_image_job, fail_image_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued wound image uploads in a bounded process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.WOUND_IMAGE_WORKER_CONCURRENCY,
+                            help='Number of images decoded in parallel')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between queue polls when idle')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue PROCESSING jobs older than this many seconds on startup')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = options['poll_interval']
+
+        requeued = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+
+        # Pool children only decode images; don't let them inherit DB sockets
+        connections.close_all()
+
+        self.stdout.write(f"Image worker started with concurrency {concurrency}")
+        in_flight = {}
+        with ProcessPoolExecutor(max_workers=concurrency, initializer=django.setup) as pool:
+            while True:
+                free_slots = concurrency - len(in_flight)
+                if free_slots > 0:
+                    for job in claim_image_jobs(free_slots):
+                        in_flight[pool.submit(render_upload, job.upload_path)] = job
+
+                if not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                rendered = []
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        rendered.append((job, future.result()))
+                    except Exception as e:
+                        fail_image_job(job, e)
+                        self.stderr.write(f"Job {job.id} failed: {e}")
+
+                # Everything that finished together is analysed in one batch
+                primary = get_primary_rendition()
+                try:
+                    analyses = analyze_wound_images([renditions[primary] for _, (renditions, _) in rendered])
+                except Exception as e:
+                    self.stderr.write(f"Batch analysis failed, analysing jobs one by one: {e}")
+                    analyses = [None] * len(rendered)
+
+                for (job, (renditions, perceptual_hash)), analysis in zip(rendered, analyses):
+                    try:
+                        assessment, created = complete_image_job(job, renditions, perceptual_hash, analysis)
+                        outcome = "created" if created else "duplicate of"
+                        self.stdout.write(f"Job {job.id}: {outcome} assessment {assessment.id}")
+                    except Exception as e:
+                        fail_image_job(job, e)
+                        self.stderr.write(f"Job {job.id} failed: {e}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0008_alter_woundassessment_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woundassessment',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 key of the image in the blob store', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='woundassessment',
+            name='image',
+            field=models.TextField(blank=True, default='', help_text='Legacy base64 encoded image data'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0009_woundassessment_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woundassessment',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='Blob keys of the derivatives by rendition name'),
+        ),
+    ]
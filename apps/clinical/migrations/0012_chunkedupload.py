@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:37
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0011_imageprocessingjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('notes', models.TextField(blank=True)),
+                ('total_size', models.BigIntegerField()),
+                ('received_ranges', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('UPLOADING', 'Uploading'), ('FINALIZED', 'Finalized')], default='UPLOADING', max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('nurse', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='clinical.patient')),
+            ],
+        ),
+    ]
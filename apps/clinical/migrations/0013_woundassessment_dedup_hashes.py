@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0012_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageprocessingjob',
+            name='deduplicated',
+            field=models.BooleanField(default=False, help_text='Resolved to an existing assessment'),
+        ),
+        migrations.AddField(
+            model_name='imageprocessingjob',
+            name='idempotent',
+            field=models.BooleanField(default=True, help_text='Return an existing assessment for a duplicate photo'),
+        ),
+        migrations.AddField(
+            model_name='woundassessment',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='64-bit difference hash (hex) for near-duplicate detection', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='woundassessment',
+            name='source_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0013_woundassessment_dedup_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woundassessment',
+            name='analysis',
+            field=models.JSONField(blank=True, default=dict, help_text='Analyzer output: tissue composition, timings'),
+        ),
+        migrations.AddField(
+            model_name='woundassessment',
+            name='area',
+            field=models.FloatField(blank=True, help_text='Area in cm²', null=True),
+        ),
+    ]
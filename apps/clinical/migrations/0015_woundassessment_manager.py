@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0014_woundassessment_analysis'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='woundassessment',
+            options={'base_manager_name': 'objects'},
+        ),
+    ]
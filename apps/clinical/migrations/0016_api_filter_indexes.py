@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0015_woundassessment_manager'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_dismissed', False)), fields=['-timestamp', '-id'], name='alert_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_dismissed', False)), fields=['severity'], name='alert_active_severity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['is_resolved', 'severity'], name='alert_resolved_severity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['name', 'id'], name='patient_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['due_time'], name='task_pending_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woundassessment',
+            index=models.Index(fields=['created_at'], name='assessment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woundassessment',
+            index=models.Index(fields=['wound', '-created_at'], name='assessment_wound_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0016_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('scope', models.CharField(blank=True, default='', max_length=50)),
+                ('period', models.CharField(blank=True, default='', max_length=10)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'scope', 'period'), name='dashboard_counter_key')],
+            },
+        ),
+    ]
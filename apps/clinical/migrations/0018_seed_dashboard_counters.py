@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# Counts the existing tasks, alerts, assessments, users and logs into the
+# dashboard counters, so the dashboards are right straight after deploy;
+# from then on the signals in clinical/counters.py keep them current.
+#
+# Uses the live counters module rather than historical models: it only
+# reads columns that exist from here on (task status and assignment, alert
+# flags, assessment dates, user activity, log severity).
+
+
+def seed_counters(apps, schema_editor):
+    from clinical.counters import rebuild_counters
+    rebuild_counters()
+
+
+def clear_counters(apps, schema_editor):
+    apps.get_model('clinical', 'DashboardCounter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical', '0017_dashboardcounter'),
+        ('users', '0011_systemlog_partitioning'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_counters, clear_counters),
+    ]
@@ -1,6 +1,10 @@
+import os
+import uuid
 from django.db import models
+from django.db.models import ExpressionWrapper, Q
 from django.conf import settings
 from django.utils import timezone
+from .storage import get_blob_store, decode_data_uri
 
 class Patient(models.Model):
     # Core identification
@@ -59,6 +63,12 @@ class Patient(models.Model):
         
         super(Patient, self).save(*args, **kwargs)
 
+    class Meta:
+        indexes = [
+            # Registry search and the ?all=true listing (order_by name, id)
+            models.Index(fields=['name', 'id'], name='patient_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.mrn})"
 
@@ -70,22 +80,191 @@ class Wound(models.Model):
     def __str__(self):
         return f"Wound for {self.patient.name}"
 
+class WoundAssessmentQuerySet(models.QuerySet):
+    def with_image(self):
+        """Opt in to loading the legacy inline `image` column."""
+        return self.defer(None)
+
+
+class WoundAssessmentManager(models.Manager.from_queryset(WoundAssessmentQuerySet)):
+    """
+    Defers the legacy `image` column (several hundred KB of base64 per
+    row) unless a query opts in with .with_image(). Whether a row has an
+    inline image comes along as `has_inline_image`, so has_image() needs
+    no query per row.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer('image').annotate(
+            has_inline_image=ExpressionWrapper(~Q(image=''), output_field=models.BooleanField())
+        )
+
+
 class WoundAssessment(models.Model):
     wound = models.ForeignKey(Wound, related_name='assessments', on_delete=models.CASCADE)
     nurse = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    image = models.TextField(help_text="Base64 encoded image data") # Stores image directly in DB
+    # Legacy rows kept the base64 data URI inline; new uploads live in the blob store
+    image = models.TextField(blank=True, default='', help_text="Legacy base64 encoded image data")
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 key of the image in the blob store")
+    image_renditions = models.JSONField(default=dict, blank=True, help_text="Blob keys of the derivatives by rendition name")
+    source_hash = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the uploaded file")
+    perceptual_hash = models.CharField(max_length=16, blank=True, help_text="64-bit difference hash (hex) for near-duplicate detection")
     
     width = models.FloatField(help_text="Width in cm")
     depth = models.FloatField(help_text="Depth in cm")
+    area = models.FloatField(null=True, blank=True, help_text="Area in cm²")
     stage = models.CharField(max_length=50) # e.g. "Stage 2"
+    analysis = models.JSONField(default=dict, blank=True, help_text="Analyzer output: tissue composition, timings")
     
     notes = models.TextField(blank=True)
     is_escalated = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
 
+    objects = WoundAssessmentManager()
+
+    class Meta:
+        # Also used for related lookups (alert.assessment, job.assessment)
+        base_manager_name = 'objects'
+        indexes = [
+            # "Scans today" on the dashboards
+            models.Index(fields=['created_at'], name='assessment_created_idx'),
+            # Latest assessment per wound (patient list) and the dedup window
+            models.Index(fields=['wound', '-created_at'], name='assessment_wound_recent_idx'),
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Start from every column: Django still skips whatever this
+        # instance has deferred, but a loaded `image` must be reloaded too
+        if from_queryset is None:
+            from_queryset = WoundAssessment.objects.with_image()
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def has_image(self):
+        if self.image_hash:
+            return True
+        if 'image' not in self.get_deferred_fields():
+            return bool(self.image)
+        if hasattr(self, 'has_inline_image'):
+            return self.has_inline_image
+        # Loaded without the manager (e.g. select_related): ask the database
+        # instead of pulling the column into memory
+        return WoundAssessment.objects.filter(pk=self.pk).exclude(image='').exists()
+
+    def get_image_key(self, rendition=None):
+        """
+        Returns the blob key for a rendition, falling back to the
+        clinical image for assessments stored before derivatives existed.
+        """
+        if rendition and rendition in self.image_renditions:
+            return self.image_renditions[rendition]
+        return self.image_hash
+
+    def get_image_bytes(self, rendition=None):
+        """
+        Returns the raw image bytes, reading from the blob store or
+        decoding a legacy base64 data URI.
+        """
+        key = self.get_image_key(rendition)
+        if key:
+            return get_blob_store().read(key)
+        if self.image:
+            return decode_data_uri(self.image)
+        return None
+
     def __str__(self):
         return f"Assessment {self.id} for {self.wound.patient.name}"
 
+class ImageProcessingJob(models.Model):
+    """
+    A queued wound photo upload, processed out of band by the
+    run_image_worker command.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    patient = models.ForeignKey(Patient, related_name='image_jobs', on_delete=models.CASCADE)
+    nurse = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    notes = models.TextField(blank=True)
+    upload_path = models.CharField(max_length=500, help_text="Spooled upload awaiting processing")
+    idempotent = models.BooleanField(default=True, help_text="Return an existing assessment for a duplicate photo")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    assessment = models.ForeignKey(WoundAssessment, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
+    deduplicated = models.BooleanField(default=False, help_text="Resolved to an existing assessment")
+    attempts = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"[{self.status}] Image job {self.id} for patient {self.patient_id}"
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable wound photo upload. Chunks are written at their offsets into
+    a spool file; received_ranges tracks which [start, end) byte ranges
+    have arrived so clients only resend what is missing.
+    """
+    STATUS_CHOICES = [
+        ('UPLOADING', 'Uploading'),
+        ('FINALIZED', 'Finalized'),
+    ]
+
+    upload_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    patient = models.ForeignKey(Patient, related_name='chunked_uploads', on_delete=models.CASCADE)
+    nurse = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    notes = models.TextField(blank=True)
+    total_size = models.BigIntegerField()
+    received_ranges = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='UPLOADING')
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def spool_path(self):
+        return os.path.join(settings.WOUND_UPLOAD_SPOOL_DIR, 'chunked', f"{self.upload_id.hex}.part")
+
+    @property
+    def received_bytes(self):
+        return sum(end - start for start, end in self.received_ranges)
+
+    @property
+    def next_offset(self):
+        """End of the bytes received without gaps: where the next chunk may start."""
+        missing = self.missing_ranges()
+        return missing[0][0] if missing else self.total_size
+
+    def missing_ranges(self):
+        missing = []
+        position = 0
+        for start, end in self.received_ranges:
+            if start > position:
+                missing.append([position, start])
+            position = max(position, end)
+        if position < self.total_size:
+            missing.append([position, self.total_size])
+        return missing
+
+    def add_range(self, start, end):
+        """Records [start, end) as received, merging overlapping ranges."""
+        merged = []
+        for range_start, range_end in sorted(self.received_ranges + [[start, end]]):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        self.received_ranges = merged
+
+    def __str__(self):
+        return f"[{self.status}] Upload {self.upload_id} ({self.received_bytes}/{self.total_size} bytes)"
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -106,6 +285,16 @@ class Task(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     assigned_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Nurse dashboards and task lists: assigned_to=user [, status=...]
+            models.Index(fields=['assigned_to', 'status'], name='task_assignee_status_idx'),
+            # "Completed today": status='COMPLETED', completed_at in [today, tomorrow)
+            models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+            # Doctor schedule: pending tasks by due time
+            models.Index(fields=['due_time'], condition=models.Q(status='PENDING'), name='task_pending_due_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.status}] {self.title} for {self.patient.name}"
 
@@ -138,5 +327,37 @@ class Alert(models.Model):
     is_resolved = models.BooleanField(default=False)
     resolved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Active alert feed, newest first (matches the cursor ordering)
+            models.Index(
+                fields=['-timestamp', '-id'], condition=models.Q(is_dismissed=False),
+                name='alert_active_recent_idx'
+            ),
+            # Active alert counts by severity
+            models.Index(fields=['severity'], condition=models.Q(is_dismissed=False), name='alert_active_severity_idx'),
+            # Resolved-by-severity stats and unresolved priority cases
+            models.Index(fields=['is_resolved', 'severity'], name='alert_resolved_severity_idx'),
+        ]
+
     def __str__(self):
         return f"{self.severity}: {self.alert_type} - {self.patient.name}"
+
+class DashboardCounter(models.Model):
+    """
+    A pre-aggregated count for the dashboards, kept up to date by signals
+    (see clinical/counters.py). scope narrows it to e.g. one nurse
+    ('nurse:12'), period is an ISO day for daily counts ('' = all time).
+    """
+    name = models.CharField(max_length=50)
+    scope = models.CharField(max_length=50, blank=True, default='')
+    period = models.CharField(max_length=10, blank=True, default='')
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'scope', 'period'], name='dashboard_counter_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.scope or '*'}][{self.period or 'all'}] = {self.value}"
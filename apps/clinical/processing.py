@@ -0,0 +1,250 @@
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Wound, WoundAssessment, Alert, ImageProcessingJob, ChunkedUpload
+from .imaging import get_primary_rendition, store_renditions, hash_distance, ORIGINAL
+from .storage import get_blob_store
+from .analysis import analyze_wound_image
+
+
+class QueueFull(Exception):
+    pass
+
+
+def spool_upload(uploaded_file):
+    """
+    Writes an uploaded file to the spool directory chunk by chunk
+    and returns its path.
+    """
+    os.makedirs(settings.WOUND_UPLOAD_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(settings.WOUND_UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}.upload")
+    with open(path, 'wb') as fh:
+        for chunk in uploaded_file.chunks():
+            fh.write(chunk)
+    return path
+
+
+def discard_spool(path):
+    try:
+        os.remove(path)
+    except (FileNotFoundError, TypeError):
+        pass
+
+
+def start_chunked_upload(patient, nurse, notes, total_size):
+    """
+    Registers a resumable upload and pre-sizes its spool file.
+    """
+    upload = ChunkedUpload.objects.create(
+        patient=patient,
+        nurse=nurse,
+        notes=notes,
+        total_size=total_size
+    )
+    os.makedirs(os.path.dirname(upload.spool_path), exist_ok=True)
+    with open(upload.spool_path, 'wb') as fh:
+        fh.truncate(total_size)
+    return upload
+
+
+def write_chunk(upload, offset, data):
+    """
+    Writes a chunk at its offset and records the byte range as received.
+    Returns the refreshed upload.
+    """
+    if offset < 0 or offset + len(data) > upload.total_size:
+        raise ValueError(f"Chunk at {offset} is outside the upload's {upload.total_size} bytes")
+    with open(upload.spool_path, 'r+b') as fh:
+        fh.seek(offset)
+        fh.write(data)
+
+    # Lock the row so concurrent chunks don't overwrite each other's ranges
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        upload.add_range(offset, offset + len(data))
+        upload.save(update_fields=['received_ranges', 'updated_at'])
+    return upload
+
+
+def enqueue_image_job(patient, nurse, notes, upload_path, idempotent=True):
+    """
+    Queues a spooled upload for the image worker.
+    Raises QueueFull when the backlog is at WOUND_IMAGE_QUEUE_LIMIT so
+    callers can shed load instead of piling up work.
+    """
+    backlog = ImageProcessingJob.objects.filter(status__in=['PENDING', 'PROCESSING']).count()
+    if backlog >= settings.WOUND_IMAGE_QUEUE_LIMIT:
+        raise QueueFull(f"{backlog} image jobs already queued")
+
+    return ImageProcessingJob.objects.create(
+        patient=patient,
+        nurse=nurse,
+        notes=notes,
+        upload_path=upload_path,
+        idempotent=idempotent
+    )
+
+
+def claim_image_jobs(limit):
+    """
+    Atomically moves up to `limit` pending jobs to PROCESSING.
+    The conditional UPDATE makes concurrent workers skip each other's jobs.
+    """
+    claimed = []
+    candidates = ImageProcessingJob.objects.filter(status='PENDING').order_by('id')
+    for job_id in candidates.values_list('id', flat=True)[:limit * 2]:
+        updated = ImageProcessingJob.objects.filter(id=job_id, status='PENDING').update(
+            status='PROCESSING',
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(ImageProcessingJob.objects.select_related('patient', 'nurse').get(id=job_id))
+        if len(claimed) >= limit:
+            break
+    return claimed
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Returns jobs stuck in PROCESSING (e.g. after a worker crash) to the queue.
+    """
+    cutoff = timezone.now() - older_than
+    return ImageProcessingJob.objects.filter(status='PROCESSING', started_at__lt=cutoff).update(status='PENDING')
+
+
+def complete_image_job(job, renditions, perceptual_hash, analysis=None):
+    """
+    Records the worker's output; returns (assessment, created).
+    """
+    with transaction.atomic():
+        assessment, created = record_upload(
+            job.patient, job.nurse, job.notes, job.upload_path,
+            renditions, perceptual_hash, idempotent=job.idempotent, analysis=analysis
+        )
+        job.status = 'COMPLETED'
+        job.assessment = assessment
+        job.deduplicated = not created
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'assessment', 'deduplicated', 'finished_at'])
+    discard_spool(job.upload_path)
+    return assessment, created
+
+
+def fail_image_job(job, error):
+    job.status = 'FAILED'
+    job.error = str(error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    discard_spool(job.upload_path)
+
+
+def find_duplicate_assessment(patient, source_hash, perceptual_hash=None):
+    """
+    Returns the most recent assessment of the patient's wound, within
+    WOUND_IMAGE_DEDUP_WINDOW_SECONDS, that has the same file or (when
+    perceptual_hash is given) a visually near-identical photo.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.WOUND_IMAGE_DEDUP_WINDOW_SECONDS)
+    recent = WoundAssessment.objects.filter(
+        wound__patient=patient, created_at__gte=cutoff
+    ).defer('image').order_by('-created_at')
+
+    exact = recent.filter(source_hash=source_hash).first()
+    if exact or not perceptual_hash:
+        return exact
+
+    for candidate in recent.exclude(perceptual_hash=''):
+        if hash_distance(candidate.perceptual_hash, perceptual_hash) <= settings.WOUND_IMAGE_DEDUP_MAX_DISTANCE:
+            return candidate
+    return None
+
+
+def record_upload(patient, nurse, notes, upload_path, renditions, perceptual_hash, idempotent=True, analysis=None):
+    """
+    Stores a rendered upload, analyses it (unless `analysis` was already
+    computed) and creates its assessment. Returns (assessment, created).
+    A duplicate of a recent photo of the same wound either returns the
+    existing assessment (idempotent) or creates a new one that reuses the
+    stored blobs and analysis instead of writing them again.
+    """
+    store = get_blob_store()
+    source_hash = store.compute_file_key(upload_path)
+
+    duplicate = find_duplicate_assessment(patient, source_hash, perceptual_hash)
+    if duplicate and idempotent:
+        return duplicate, False
+
+    if duplicate and duplicate.image_renditions:
+        rendition_keys = duplicate.image_renditions
+        analysis = duplicate_analysis(duplicate)
+    else:
+        if analysis is None:
+            analysis = analyze_wound_image(renditions[get_primary_rendition()])
+        rendition_keys = store_renditions(renditions)
+        rendition_keys[ORIGINAL] = store.put_file(upload_path)
+
+    assessment = create_assessment(
+        patient, nurse, notes, rendition_keys, analysis,
+        source_hash=source_hash,
+        perceptual_hash=perceptual_hash
+    )
+    return assessment, True
+
+
+def duplicate_analysis(assessment):
+    """
+    Findings of an earlier assessment, for a re-upload of the same photo.
+    """
+    return dict(
+        assessment.analysis,
+        width=assessment.width,
+        depth=assessment.depth,
+        area=assessment.area,
+        stage=assessment.stage,
+        duplicate_of=assessment.id
+    )
+
+
+def create_assessment(patient, nurse, notes, rendition_keys, analysis, source_hash='', perceptual_hash=''):
+    """
+    Records a processed and analysed wound photo and raises an alert for
+    high severity findings.
+    """
+    wound, _ = Wound.objects.get_or_create(patient=patient)
+    stage = analysis['stage']
+
+    assessment = WoundAssessment.objects.create(
+        nurse=nurse,
+        wound=wound,
+        image_hash=rendition_keys[get_primary_rendition()], # Only blob references live in the DB
+        image_renditions=rendition_keys,
+        source_hash=source_hash,
+        perceptual_hash=perceptual_hash,
+        notes=notes,
+        width=analysis['width'],
+        depth=analysis['depth'],
+        area=analysis['area'],
+        stage=stage,
+        analysis={k: v for k, v in analysis.items() if k not in ('width', 'depth', 'area', 'stage')}
+    )
+
+    if stage == 'Stage 3' or stage == 'Unstageable':
+        assessment.is_escalated = True
+        assessment.save()
+        Alert.objects.create(
+            patient=patient,
+            assessment=assessment,
+            triggered_by=nurse,
+            alert_type="High Severity Detected",
+            description=f"AI classified as {stage}",
+            severity="Critical"
+        )
+
+    return assessment
@@ -0,0 +1,205 @@
+import random
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from .models import Patient, Alert, Wound, WoundAssessment, ClinicalRecord, Task
+
+PATIENTS = [
+    {
+        "name": "Sarah Jenkins",
+        "age": 64,
+        "gender": "Female",
+        "bed": "301-A",
+        "ward": "Medical-Surgical",
+        "diagnosis": "Peripheral Artery Disease (PAD), Chronic Venous Insufficiency",
+        "medical_history": "Type 2 Diabetes (15 years), Hypertension, Smoker",
+        "status": "Observation"
+    },
+    {
+        "name": "Robert Miller",
+        "age": 72,
+        "gender": "Male",
+        "bed": "205-B",
+        "ward": "Geriatric",
+        "diagnosis": "Pressure Injury (Stage 3) - Sacral region",
+        "medical_history": "Post-stroke immobility, Dementia, Frailty",
+        "status": "Stable"
+    },
+    {
+        "name": "Elena Rodriguez",
+        "age": 45,
+        "gender": "Female",
+        "bed": "412-1",
+        "ward": "Intensive Care Unit",
+        "diagnosis": "Severe Diabetic Foot Ulcer (DFU) with Sepsis",
+        "medical_history": "Type 1 Diabetes, Kidney Transplant (2020), Immunocompromised",
+        "status": "Critical"
+    },
+    {
+        "name": "David Thompson",
+        "age": 58,
+        "gender": "Male",
+        "bed": "304-B",
+        "ward": "Orthopedics",
+        "diagnosis": "Post-operative surgical site infection",
+        "medical_history": "Knee replacement surgery, Obesity (BMI 32)",
+        "status": "Stable"
+    },
+    {
+        "name": "Linda Wu",
+        "age": 67,
+        "gender": "Female",
+        "bed": "210-A",
+        "ward": "Medical-Surgical",
+        "diagnosis": "Stasis Ulcer, Venous Insufficiency",
+        "medical_history": "Varicose veins, Chronic lymphedema",
+        "status": "Observation"
+    },
+    {
+        "name": "James Wilson",
+        "age": 81,
+        "gender": "Male",
+        "bed": "502-1",
+        "ward": "Palliative Care",
+        "diagnosis": "Complex non-healing wound, Malignant ulcer",
+        "medical_history": "Metastatic Melanoma, Heart Failure",
+        "status": "At Risk"
+    },
+    {
+        "name": "Patricia Hall",
+        "age": 53,
+        "gender": "Female",
+        "bed": "308-C",
+        "ward": "Wound Care Unit",
+        "diagnosis": "Neuropathic Foot Ulcer",
+        "medical_history": "Type 2 Diabetes, Diabetic Retinopathy",
+        "status": "Stable"
+    },
+    {
+        "name": "Michael Brown",
+        "age": 41,
+        "gender": "Male",
+        "bed": "105-B",
+        "ward": "Emergency",
+        "diagnosis": "Traumatic Laceration (Dehisced)",
+        "medical_history": "No prior chronic illness",
+        "status": "Stable"
+    },
+    {
+        "name": "Susan Clark",
+        "age": 79,
+        "gender": "Female",
+        "bed": "220-4",
+        "ward": "Geriatric",
+        "diagnosis": "Arterial Ulcer - Left Ankle",
+        "medical_history": "Chronic Obstructive Pulmonary Disease (COPD), Atherosclerosis",
+        "status": "Observation"
+    },
+    {
+        "name": "Kevin Peterson",
+        "age": 35,
+        "gender": "Male",
+        "bed": "401-2",
+        "ward": "Burns Unit",
+        "diagnosis": "Partial Thickness Burn - Right Leg",
+        "medical_history": "Asthma",
+        "status": "Stable"
+    }
+]
+
+# Patients the demo alerts are raised for: (name, mrn)
+ALERT_PATIENTS = [
+    ("James Wilson", "MRN-8821"),
+    ("Elena Rodriguez", "MRN-9932"),
+    ("Robert Chen", "MRN-4412"),
+    ("Sarah Jenkins", "MRN-2210"),
+]
+
+# (index into a group of four patients, alert fields)
+ALERTS = [
+    (0, {"alert_type": "Deteriorating Wound", "description": "15% increase in necrotic tissue", "severity": "Critical"}),
+    (1, {"alert_type": "Missing Data", "description": "Depth measurement required", "severity": "Warning"}),
+    (2, {"alert_type": "Late Assessment", "description": "Overdue by 12 hours", "severity": "Warning"}),
+    (3, {"alert_type": "Suspected Infection", "description": "Purulent exudate noted", "severity": "Critical"}),
+    # Some resolved alerts for stats
+    (0, {"alert_type": "Resolved Infection", "description": "Antibiotics effective", "severity": "Critical", "is_dismissed": True}),
+]
+
+
+def seed_patients(copies=1, verbose=True):
+    """
+    Creates the demo patients, skipping names that already exist.
+    copies > 1 adds numbered duplicates, e.g. "Sarah Jenkins (2)", to seed
+    larger datasets. Returns the patients, created or existing.
+    """
+    patients = []
+    for copy in range(copies):
+        for p_data in PATIENTS:
+            name = p_data['name'] if copy == 0 else f"{p_data['name']} ({copy + 1})"
+            existing = Patient.objects.filter(name=name).first()
+            if existing:
+                if verbose:
+                    print(f"Patient {name} already exists, skipping.")
+                patients.append(existing)
+                continue
+
+            # Calculate a dummy DOB based on age
+            dob = date.today() - timedelta(days=p_data['age'] * 365 + random.randint(0, 365))
+            p = Patient(**dict(p_data, name=name, date_of_birth=dob))
+            # MRN will be auto-generated in save()
+            p.save()
+            if verbose:
+                print(f"Added patient: {p.name} with auto-MRN: {p.mrn}")
+            patients.append(p)
+    return patients
+
+
+def seed_alerts(patients=None):
+    """
+    Raises the demo alerts. Patients are taken in groups of four and each
+    group gets the same alert pattern; by default the four ALERT_PATIENTS.
+    """
+    if patients is None:
+        patients = [Patient.objects.get_or_create(name=name, mrn=mrn)[0] for name, mrn in ALERT_PATIENTS]
+
+    alerts = []
+    for offset in range(0, len(patients), 4):
+        group = patients[offset:offset + 4]
+        for index, fields in ALERTS:
+            if index < len(group):
+                alerts.append(Alert.objects.get_or_create(patient=group[index], **fields)[0])
+    return alerts
+
+
+def seed_activity(patients, nurse, physician, image_hash=''):
+    """
+    Gives each patient a physician, a wound with two assessments, two
+    vitals records, an alert on the latest assessment and a pending and a
+    completed nursing task.
+    """
+    for patient in patients:
+        patient.assigned_physician = physician
+        patient.save(update_fields=['assigned_physician'])
+
+        wound = Wound.objects.create(patient=patient, location="Sacrum")
+        for stage in ('Stage 2', 'Stage 3'):
+            assessment = WoundAssessment.objects.create(
+                wound=wound, nurse=nurse, image_hash=image_hash,
+                width=3.5, depth=0.8, stage=stage
+            )
+            ClinicalRecord.objects.create(
+                patient=patient, recorded_by=nurse,
+                heart_rate=82, respiratory_rate=16, oxygen_saturation=97
+            )
+
+        Alert.objects.create(
+            patient=patient, assessment=assessment, triggered_by=nurse,
+            alert_type="Wound Deterioration", description="Stage 3 detected", severity="Critical"
+        )
+
+        Task.objects.create(patient=patient, assigned_to=nurse, title="Dressing change", due_time="09:00")
+        Task.objects.create(
+            patient=patient, assigned_to=nurse, title="Wound assessment", due_time="14:00",
+            status='COMPLETED', is_completed=True, completed_at=timezone.now()
+        )
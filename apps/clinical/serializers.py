@@ -1,5 +1,37 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Patient, Alert, Wound, WoundAssessment, Task, ClinicalRecord
+from rest_framework.reverse import reverse
+from .models import Patient, Alert, Wound, WoundAssessment, Task, ClinicalRecord, ImageProcessingJob, ChunkedUpload
+from .storage import BlobNotFound, encode_data_uri
+from .imaging import is_valid_rendition, sniff_content_type, get_smallest_rendition
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for the top-level serializer of a request:
+    ?fields=id,name keeps only those fields and ?expand=wounds adds the
+    nested representations listed in Meta.expandable_fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self.parse_list(request.query_params.get('expand')):
+            if name in expandable:
+                serializer_class, options = expandable[name]
+                self.fields[name] = serializer_class(read_only=True, **options)
+
+        requested = self.parse_list(request.query_params.get('fields'))
+        if requested:
+            for name in set(self.fields) - set(requested) - set(expandable):
+                self.fields.pop(name)
+
+    @staticmethod
+    def parse_list(value):
+        return [item.strip() for item in (value or '').split(',') if item.strip()]
 
 class ClinicalRecordSerializer(serializers.ModelSerializer):
     patient_name = serializers.ReadOnlyField(source='patient.name')
@@ -18,15 +50,90 @@ class WoundAssessmentSerializer(serializers.ModelSerializer):
     nurse_name = serializers.ReadOnlyField(source='nurse.name')
     wound_location = serializers.ReadOnlyField(source='wound.location')
     patient_name = serializers.ReadOnlyField(source='wound.patient.name')
+    image = serializers.SerializerMethodField()
+    image_url = serializers.SerializerMethodField()
 
     class Meta:
         model = WoundAssessment
         fields = [
             'id', 'wound', 'wound_location', 'patient_name', 
-            'nurse', 'nurse_name', 'image', 'width', 'depth', 
-            'stage', 'notes', 'is_escalated', 'created_at'
+            'nurse', 'nurse_name', 'image', 'image_url', 'width', 'depth', 
+            'area', 'stage', 'analysis', 'notes', 'is_escalated', 'created_at'
         ]
-        read_only_fields = ['nurse', 'created_at', 'is_escalated']
+        read_only_fields = ['nurse', 'created_at', 'is_escalated', 'area', 'analysis']
+
+    def get_rendition(self):
+        """Rendition requested via ?rendition= (thumbnail, preview, clinical...)"""
+        request = self.context.get('request')
+        rendition = request.query_params.get('rendition') if request else None
+        return rendition if rendition and is_valid_rendition(rendition) else None
+
+    def include_image(self):
+        """Inline image data is opt-in via ?include_image=1"""
+        request = self.context.get('request')
+        return bool(request) and request.query_params.get('include_image') in ('1', 'true')
+
+    def get_image(self, obj):
+        """
+        Return the image URL, or with ?include_image=1 the image itself as
+        a data URI, resolving blob store references
+        """
+        if not self.include_image():
+            return self.get_image_url(obj)
+
+        rendition = self.get_rendition()
+        if not obj.get_image_key(rendition):
+            return obj.image or None
+        try:
+            data = obj.get_image_bytes(rendition)
+        except BlobNotFound:
+            return None
+        return encode_data_uri(data, sniff_content_type(data[:16]))
+
+    def get_image_url(self, obj):
+        """Return the cacheable streaming endpoint for the image"""
+        if not obj.has_image():
+            return None
+        url = reverse('assessment-image', args=[obj.id], request=self.context.get('request'))
+        rendition = self.get_rendition()
+        return f"{url}?rendition={rendition}" if rendition else url
+
+class ImageProcessingJobSerializer(serializers.ModelSerializer):
+    assessment = WoundAssessmentSerializer(read_only=True)
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageProcessingJob
+        fields = [
+            'id', 'patient', 'status', 'status_url', 'assessment', 'deduplicated', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+
+    def get_status_url(self, obj):
+        return reverse('nurse-clinical-upload-job', kwargs={'job_id': obj.id}, request=self.context.get('request'))
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    received_bytes = serializers.ReadOnlyField()
+    missing_ranges = serializers.ReadOnlyField()
+    chunk_size = serializers.SerializerMethodField()
+    upload_url = serializers.SerializerMethodField()
+    finalize_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'upload_id', 'patient', 'status', 'total_size', 'received_bytes',
+            'missing_ranges', 'chunk_size', 'upload_url', 'finalize_url', 'created_at'
+        ]
+
+    def get_chunk_size(self, obj):
+        return settings.WOUND_UPLOAD_CHUNK_SIZE
+
+    def get_upload_url(self, obj):
+        return reverse('nurse-clinical-upload-chunk', kwargs={'upload_id': obj.upload_id.hex}, request=self.context.get('request'))
+
+    def get_finalize_url(self, obj):
+        return reverse('nurse-clinical-finalize-upload', kwargs={'upload_id': obj.upload_id.hex}, request=self.context.get('request'))
 
 class WoundSerializer(serializers.ModelSerializer):
     assessments = WoundAssessmentSerializer(many=True, read_only=True)
@@ -35,7 +142,49 @@ class WoundSerializer(serializers.ModelSerializer):
         model = Wound
         fields = ['id', 'patient', 'location', 'created_at', 'assessments']
 
-class PatientSerializer(serializers.ModelSerializer):
+class AssessmentSummarySerializer(serializers.ModelSerializer):
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WoundAssessment
+        fields = ['id', 'stage', 'width', 'depth', 'area', 'is_escalated', 'created_at', 'thumbnail_url']
+
+    def get_thumbnail_url(self, obj):
+        if not obj.has_image():
+            return None
+        url = reverse('assessment-image', args=[obj.id], request=self.context.get('request'))
+        return f"{url}?rendition={get_smallest_rendition()}"
+
+class PatientListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact patient row for list views. Nested data is opt-in via ?expand=.
+    """
+    physician_name = serializers.ReadOnlyField(source='assigned_physician.name')
+    latest_assessment = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Patient
+        fields = [
+            'id', 'name', 'mrn', 'bed', 'ward', 'status',
+            'physician_name', 'latest_assessment'
+        ]
+        expandable_fields = {
+            'wounds': (WoundSerializer, {'many': True}),
+            'clinical_history': (ClinicalRecordSerializer, {'many': True, 'source': 'clinical_records'}),
+        }
+
+    def get_latest_assessment(self, obj):
+        # PatientViewSet prefetches each wound's latest assessment
+        if hasattr(obj, 'latest_wounds'):
+            latest = [a for wound in obj.latest_wounds for a in wound.latest_assessments]
+            assessment = max(latest, key=lambda a: a.created_at, default=None)
+        else:
+            assessment = WoundAssessment.objects.filter(wound__patient=obj).order_by('-created_at').first()
+        if assessment is None:
+            return None
+        return AssessmentSummarySerializer(assessment, context=self.context).data
+
+class PatientSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     clinical_history = ClinicalRecordSerializer(source='clinical_records', many=True, read_only=True)
     wounds = WoundSerializer(many=True, read_only=True)
     physician_name = serializers.ReadOnlyField(source='assigned_physician.name')
@@ -0,0 +1,219 @@
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobStore:
+    """
+    Content-addressed blob storage.
+    Every blob is keyed by the SHA-256 hex digest of its bytes, so storing the
+    same image twice is a no-op and the key doubles as an integrity check.
+    """
+
+    @staticmethod
+    def compute_key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def compute_file_key(path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def put(self, data):
+        """Store bytes and return their content key."""
+        raise NotImplementedError
+
+    def put_file(self, path):
+        """Store the contents of a local file and return its content key."""
+        with open(path, 'rb') as fh:
+            return self.put(fh.read())
+
+    def open(self, key):
+        """Return a readable binary file object for the blob."""
+        raise NotImplementedError
+
+    def read(self, key):
+        with self.open(key) as fh:
+            return fh.read()
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def size(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def usage(self):
+        """Returns (number of blobs, total bytes) in the store."""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores blobs on the local filesystem, sharded as <root>/ab/cd/<key>
+    to keep directory listings small.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        self._usage_lock = threading.Lock()
+        self._usage = {}  # leaf directory: (mtime_ns, blobs, bytes)
+
+    def path(self, key):
+        if len(key) != 64 or not all(c in '0123456789abcdef' for c in key):
+            raise BlobNotFound(key)
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data):
+        key = self.compute_key(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file first so readers never observe a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def put_file(self, path):
+        # Streamed copy, large originals are never held in memory
+        key = self.compute_file_key(path)
+        target = self.path(key)
+        if os.path.exists(target):
+            return key
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(path, 'rb') as src:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def open(self, key):
+        try:
+            return open(self.path(key), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def exists(self, key):
+        try:
+            return os.path.exists(self.path(key))
+        except BlobNotFound:
+            return False
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def usage(self):
+        # Blobs are immutable and written with os.replace, so a leaf
+        # directory's contents only change when its mtime does. Only those
+        # directories are listed again; the rest reuse the last totals.
+        with self._usage_lock:
+            seen = {}
+            for shard in self._list_dirs(self.root):
+                for leaf in self._list_dirs(shard.path):
+                    mtime = leaf.stat().st_mtime_ns
+                    known = self._usage.get(leaf.path)
+                    if known is None or known[0] != mtime:
+                        known = (mtime, *self._scan(leaf.path))
+                    seen[leaf.path] = known
+            self._usage = seen
+            return (
+                sum(blobs for _, blobs, _ in seen.values()),
+                sum(size for _, _, size in seen.values())
+            )
+
+    @staticmethod
+    def _list_dirs(path):
+        try:
+            with os.scandir(path) as entries:
+                return [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _scan(path):
+        blobs = size = 0
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and not entry.name.startswith('.tmp-'):
+                    blobs += 1
+                    size += entry.stat().st_size
+        return blobs, size
+
+
+def decode_data_uri(value):
+    """
+    Decodes a 'data:image/jpeg;base64,...' string (or bare base64) to bytes.
+    """
+    if value.startswith('data:'):
+        value = value.split(',', 1)[1]
+    return base64.b64decode(value)
+
+
+def encode_data_uri(data, content_type='image/jpeg'):
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+_blob_store = None
+
+
+def get_blob_store():
+    """
+    Returns the configured blob store (settings.WOUND_IMAGE_STORAGE).
+    """
+    global _blob_store
+    if _blob_store is None:
+        config = settings.WOUND_IMAGE_STORAGE
+        backend = import_string(config['BACKEND'])
+        _blob_store = backend(**config.get('OPTIONS', {}))
+    return _blob_store
+
+
+@receiver(setting_changed)
+def reset_blob_store(setting, **kwargs):
+    global _blob_store
+    if setting == 'WOUND_IMAGE_STORAGE':
+        _blob_store = None
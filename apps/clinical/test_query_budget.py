@@ -0,0 +1,219 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from django.views.static import serve
+from PIL import Image
+from rest_framework.test import APIClient
+
+from clinical import seeding
+from clinical.models import ImageProcessingJob, Task, WoundAssessment
+from clinical.processing import start_chunked_upload, write_chunk
+from clinical.storage import get_blob_store
+from users.authentication import get_tokens_for_user, get_user_cache
+from users.models import User, SystemLog
+from core.testing import background_features_off
+
+background_settings = background_features_off()
+
+
+def setUpModule():
+    background_settings.enable()
+
+
+def tearDownModule():
+    background_settings.disable()
+
+
+BUDGET_FILE = os.path.join(os.path.dirname(__file__), 'query_budgets.json')
+
+BLOB_ROOT = tempfile.mkdtemp(prefix='query-budget-')
+
+PASSWORD = 'Budget!Passw0rd'
+
+
+def iter_routes(patterns, prefix=''):
+    """
+    Yields (route, callback) for every URL pattern, with nested includes
+    flattened into a single route string, e.g. 'api/clinical/^alerts/$'.
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield prefix + str(pattern.pattern), pattern.callback
+
+
+def get_api_routes():
+    """
+    Every route in core.urls except the admin site, static files and the
+    DRF format suffix variants (same view as the plain route).
+    """
+    routes = []
+    for route, callback in iter_routes(get_resolver().url_patterns):
+        if route.startswith('admin/') or callback is serve:
+            continue
+        if '(?P<format>' in route or '<drf_format_suffix:format>' in route:
+            continue
+        routes.append(route)
+    return routes
+
+
+def load_budgets():
+    with open(BUDGET_FILE) as fh:
+        return json.load(fh)
+
+
+@override_settings(
+    WOUND_IMAGE_STORAGE={'BACKEND': 'clinical.storage.LocalBlobStore', 'OPTIONS': {'root': BLOB_ROOT}},
+    WOUND_UPLOAD_SPOOL_DIR=os.path.join(BLOB_ROOT, 'spool'),
+    WOUND_ANALYZER_WARM_UP=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTests(TestCase):
+    """
+    Hits every API route at two dataset sizes (seeded with clinical.seeding)
+    and fails if the number of SQL queries grows with the data or exceeds
+    the route's budget in query_budgets.json.
+
+    Budget entries are keyed by route and give the URL to request (with
+    {patient}, {alert}, ... placeholders), the user role to authenticate as
+    ("anonymous" for none), the expected status and the query budget.
+    Write routes add the "method" and the "data" to send (placeholders are
+    filled in the same way); fields listed in "files" get a JPEG and the
+    request is sent as multipart. Routes that cannot be measured this way
+    carry {"skip": reason}.
+
+    After an intentional change, rewrite the file with
+        UPDATE_QUERY_BUDGETS=1 python manage.py test clinical.test_query_budget
+    and review the diff.
+    """
+    small_copies = 1
+    large_copies = 3
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(BLOB_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.users = {
+            'admin': User.objects.create(name='Ada Admin', email='admin@example.com', role='Admin'),
+            'doctor': User.objects.create(name='Dan Doctor', email='doctor@example.com', role='Doctor'),
+            'nurse': User.objects.create(name='Nia Nurse', email='nurse@example.com', role='Nurse'),
+        }
+
+        self.users['nurse'].set_password(PASSWORD)
+        self.users['nurse'].save()
+
+        buffer = io.BytesIO()
+        Image.effect_mandelbrot((64, 48), (-2.0, -1.2, 1.0, 1.2), 64).convert('RGB').save(buffer, 'JPEG')
+        self.image = buffer.getvalue()
+        self.image_hash = get_blob_store().put(self.image)
+
+    def seed(self, copies):
+        """Grows the dataset to `copies` times the demo patient list."""
+        patients = seeding.seed_patients(copies=copies, verbose=False)
+        new_patients = [p for p in patients if not p.wounds.exists()]
+        seeding.seed_alerts(patients)
+        seeding.seed_activity(new_patients, self.users['nurse'], self.users['doctor'], self.image_hash)
+
+        for patient in new_patients:
+            for user in self.users.values():
+                SystemLog.objects.create(user=user, action=f"Viewed patient: {patient.name}", ip_address='10.0.0.1')
+            SystemLog.objects.create(action=f"Imported patient: {patient.name}", severity='Success')
+
+        assessment = WoundAssessment.objects.filter(wound__patient__in=new_patients).latest('id')
+        patient = assessment.wound.patient
+        job = ImageProcessingJob.objects.create(
+            patient=patient, nurse=self.users['nurse'], upload_path='/nonexistent',
+            status='COMPLETED', assessment=assessment
+        )
+        # Fully received, so finalize goes all the way to queueing the job
+        upload = start_chunked_upload(patient, self.users['nurse'], '', len(self.image))
+        write_chunk(upload, 0, self.image)
+        return {
+            'patient': patient.id,
+            'alert': patient.alerts.filter(is_dismissed=False).latest('id').id,
+            'task': Task.objects.filter(assigned_to=self.users['nurse']).latest('id').id,
+            'user': self.users['nurse'].id,
+            'log': SystemLog.objects.latest('id').id,
+            'assessment': assessment.id,
+            'job': job.id,
+            'upload': upload.upload_id.hex,
+            'email': self.users['nurse'].email,
+            'password': PASSWORD,
+            'refresh': str(get_tokens_for_user(self.users['doctor'])),
+            'revoked_refresh': str(get_tokens_for_user(self.users['doctor'])),
+        }
+
+    def get_token(self, user):
+        """An access token as issued by the login view."""
+        return str(get_tokens_for_user(user).access_token)
+
+    def count_queries(self, entry, objects):
+        self.client.credentials()
+        if entry['user'] != 'anonymous':
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_token(self.users[entry['user']])}")
+
+        # Start every request cold so cached counters and users don't hide queries
+        cache.clear()
+        get_user_cache().clear()
+        url = entry['url'].format(**objects)
+        send = getattr(self.client, entry.get('method', 'get'))
+        data = {
+            key: value.format(**objects) if isinstance(value, str) else value
+            for key, value in entry.get('data', {}).items()
+        }
+        for field in entry.get('files', []):
+            data[field] = SimpleUploadedFile('wound.jpg', self.image, content_type='image/jpeg')
+        with CaptureQueriesContext(connection) as queries:
+            if data:
+                response = send(url, data, format='multipart' if 'files' in entry else 'json')
+            else:
+                response = send(url)
+        return response.status_code, len(queries)
+
+    def measure(self, budgets, objects):
+        return {
+            route: self.count_queries(entry, objects)
+            for route, entry in budgets.items() if 'skip' not in entry
+        }
+
+    def test_every_route_has_a_budget(self):
+        routes = set(get_api_routes())
+        budgets = set(load_budgets())
+        self.assertFalse(routes - budgets, "Routes missing from query_budgets.json")
+        self.assertFalse(budgets - routes, "Stale routes in query_budgets.json")
+
+    def test_query_counts_are_flat_and_within_budget(self):
+        budgets = load_budgets()
+        small = self.measure(budgets, self.seed(self.small_copies))
+        large = self.measure(budgets, self.seed(self.large_copies))
+
+        if os.environ.get('UPDATE_QUERY_BUDGETS'):
+            for route, (status_code, queries) in large.items():
+                budgets[route]['queries'] = queries
+            with open(BUDGET_FILE, 'w') as fh:
+                json.dump(budgets, fh, indent=2)
+                fh.write('\n')
+
+        failures = []
+        for route, (status_code, queries) in large.items():
+            entry = budgets[route]
+            if status_code != entry['status'] or small[route][0] != entry['status']:
+                failures.append(f"{route}: expected HTTP {entry['status']}, got {small[route][0]} / {status_code}")
+            elif queries != small[route][1]:
+                failures.append(f"{route}: {small[route][1]} queries at {self.small_copies}x data, {queries} at {self.large_copies}x")
+            elif queries > entry['queries']:
+                failures.append(f"{route}: {queries} queries, budget is {entry['queries']}")
+        self.assertFalse(failures, "\n" + "\n".join(failures))
@@ -0,0 +1,1123 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+from rest_framework.test import APIClient
+
+from clinical.analysis import (
+    STAGES, ClassicalWoundAnalyzer, MicroBatcher, classify_colours, get_analyzer, get_timing_stats, start_warm_up
+)
+from clinical.guardrails import MULTIPART_OVERHEAD
+from clinical.imaging import hash_distance, open_scaled, process_wound_image, render_upload
+from clinical.models import Patient, Wound, WoundAssessment, ClinicalRecord, Task, Alert, ChunkedUpload, ImageProcessingJob
+from clinical.processing import (
+    claim_image_jobs, complete_image_job, enqueue_image_job, fail_image_job, requeue_stale_jobs
+)
+from clinical.storage import BlobNotFound, LocalBlobStore, decode_data_uri, encode_data_uri, get_blob_store
+from users.models import User, SystemLog
+from users.utils import search_system_logs
+from core.response_cache import get_cache_stats, response_key
+from core.testing import background_features_off
+
+background_settings = background_features_off()
+
+
+def setUpModule():
+    background_settings.enable()
+
+
+def tearDownModule():
+    background_settings.disable()
+
+
+def jpeg_bytes(size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.effect_mandelbrot(size, (-2.0, -1.2, 1.0, 1.2), 64).convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+LEGACY_IMAGE = 'data:image/jpeg;base64,/9j/4AAQSkZJRg=='
+
+
+class PatientQueryCountTests(TestCase):
+    """
+    Serializing a page of patients must cost the same number of queries
+    however many patients (and nested wounds / records) it contains.
+    """
+
+    def setUp(self):
+        self.doctor = User.objects.create(name='Doc Tor', email='doctor@example.com', role='Doctor')
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.client = APIClient()
+
+    def add_patients(self, count):
+        for _ in range(count):
+            physician = User.objects.create(
+                name='Phys Ician', email=f'physician{User.objects.count()}@example.com', role='Doctor'
+            )
+            patient = Patient.objects.create(name='Patient', ward='A', assigned_physician=physician)
+            wound = Wound.objects.create(patient=patient)
+            for stage in ('Stage 1', 'Stage 2'):
+                WoundAssessment.objects.create(
+                    wound=wound, nurse=self.nurse, image_hash='0' * 64,
+                    width=1.0, depth=0.5, stage=stage
+                )
+                ClinicalRecord.objects.create(patient=patient, recorded_by=self.nurse, heart_rate=80)
+            # Legacy row, image inline instead of in the blob store
+            WoundAssessment.objects.create(
+                wound=wound, nurse=self.nurse, image=LEGACY_IMAGE, width=1.0, depth=0.5, stage='Stage 3'
+            )
+            Task.objects.create(patient=patient, assigned_to=self.nurse, title='Check dressing', due_time='09:00')
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_flat(self, user, url):
+        self.add_patients(2)
+        small = self.count_queries(user, url)
+        self.add_patients(8)
+        large = self.count_queries(user, url)
+        self.assertEqual(small, large, f"{url} ran {small} queries for 2 patients but {large} for 10")
+
+    def test_doctor_list(self):
+        self.assert_flat(self.doctor, '/api/clinical/patients/')
+
+    def test_doctor_list_expanded(self):
+        self.assert_flat(self.doctor, '/api/clinical/patients/?expand=wounds,clinical_history')
+
+    def test_nurse_assigned_list(self):
+        self.assert_flat(self.nurse, '/api/clinical/patients/?expand=wounds')
+
+    def test_nurse_all_patients_list(self):
+        self.assert_flat(self.nurse, '/api/clinical/patients/?all=true&expand=wounds,clinical_history')
+
+    def test_retrieve(self):
+        self.add_patients(1)
+        patient = Patient.objects.get()
+        url = f'/api/clinical/patients/{patient.id}/'
+        small = self.count_queries(self.doctor, url)
+
+        wound = patient.wounds.get()
+        for _ in range(5):
+            WoundAssessment.objects.create(wound=wound, nurse=self.doctor, image_hash='0' * 64, width=1.0, depth=0.5, stage='Stage 2')
+            WoundAssessment.objects.create(wound=wound, nurse=self.doctor, image=LEGACY_IMAGE, width=1.0, depth=0.5, stage='Stage 2')
+            ClinicalRecord.objects.create(patient=patient, recorded_by=self.doctor, heart_rate=70)
+        self.assertEqual(small, self.count_queries(self.doctor, url))
+
+
+class PatientListSerializerTests(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create(name='Doc Tor', email='doctor@example.com', role='Doctor')
+        self.patient = Patient.objects.create(name='Patient', ward='A', assigned_physician=self.doctor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def rows(self, query=''):
+        response = self.client.get(f'/api/clinical/patients/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_compact_rows(self):
+        now = timezone.now()
+        first, second = Wound.objects.create(patient=self.patient), Wound.objects.create(patient=self.patient)
+        WoundAssessment.objects.create(wound=first, image_hash='0' * 64, width=1, depth=1, stage='Stage 1', created_at=now - timedelta(days=2))
+        latest = WoundAssessment.objects.create(wound=second, image_hash='0' * 64, width=2, depth=1, stage='Stage 3', created_at=now - timedelta(days=1))
+        WoundAssessment.objects.create(wound=second, image_hash='0' * 64, width=3, depth=1, stage='Stage 2', created_at=now - timedelta(days=3))
+        Patient.objects.create(name='New Patient', ward='B')
+
+        with_wounds, without = self.rows()
+        self.assertEqual(
+            set(with_wounds),
+            {'id', 'name', 'mrn', 'bed', 'ward', 'status', 'physician_name', 'latest_assessment'}
+        )
+        self.assertEqual(with_wounds['physician_name'], 'Doc Tor')
+        self.assertEqual(with_wounds['latest_assessment']['id'], latest.id)
+        self.assertTrue(with_wounds['latest_assessment']['thumbnail_url'].endswith(
+            reverse('assessment-image', args=[latest.id]) + '?rendition=thumbnail'
+        ))
+        self.assertIsNone(without['latest_assessment'])
+
+    def test_sparse_fieldsets(self):
+        Wound.objects.create(patient=self.patient)
+        self.assertEqual(set(self.rows('?fields=id,name')[0]), {'id', 'name'})
+        self.assertEqual(set(self.rows('?fields=id, unknown')[0]), {'id'})
+
+        row = self.rows('?fields=id&expand=wounds,clinical_history,unknown')[0]
+        self.assertEqual(set(row), {'id', 'wounds', 'clinical_history'})
+        self.assertEqual(len(row['wounds']), 1)
+
+    def test_retrieve_is_full_record(self):
+        response = self.client.get(f'/api/clinical/patients/{self.patient.id}/')
+        self.assertIn('wounds', response.data)
+        self.assertIn('clinical_history', response.data)
+        response = self.client.get(f'/api/clinical/patients/{self.patient.id}/?fields=id,name')
+        self.assertEqual(set(response.data), {'id', 'name'})
+
+
+def today_range():
+    start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
+@skipUnless(connection.vendor == 'postgresql', "EXPLAIN output is PostgreSQL specific")
+class IndexUsageTests(TestCase):
+    """
+    The API's hot filters must be able to use their indexes. Test tables
+    are tiny, so sequential scans are switched off to make the planner show
+    the index it would pick on a large table.
+    """
+
+    def setUp(self):
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def index_names(self, index_name):
+        # On a partitioned table (system logs) the plan names each
+        # partition's own index, attached to the parent index
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(%s)", [index_name]
+            )
+            return [index_name] + [row[0] for row in cursor.fetchall()]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in self.index_names(index_name)), f"{index_name} not used:\n{plan}")
+
+    def test_alert_feed(self):
+        active = Alert.objects.filter(is_dismissed=False)
+        self.assertUsesIndex(active.order_by('-timestamp', '-id')[:50], 'alert_active_recent_idx')
+        self.assertUsesIndex(active.filter(severity='Critical'), 'alert_active_severity_idx')
+        self.assertUsesIndex(Alert.objects.filter(severity='Critical', is_resolved=True), 'alert_resolved_severity_idx')
+
+    def test_tasks(self):
+        start, end = today_range()
+        self.assertUsesIndex(Task.objects.filter(assigned_to=self.nurse, status='PENDING'), 'task_assignee_status_idx')
+        self.assertUsesIndex(Task.objects.filter(status='PENDING').order_by('due_time')[:5], 'task_pending_due_idx')
+        self.assertUsesIndex(
+            Task.objects.filter(status='COMPLETED', completed_at__gte=start, completed_at__lt=end),
+            'task_status_completed_idx'
+        )
+
+    def test_assessments_today(self):
+        start, end = today_range()
+        self.assertUsesIndex(WoundAssessment.objects.filter(created_at__gte=start, created_at__lt=end), 'assessment_created_idx')
+
+    def test_patient_registry(self):
+        self.assertUsesIndex(Patient.objects.order_by('name', 'id')[:50], 'patient_name_idx')
+
+    def test_system_logs(self):
+        self.assertUsesIndex(SystemLog.objects.order_by('-timestamp', '-id')[:50], 'systemlog_recent_idx')
+        self.assertUsesIndex(SystemLog.objects.filter(severity__in=['Error', 'Warning']), 'systemlog_severity_idx')
+
+    def test_system_log_search(self):
+        # The trigram indexes from users migration 0009 match icontains
+        self.assertUsesIndex(SystemLog.objects.filter(action__icontains='login'), 'systemlog_action_trgm_idx')
+        self.assertUsesIndex(SystemLog.objects.filter(ip_address__icontains='10.0'), 'systemlog_ip_trgm_idx')
+        self.assertUsesIndex(User.objects.filter(name__icontains='nurse'), 'user_name_trgm_idx')
+
+        searched = search_system_logs(SystemLog.objects.all(), 'login')
+        self.assertUsesIndex(searched, 'systemlog_action_trgm_idx')
+        self.assertUsesIndex(searched, 'systemlog_ip_trgm_idx')
+
+
+class DashboardCounterTests(TestCase):
+    """Counters kept up by signals must match a recount from the tables."""
+
+    def setUp(self):
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.other = User.objects.create(name='Oth Er', email='other@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+
+    def assertCountersMatch(self):
+        from clinical.counters import compute_counters
+        from clinical.models import DashboardCounter
+
+        stored = {
+            (c.name, c.scope, c.period): c.value
+            for c in DashboardCounter.objects.exclude(value=0)
+        }
+        expected = {key: value for key, value in compute_counters().items() if value}
+        self.assertEqual(stored, expected)
+
+    def test_counters_follow_changes(self):
+        task = Task.objects.create(patient=self.patient, assigned_to=self.nurse, title='Dress wound', due_time='09:00')
+        second = Task.objects.create(patient=self.patient, assigned_to=self.nurse, title='Check', due_time='14:00')
+        alert = Alert.objects.create(patient=self.patient, alert_type='Deterioration', severity='Critical')
+        wound = Wound.objects.create(patient=self.patient)
+        WoundAssessment.objects.create(wound=wound, nurse=self.nurse, image_hash='0' * 64, width=1.0, depth=0.5, stage='Stage 1')
+        self.assertCountersMatch()
+
+        task.status = 'COMPLETED'
+        task.completed_at = timezone.now()
+        task.save()
+        deferred = Task.objects.only('id', 'title').get(pk=second.pk)
+        deferred.assigned_to = self.other
+        deferred.save()
+        alert.is_resolved = True
+        alert.save()
+        self.nurse.isActive = False
+        self.nurse.save()
+        self.assertCountersMatch()
+
+        task.delete()
+        self.other.delete()
+        self.patient.delete()
+        self.assertCountersMatch()
+
+    def test_migration_seeds_existing_data(self):
+        from clinical.models import DashboardCounter
+        seed = import_module('clinical.migrations.0018_seed_dashboard_counters')
+
+        Task.objects.create(patient=self.patient, assigned_to=self.nurse, title='Dress wound', due_time='09:00')
+        Alert.objects.create(patient=self.patient, alert_type='Deterioration', severity='Critical')
+        DashboardCounter.objects.all().delete()  # data from before the counters existed
+
+        seed.seed_counters(apps, None)
+        self.assertCountersMatch()
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs concurrent transactions")
+class CounterRebuildConcurrencyTests(TransactionTestCase):
+    def test_bump_during_rebuild_is_kept(self):
+        from clinical.counters import compute_counters, get_counters, rebuild_counters
+
+        patient = Patient.objects.create(name='Patient', ward='A')
+        Task.objects.create(patient=patient, title='Dress wound', due_time='09:00')
+        counting, release = threading.Event(), threading.Event()
+
+        def slow_compute():
+            values = compute_counters()
+            counting.set()
+            release.wait(10)
+            return values
+
+        def rebuild():
+            try:
+                rebuild_counters(slow_compute)
+            finally:
+                connection.close()
+
+        rebuilder = threading.Thread(target=rebuild)
+        rebuilder.start()
+        counting.wait(10)
+        # The task is committed but its bump waits for the rebuild
+        threading.Timer(0.5, release.set).start()
+        Task.objects.create(patient=patient, title='Check', due_time='14:00')
+        rebuilder.join(10)
+
+        self.assertEqual(get_counters(('tasks_pending', '', ''))[('tasks_pending', '', '')], 2)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_LOCK_TIMEOUT=0.2)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create(name='Doc Tor', email='doctor@example.com', role='Doctor')
+        self.other = User.objects.create(name='Oth Er', email='other@example.com', role='Doctor')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.client = APIClient()
+
+    def get(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_hit_skips_database(self):
+        first, _ = self.get(self.doctor, '/api/clinical/alert-stats/')
+        second, queries = self.get(self.other, '/api/clinical/alert-stats/')
+        self.assertEqual(first, second)
+        self.assertEqual(queries, 0)
+        self.assertEqual(get_cache_stats()['endpoints']['AlertStatsView'], {'hits': 1, 'misses': 1, 'waits': 0})
+
+    def test_per_user_responses(self):
+        mine, _ = self.get(self.doctor, '/api/clinical/doctor/dashboard-stats/')
+        theirs, _ = self.get(self.other, '/api/clinical/doctor/dashboard-stats/')
+        self.assertIn('Doc Tor', mine['greeting'])
+        self.assertIn('Oth Er', theirs['greeting'])
+
+    def test_save_invalidates(self):
+        before, _ = self.get(self.doctor, '/api/clinical/alert-stats/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Alert.objects.create(patient=self.patient, alert_type='Deterioration', severity='Critical')
+        after, queries = self.get(self.doctor, '/api/clinical/alert-stats/')
+        self.assertEqual(after['total_active'], before['total_active'] + 1)
+        self.assertGreater(queries, 0)
+
+    def test_waits_for_concurrent_computation(self):
+        # Another request holds the lock and never delivers: wait, then compute
+        request = SimpleNamespace(user=self.doctor, GET=QueryDict())
+        key = response_key('AlertStatsView', request, ('alerts',), False)
+        cache.add(f'{key}:lock', 1)
+        data, _ = self.get(self.doctor, '/api/clinical/alert-stats/')
+        self.assertIn('total_active', data)
+        self.assertEqual(get_cache_stats()['waits'], 1)
+
+
+class BlobStoreTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='blob-store-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = LocalBlobStore(self.root)
+
+    def test_put_is_content_addressed(self):
+        key = self.store.put(b'wound')
+        self.assertEqual(key, LocalBlobStore.compute_key(b'wound'))
+        self.assertEqual(self.store.put(b'wound'), key)
+        self.assertTrue(os.path.isfile(os.path.join(self.root, key[:2], key[2:4], key)))
+        self.assertEqual(self.store.read(key), b'wound')
+        self.assertEqual(self.store.size(key), 5)
+
+    def test_put_file_matches_put(self):
+        path = os.path.join(self.root, 'upload.jpg')
+        with open(path, 'wb') as fh:
+            fh.write(b'x' * 5000)
+        key = self.store.put_file(path)
+        self.assertEqual(key, self.store.put(b'x' * 5000))
+        self.assertEqual(self.store.read(key), b'x' * 5000)
+
+    def test_missing_and_invalid_keys(self):
+        missing = LocalBlobStore.compute_key(b'missing')
+        self.assertFalse(self.store.exists(missing))
+        self.assertFalse(self.store.exists('../../etc/passwd'))
+        with self.assertRaises(BlobNotFound):
+            self.store.open(missing)
+        with self.assertRaises(BlobNotFound):
+            self.store.open('../../etc/passwd')
+        self.store.delete(missing)  # no-op
+
+    def test_delete(self):
+        key = self.store.put(b'wound')
+        self.store.delete(key)
+        self.assertFalse(self.store.exists(key))
+
+    def test_data_uri_round_trip(self):
+        uri = encode_data_uri(b'\xff\xd8jpeg')
+        self.assertTrue(uri.startswith('data:image/jpeg;base64,'))
+        self.assertEqual(decode_data_uri(uri), b'\xff\xd8jpeg')
+        self.assertEqual(decode_data_uri(uri.split(',', 1)[1]), b'\xff\xd8jpeg')
+
+
+class BlobStoreTestMixin:
+    def use_blob_store(self):
+        root = tempfile.mkdtemp(prefix='blob-store-')
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(
+            WOUND_IMAGE_STORAGE={'BACKEND': 'clinical.storage.LocalBlobStore', 'OPTIONS': {'root': root}}
+        ))
+
+
+class MigrateWoundImagesTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.wound = Wound.objects.create(patient=Patient.objects.create(name='Patient', ward='A'))
+        self.image = jpeg_bytes()
+        self.legacy = [
+            WoundAssessment.objects.create(
+                wound=self.wound, nurse=nurse, image=encode_data_uri(self.image), width=1.0, depth=0.5, stage='Stage 2'
+            )
+            for _ in range(3)
+        ]
+        self.broken = WoundAssessment.objects.create(
+            wound=self.wound, nurse=nurse, image='data:image/jpeg;base64,bm90IGFuIGltYWdl', width=1.0, depth=0.5, stage='Stage 2'
+        )
+
+    def test_moves_inline_images_to_blob_store(self):
+        call_command('migrate_wound_images', batch_size=2, stdout=io.StringIO(), stderr=io.StringIO())
+
+        key = LocalBlobStore.compute_key(self.image)
+        for assessment in self.legacy:
+            assessment.refresh_from_db()
+            self.assertEqual(assessment.image, '')
+            self.assertEqual(assessment.image_hash, key)
+            self.assertIn('thumbnail', assessment.image_renditions)
+            self.assertEqual(assessment.get_image_bytes(), self.image)
+
+        # Undecodable rows keep their data for another run
+        self.broken.refresh_from_db()
+        self.assertEqual(self.broken.image_hash, '')
+        self.assertNotEqual(self.broken.image, '')
+
+    def test_limit_and_dry_run(self):
+        call_command('migrate_wound_images', dry_run=True, stdout=io.StringIO())
+        self.assertEqual(WoundAssessment.objects.filter(image_hash='').count(), 4)
+
+        call_command('migrate_wound_images', limit=1, stdout=io.StringIO())
+        self.assertEqual(WoundAssessment.objects.exclude(image_hash='').count(), 1)
+
+
+class WoundImageViewTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        self.doctor = User.objects.create(name='Doc Tor', email='doctor@example.com', role='Doctor')
+        self.wound = Wound.objects.create(patient=Patient.objects.create(name='Patient', ward='A'))
+        self.image = jpeg_bytes()
+        self.key = get_blob_store().put(self.image)
+        self.assessment = WoundAssessment.objects.create(
+            wound=self.wound, image_hash=self.key, width=1.0, depth=0.5, stage='Stage 2'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def get(self, assessment=None, **headers):
+        return self.client.get(f'/api/clinical/assessments/{(assessment or self.assessment).id}/image/', **headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_image(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['ETag'], f'"{self.key}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(response['Content-Length']), len(self.image))
+        self.assertEqual(self.body(response), self.image)
+
+    def test_if_none_match(self):
+        for etag in (f'"{self.key}"', f'W/"{self.key}"', f'"other", "{self.key}"', '*'):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, etag)
+            self.assertEqual(response['ETag'], f'"{self.key}"')
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_ranges(self):
+        size = len(self.image)
+        cases = {
+            'bytes=0-99': (0, 99),
+            'bytes=100-': (100, size - 1),
+            'bytes=-50': (size - 50, size - 1),
+            f'bytes=10-{size + 100}': (10, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            response = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+            self.assertEqual(int(response['Content-Length']), end - start + 1)
+            self.assertEqual(self.body(response), self.image[start:end + 1])
+
+    def test_unsatisfiable_range(self):
+        for header in (f'bytes={len(self.image)}-', 'bytes=50-10', 'bytes=-0'):
+            response = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 416, header)
+            self.assertEqual(response['Content-Range'], f'bytes */{len(self.image)}')
+
+    def test_range_ignored(self):
+        # Multiple ranges, other units, garbage and a stale If-Range get the full body
+        for headers in (
+            {'HTTP_RANGE': 'bytes=0-1,5-6'},
+            {'HTTP_RANGE': 'items=0-1'},
+            {'HTTP_RANGE': 'bytes=a-b'},
+            {'HTTP_RANGE': 'bytes=0-99', 'HTTP_IF_RANGE': '"stale"'},
+        ):
+            response = self.get(**headers)
+            self.assertEqual(response.status_code, 200, headers)
+            self.assertEqual(self.body(response), self.image)
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE=f'"{self.key}"').status_code, 206)
+
+    def test_legacy_inline_image(self):
+        legacy = WoundAssessment.objects.create(
+            wound=self.wound, image=encode_data_uri(self.image), width=1.0, depth=0.5, stage='Stage 2'
+        )
+        response = self.get(legacy)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.key}"')
+        self.assertEqual(self.body(response), self.image)
+        self.assertEqual(self.get(legacy, HTTP_RANGE='bytes=0-9').status_code, 206)
+
+    def test_missing_image(self):
+        empty = WoundAssessment.objects.create(wound=self.wound, width=1.0, depth=0.5, stage='Stage 2')
+        self.assertEqual(self.get(empty).status_code, 404)
+        get_blob_store().delete(self.key)
+        self.assertEqual(self.get().status_code, 404)
+
+    def test_blob_opened_once(self):
+        store = get_blob_store()
+        with mock.patch.object(store, 'open', wraps=store.open) as opened:
+            self.body(self.get())
+            self.body(self.get(HTTP_RANGE='bytes=0-99'))
+            self.get(HTTP_IF_NONE_MATCH=f'"{self.key}"')
+        self.assertEqual(opened.call_count, 2)
+
+    def test_errors_are_json(self):
+        # Clients asking only for image/* still get a JSON error they can read
+        empty = WoundAssessment.objects.create(wound=self.wound, width=1.0, depth=0.5, stage='Stage 2')
+        for response in (
+            self.get(empty, HTTP_ACCEPT='image/*'),
+            self.client.get(f'/api/clinical/assessments/{self.assessment.id}/image/?rendition=huge', HTTP_ACCEPT='image/*'),
+        ):
+            self.assertIn(response.status_code, (400, 404))
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('error', response.json())
+        self.assertEqual(self.get(HTTP_ACCEPT='image/*')['Content-Type'], 'image/jpeg')
+
+
+class RenditionTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        spool = tempfile.mkdtemp(prefix='renditions-')
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        self.enterContext(override_settings(WOUND_UPLOAD_SPOOL_DIR=spool, WOUND_IMAGE_ASYNC=False))
+
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.image = jpeg_bytes((1600, 1200))
+        self.client = APIClient()
+        self.client.force_authenticate(self.nurse)
+
+    def upload(self):
+        response = self.client.post(
+            '/api/clinical/nurse/clinical/upload-wound/',
+            {'patient': self.patient.id, 'image': SimpleUploadedFile('wound.jpg', self.image, 'image/jpeg')}
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return WoundAssessment.objects.get(pk=response.data['id'])
+
+    def image_size(self, assessment, rendition):
+        response = self.client.get(f'/api/clinical/assessments/{assessment.id}/image/?rendition={rendition}')
+        self.assertEqual(response.status_code, 200)
+        return Image.open(io.BytesIO(b''.join(response.streaming_content))).size
+
+    def test_process_wound_image(self):
+        renditions, perceptual_hash = process_wound_image(self.image)
+        self.assertEqual(list(renditions), ['clinical', 'preview', 'thumbnail'])
+        for name, edge in settings.WOUND_IMAGE_RENDITIONS.items():
+            with Image.open(io.BytesIO(renditions[name])) as img:
+                self.assertEqual(img.format, 'JPEG')
+                self.assertEqual(max(img.size), edge)
+        self.assertEqual(len(perceptual_hash), 16)
+
+        subset, _ = process_wound_image(self.image, names=['thumbnail'])
+        self.assertEqual(list(subset), ['thumbnail'])
+
+    def test_upload_stores_renditions(self):
+        assessment = self.upload()
+        self.assertEqual(set(assessment.image_renditions), {'clinical', 'preview', 'thumbnail', 'original'})
+        self.assertEqual(assessment.image_hash, assessment.image_renditions['clinical'])
+        self.assertEqual(assessment.get_image_bytes('original'), self.image)
+
+        self.assertEqual(self.image_size(assessment, 'thumbnail'), (128, 96))
+        self.assertEqual(self.image_size(assessment, 'preview'), (512, 384))
+        self.assertEqual(self.image_size(assessment, 'original'), (1600, 1200))
+
+    def test_unknown_rendition(self):
+        assessment = self.upload()
+        response = self.client.get(f'/api/clinical/assessments/{assessment.id}/image/?rendition=poster')
+        self.assertEqual(response.status_code, 400)
+
+    def test_assessment_without_renditions(self):
+        # Stored before derivatives existed: every rendition is the clinical image
+        key = get_blob_store().put(self.image)
+        assessment = WoundAssessment.objects.create(
+            wound=Wound.objects.create(patient=self.patient), image_hash=key, width=1.0, depth=0.5, stage='Stage 2'
+        )
+        self.assertEqual(self.image_size(assessment, 'thumbnail'), (1600, 1200))
+
+
+class DraftDecodingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise to display
+        photo = Image.effect_mandelbrot((4000, 3000), (-2.0, -1.2, 1.0, 1.2), 64).convert('RGB')
+        cls.photo, cls.rotated = io.BytesIO(), io.BytesIO()
+        photo.save(cls.photo, 'JPEG')
+        photo.save(cls.rotated, 'JPEG', exif=exif)
+
+    def test_large_jpeg_decoded_at_reduced_scale(self):
+        # libjpeg scales by 1/2, 1/4 or 1/8: the smallest still >= 1.5x the target
+        self.assertEqual(open_scaled(self.photo.getvalue(), 1200, reducing_gap=1.5).size, (2000, 1500))
+        self.assertEqual(open_scaled(self.photo.getvalue(), 128, reducing_gap=1.5).size, (500, 375))
+
+    def test_small_and_non_jpeg_images_decoded_in_full(self):
+        self.assertEqual(open_scaled(jpeg_bytes((800, 600)), 1200, reducing_gap=1.5).size, (800, 600))
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (4000, 3000)).save(buffer, 'PNG')
+        self.assertEqual(open_scaled(buffer.getvalue(), 1200, reducing_gap=1.5).size, (4000, 3000))
+
+    def test_exif_orientation(self):
+        self.assertEqual(open_scaled(self.rotated.getvalue(), 1200, reducing_gap=1.5).size, (1500, 2000))
+        renditions, _ = process_wound_image(self.rotated.getvalue())
+        with Image.open(io.BytesIO(renditions['clinical'])) as img:
+            self.assertEqual(img.size, (900, 1200))
+
+
+class DeduplicationTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        spool = tempfile.mkdtemp(prefix='dedup-')
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        self.enterContext(override_settings(WOUND_UPLOAD_SPOOL_DIR=spool, WOUND_IMAGE_ASYNC=False))
+
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.image = jpeg_bytes((640, 480))
+        self.client = APIClient()
+        self.client.force_authenticate(self.nurse)
+
+    def upload(self, image, query=''):
+        return self.client.post(
+            f'/api/clinical/nurse/clinical/upload-wound/{query}',
+            {'patient': self.patient.id, 'image': SimpleUploadedFile('wound.jpg', image, 'image/jpeg')}
+        )
+
+    def reencoded(self, size, quality):
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(self.image)).resize(size).save(buffer, 'JPEG', quality=quality)
+        return buffer.getvalue()
+
+    def test_exact_duplicate(self):
+        first = self.upload(self.image)
+        self.assertEqual(first.status_code, 201)
+        again = self.upload(self.image)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], first.data['id'])
+        self.assertEqual(WoundAssessment.objects.count(), 1)
+
+    def test_near_duplicate(self):
+        first = self.upload(self.image)
+        again = self.upload(self.reencoded((480, 360), quality=40))
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['id'], first.data['id'])
+
+    def test_different_photo(self):
+        self.upload(self.image)
+        other = io.BytesIO()
+        Image.linear_gradient('L').resize((640, 480)).convert('RGB').save(other, 'JPEG')
+        self.assertEqual(self.upload(other.getvalue()).status_code, 201)
+        self.assertEqual(WoundAssessment.objects.count(), 2)
+
+    def test_not_idempotent_reuses_blobs(self):
+        first = WoundAssessment.objects.get(pk=self.upload(self.image).data['id'])
+        response = self.upload(self.reencoded((640, 480), quality=50), '?idempotent=false')
+        self.assertEqual(response.status_code, 201)
+
+        second = WoundAssessment.objects.get(pk=response.data['id'])
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(second.image_renditions, first.image_renditions)
+        self.assertEqual((second.stage, second.area), (first.stage, first.area))
+        self.assertEqual(second.analysis['duplicate_of'], first.pk)
+        self.assertEqual(get_blob_store().usage()[0], len(first.image_renditions))
+
+    def test_outside_window(self):
+        first = self.upload(self.image)
+        WoundAssessment.objects.filter(pk=first.data['id']).update(
+            created_at=timezone.now() - timedelta(seconds=settings.WOUND_IMAGE_DEDUP_WINDOW_SECONDS + 1)
+        )
+        self.assertEqual(self.upload(self.image).status_code, 201)
+
+    def test_hash_distance(self):
+        _, original = process_wound_image(self.image)
+        _, reencoded = process_wound_image(self.reencoded((320, 240), quality=30))
+        self.assertEqual(hash_distance(original, original), 0)
+        self.assertLessEqual(hash_distance(original, reencoded), settings.WOUND_IMAGE_DEDUP_MAX_DISTANCE)
+        self.assertEqual(hash_distance('0' * 16, 'f' * 16), 64)
+
+
+class UploadGuardrailTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        spool = tempfile.mkdtemp(prefix='guardrails-')
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        self.enterContext(override_settings(WOUND_UPLOAD_SPOOL_DIR=spool, WOUND_IMAGE_ASYNC=True))
+        cache.clear()
+
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.client = APIClient()
+        self.client.force_authenticate(self.nurse)
+
+    def upload(self, data, name='wound.jpg'):
+        return self.client.post(
+            '/api/clinical/nurse/clinical/upload-wound/',
+            {'patient': self.patient.id, 'image': SimpleUploadedFile(name, data)}
+        )
+
+    def assert_rejected(self, response, status_code, reason):
+        self.assertEqual(response.status_code, status_code, response.data)
+        self.assertEqual(response.data['reason'], reason)
+        self.assertFalse(ImageProcessingJob.objects.exists())
+
+    def test_too_large(self):
+        image = jpeg_bytes((400, 300))
+        # Caught while streaming (within the multipart slack) and from Content-Length alone
+        with override_settings(WOUND_UPLOAD_MAX_BYTES=len(image) - 1):
+            self.assert_rejected(self.upload(image), 413, 'too_large')
+        with override_settings(WOUND_UPLOAD_MAX_BYTES=1024):
+            self.assert_rejected(self.upload(image + b'\0' * MULTIPART_OVERHEAD), 413, 'too_large')
+
+    def test_too_many_pixels(self):
+        with override_settings(WOUND_IMAGE_MAX_PIXELS=64 * 48 - 1):
+            self.assert_rejected(self.upload(jpeg_bytes()), 413, 'too_many_pixels')
+        self.assertEqual(self.upload(jpeg_bytes()).status_code, 202)
+
+    def test_unsupported_format(self):
+        self.assert_rejected(self.upload(b'%PDF-1.7 not an image', 'wound.pdf'), 415, 'unsupported_format')
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48)).save(buffer, 'GIF')
+        self.assert_rejected(self.upload(buffer.getvalue(), 'wound.gif'), 415, 'unsupported_format')
+
+    def test_chunked_upload_limits(self):
+        response = self.client.post(
+            '/api/clinical/nurse/clinical/uploads/',
+            {'patient': self.patient.id, 'total_size': settings.WOUND_UPLOAD_MAX_BYTES + 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 413)
+
+        response = self.client.post(
+            '/api/clinical/nurse/clinical/uploads/', {'patient': self.patient.id, 'total_size': 100}, format='json'
+        )
+        response = self.client.put(
+            f"{response.data['upload_url']}?offset=0", b'not an image' * 5, content_type='application/octet-stream'
+        )
+        self.assertEqual(response.status_code, 415)
+
+    def test_rejections_counted(self):
+        self.upload(b'not an image', 'wound.txt')
+        with override_settings(WOUND_IMAGE_MAX_PIXELS=1):
+            self.upload(jpeg_bytes())
+            self.upload(jpeg_bytes((48, 64)))
+
+        self.client.force_authenticate(User.objects.create(name='Ad Min', email='admin@example.com', role='Admin'))
+        response = self.client.get('/api/clinical/upload-guardrails/')
+        self.assertEqual(response.data['rejections'], {'too_large': 0, 'too_many_pixels': 2, 'unsupported_format': 1})
+
+
+SKIN = (224, 182, 160)
+
+
+def wound_photo(colour=None, size=(640, 480)):
+    """Skin-coloured JPEG with a wound of `colour` over the middle quarter."""
+    img = Image.new('RGB', size, SKIN)
+    if colour:
+        width, height = size
+        img.paste(colour, (width // 4, height // 4, width * 3 // 4, height * 3 // 4))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+class AnalyzerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.analyzer = ClassicalWoundAnalyzer(frame_width_cm=20.0, weights=settings.WOUND_ANALYZER['OPTIONS']['weights'])
+
+    def test_measurements(self):
+        result = self.analyzer.analyze(wound_photo((240, 90, 90)))
+        self.assertEqual(result['analyzer'], 'classical-v1')
+        self.assertEqual(result['stage'], 'Stage 2')
+        # The photo frames 20 x 15 cm; the wound is the middle 10 x 7.5 cm
+        self.assertAlmostEqual(result['area'], 75, delta=3)
+        self.assertAlmostEqual(result['width'], 7.5, delta=0.3)
+        self.assertAlmostEqual(result['length'], 10, delta=0.3)
+        self.assertGreater(result['tissue']['granulation'], 0.95)
+        self.assertEqual(set(result['timings_ms']), set(STAGES))
+
+    def test_batch_results_in_order(self):
+        results = self.analyzer.analyze_batch([
+            wound_photo(), wound_photo((240, 90, 90)), wound_photo((150, 30, 30)), wound_photo((20, 20, 20))
+        ])
+        self.assertEqual([r['stage'] for r in results], ['Stage 1', 'Stage 2', 'Stage 3', 'Unstageable'])
+        self.assertEqual(results[0]['area'], 0)
+        self.assertGreater(results[3]['tissue']['necrotic'], 0.95)
+        self.assertEqual({r['batch_size'] for r in results}, {4})
+
+    def test_letterboxed_portrait_photo(self):
+        # Padding to the square batch must not read as dark (necrotic) tissue
+        result = self.analyzer.analyze(wound_photo(size=(480, 640)))
+        self.assertEqual((result['stage'], result['area']), ('Stage 1', 0))
+
+    def test_micro_batcher_coalesces_concurrent_calls(self):
+        batcher = MicroBatcher(self.analyzer, max_batch_size=4, max_wait=5)
+        photos = [wound_photo(), wound_photo((240, 90, 90)), wound_photo((150, 30, 30)), wound_photo((20, 20, 20))]
+        with mock.patch.object(self.analyzer, 'analyze_batch', wraps=self.analyzer.analyze_batch) as analyze_batch:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(batcher.analyze, photos))
+
+        # A full batch is dispatched without waiting out max_wait
+        analyze_batch.assert_called_once()
+        self.assertEqual([r['stage'] for r in results], ['Stage 1', 'Stage 2', 'Stage 3', 'Unstageable'])
+        self.assertEqual(get_timing_stats()['batches'], 1)
+        self.assertEqual(get_timing_stats()['images'], 4)
+
+    def test_micro_batcher_dispatches_partial_batch(self):
+        batcher = MicroBatcher(self.analyzer, max_batch_size=8, max_wait=0.01)
+        self.assertEqual(batcher.analyze(wound_photo((240, 90, 90)), timeout=10)['batch_size'], 1)
+
+    def test_micro_batcher_propagates_errors(self):
+        batcher = MicroBatcher(self.analyzer, max_batch_size=8, max_wait=0.01)
+        with self.assertRaises(UnidentifiedImageError):
+            batcher.analyze(b'not an image', timeout=10)
+        # The dispatcher survives the failed batch
+        self.assertEqual(batcher.analyze(wound_photo(), timeout=10)['stage'], 'Stage 1')
+
+
+class AnalyzerWeightsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp(prefix='analyzer-weights-')
+        cls.weights = os.path.join(cls.root, 'tissue_lut.npy')
+        ClassicalWoundAnalyzer(weights=cls.weights).load()  # builds the file
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def use_analyzer(self, backend='clinical.analysis.ClassicalWoundAnalyzer', **options):
+        self.enterContext(override_settings(WOUND_ANALYZER={'BACKEND': backend, 'OPTIONS': options}))
+
+    def warm_up(self):
+        start_warm_up()
+        for thread in threading.enumerate():
+            if thread.name == 'wound-analyzer-warm-up':
+                thread.join(timeout=30)
+
+    def test_weights_are_memory_mapped(self):
+        analyzer = ClassicalWoundAnalyzer(weights=self.weights)
+        with mock.patch('clinical.analysis.build_tissue_lut', side_effect=AssertionError('rebuilt')):
+            analyzer.load()
+        self.assertEqual(analyzer.weights_info(), {'path': self.weights, 'bytes': 1 << 24, 'memory_mapped': True})
+        self.assertFalse(analyzer.lut.flags.writeable)
+
+        colours = np.array([SKIN, (240, 90, 90), (200, 170, 60), (20, 20, 20)])
+        expected = classify_colours(colours.astype(np.float32) / 255.0)
+        self.assertEqual(analyzer.lut[(colours[:, 0] << 16) | (colours[:, 1] << 8) | colours[:, 2]].tolist(), expected.tolist())
+
+    def test_warm_up(self):
+        self.use_analyzer(weights=self.weights)
+        client = APIClient()
+        self.assertEqual(get_analyzer().weights_info(), None)
+
+        self.warm_up()
+        response = client.get('/api/clinical/analysis/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], 'ready')
+        self.assertEqual(response.data['analyzer'], 'ClassicalWoundAnalyzer')
+        self.assertTrue(response.data['weights']['memory_mapped'])
+
+    def test_failed_warm_up(self):
+        self.use_analyzer(backend='clinical.analysis.WoundAnalyzer')
+        with self.assertLogs('clinical.analysis', 'ERROR') as logs:
+            self.warm_up()
+        self.assertIn('NotImplementedError', logs.output[0])  # with the traceback
+        response = APIClient().get('/api/clinical/analysis/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data['state'], 'failed')
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_build_command(self):
+        self.use_analyzer(weights=self.weights)
+        out = io.StringIO()
+        call_command('build_analyzer_weights', stdout=out)
+        self.assertIn('already present', out.getvalue())
+
+        self.use_analyzer(weights=None)
+        with self.assertRaises(CommandError):
+            call_command('build_analyzer_weights', stdout=io.StringIO())
+
+
+class ImageJobQueueTests(BlobStoreTestMixin, TestCase):
+    def setUp(self):
+        self.use_blob_store()
+        self.spool = tempfile.mkdtemp(prefix='image-jobs-')
+        self.addCleanup(shutil.rmtree, self.spool, ignore_errors=True)
+        self.enterContext(override_settings(WOUND_UPLOAD_SPOOL_DIR=self.spool, WOUND_IMAGE_ASYNC=True))
+
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.client = APIClient()
+        self.client.force_authenticate(self.nurse)
+
+    def upload(self, image=None):
+        return self.client.post(
+            '/api/clinical/nurse/clinical/upload-wound/',
+            {'patient': self.patient.id, 'image': SimpleUploadedFile('wound.jpg', image or jpeg_bytes(), 'image/jpeg')}
+        )
+
+    def enqueue(self, count):
+        return [
+            enqueue_image_job(self.patient, self.nurse, '', os.path.join(self.spool, f'{i}.upload'))
+            for i in range(count)
+        ]
+
+    def test_upload_is_queued(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        job = ImageProcessingJob.objects.get()
+        self.assertEqual(job.status, 'PENDING')
+        self.assertTrue(os.path.isfile(job.upload_path))
+        self.assertTrue(response['Location'].endswith(f'/upload-jobs/{job.id}/'))
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'PENDING')
+
+    def test_other_nurses_job_not_found(self):
+        url = self.upload()['Location']
+        other = User.objects.create(name='Oth Er', email='other@example.com', role='Nurse')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_queue_full(self):
+        with override_settings(WOUND_IMAGE_QUEUE_LIMIT=1):
+            self.assertEqual(self.upload().status_code, 202)
+            response = self.upload(jpeg_bytes((48, 64)))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.WOUND_IMAGE_QUEUE_RETRY_AFTER))
+        self.assertEqual(ImageProcessingJob.objects.count(), 1)
+        self.assertEqual(len(os.listdir(self.spool)), 1)  # rejected upload not left behind
+
+    def test_claim(self):
+        jobs = self.enqueue(3)
+        first = claim_image_jobs(2)
+        self.assertEqual([job.id for job in first], [jobs[0].id, jobs[1].id])
+        self.assertEqual(claim_image_jobs(2), [ImageProcessingJob.objects.get(pk=jobs[2].pk)])
+        self.assertEqual(claim_image_jobs(2), [])
+
+        for job in ImageProcessingJob.objects.all():
+            self.assertEqual((job.status, job.attempts), ('PROCESSING', 1))
+            self.assertIsNotNone(job.started_at)
+
+    def test_requeue_stale(self):
+        stale, fresh = self.enqueue(2)
+        claim_image_jobs(2)
+        ImageProcessingJob.objects.filter(pk=stale.pk).update(started_at=timezone.now() - timedelta(minutes=20))
+
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        self.assertEqual(ImageProcessingJob.objects.get(pk=stale.pk).status, 'PENDING')
+        self.assertEqual(ImageProcessingJob.objects.get(pk=fresh.pk).status, 'PROCESSING')
+
+        # Claimed again, counted as a second attempt
+        self.assertEqual(claim_image_jobs(1)[0].attempts, 2)
+
+    def test_complete_and_fail(self):
+        self.upload()
+        self.upload(jpeg_bytes((48, 64)))
+        done, failed = claim_image_jobs(2)
+
+        assessment, created = complete_image_job(done, *render_upload(done.upload_path))
+        self.assertTrue(created)
+        done.refresh_from_db()
+        self.assertEqual((done.status, done.assessment), ('COMPLETED', assessment))
+        self.assertEqual(set(assessment.image_renditions), {'clinical', 'preview', 'thumbnail', 'original'})
+
+        fail_image_job(failed, ValueError('broken'))
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.error), ('FAILED', 'broken'))
+        self.assertEqual(os.listdir(self.spool), [])
+
+
+class BlobStoreUsageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='blob-usage-')
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.store = LocalBlobStore(self.root)
+
+    def test_usage_follows_puts_and_deletes(self):
+        self.assertEqual(self.store.usage(), (0, 0))
+        first = self.store.put(b'a' * 100)
+        self.store.put(b'b' * 50)
+        self.store.put(b'a' * 100)  # same content, stored once
+        self.assertEqual(self.store.usage(), (2, 150))
+
+        self.store.delete(first)
+        self.assertEqual(self.store.usage(), (1, 50))
+
+    def test_unchanged_directories_are_not_listed_again(self):
+        self.store.put(b'a' * 100)
+        self.store.usage()
+        with mock.patch.object(LocalBlobStore, '_scan', side_effect=AssertionError('rescanned')):
+            self.assertEqual(self.store.usage(), (1, 100))
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        spool = tempfile.mkdtemp(prefix='chunked-')
+        self.addCleanup(shutil.rmtree, spool, ignore_errors=True)
+        self.enterContext(override_settings(WOUND_UPLOAD_SPOOL_DIR=spool, WOUND_IMAGE_ASYNC=True))
+
+        self.nurse = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.patient = Patient.objects.create(name='Patient', ward='A')
+        self.image = jpeg_bytes()
+        self.client = APIClient()
+        self.client.force_authenticate(self.nurse)
+        response = self.client.post(
+            '/api/clinical/nurse/clinical/uploads/',
+            {'patient': self.patient.id, 'total_size': len(self.image)}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.url = f"/api/clinical/nurse/clinical/uploads/{response.data['upload_id'].replace('-', '')}/"
+
+    def put(self, start, end, offset=None):
+        url = self.url if offset is None else f'{self.url}?offset={offset}'
+        headers = {} if offset is not None else {
+            'HTTP_CONTENT_RANGE': f'bytes {start}-{end - 1}/{len(self.image)}'
+        }
+        return self.client.put(url, self.image[start:end], content_type='application/octet-stream', **headers)
+
+    def finalize(self):
+        return self.client.post(f'{self.url}finalize/')
+
+    def test_chunks_then_finalize(self):
+        middle = len(self.image) // 2
+        self.assertEqual(self.put(0, middle).data['missing_ranges'], [[middle, len(self.image)]])
+        self.assertEqual(self.put(middle - 10, len(self.image)).data['missing_ranges'], [])  # overlapping resend
+
+        self.assertEqual(self.finalize().status_code, 202)
+        self.assertEqual(self.finalize().status_code, 409)
+        self.assertEqual(self.put(0, middle).status_code, 409)
+
+    def test_finalize_incomplete(self):
+        self.put(0, 100)
+        response = self.finalize()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['missing_ranges'], [[100, len(self.image)]])
+
+    def test_rejects_bad_offsets(self):
+        self.assertEqual(self.put(0, 100, offset=-5).status_code, 400)
+        self.assertEqual(self.put(0, 100, offset='abc').status_code, 400)
+        self.assertEqual(self.put(200, 300).status_code, 416)  # leaves a gap
+        self.assertEqual(self.put(0, 100, offset=len(self.image)).status_code, 416)
+        self.assertEqual(ChunkedUpload.objects.get().received_ranges, [])
+
+    def test_other_users_upload_not_found(self):
+        other = User.objects.create(name='Oth Er', email='other@example.com', role='Nurse')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.put(0, 100).status_code, 404)
+        self.assertEqual(self.finalize().status_code, 404)
@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PatientViewSet,
@@ -11,7 +11,12 @@ from .views import (
     DoctorTaskViewSet,
     NurseDashboardStatsView,
     NurseTaskViewSet,
-    NurseClinicalViewSet
+    NurseClinicalViewSet,
+    WoundAssessmentImageView,
+    UploadGuardrailStatsView,
+    AnalysisStatsView,
+    ResponseCacheStatsView,
+    AnalyzerReadinessView
 )
 
 router = DefaultRouter()
@@ -31,4 +36,11 @@ urlpatterns = [
     # New segregated stats endpoints
     path('doctor/dashboard-stats/', DoctorDashboardStatsView.as_view(), name='doctor-dashboard-stats'),
     path('nurse/dashboard-stats/', NurseDashboardStatsView.as_view(), name='nurse-dashboard-stats'),
+
+    # Raw image delivery (cacheable, supports Range requests)
+    re_path(r'^assessments/(?P<pk>\d+)/image/?$', WoundAssessmentImageView.as_view(), name='assessment-image'),
+    path('upload-guardrails/', UploadGuardrailStatsView.as_view(), name='upload-guardrails'),
+    path('analysis-stats/', AnalysisStatsView.as_view(), name='analysis-stats'),
+    path('response-cache-stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    path('analysis/ready/', AnalyzerReadinessView.as_view(), name='analysis-ready'),
 ]
@@ -1,18 +1,40 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, renderers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Count, Avg
+from django.conf import settings
+from django.db.models import Count, Avg, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import Patient, Alert, Wound, WoundAssessment, Task, ClinicalRecord
+from django.utils.http import parse_etags
+from core.pagination import TimestampCursorPagination
+from core.response_cache import cached_response, get_cache_stats
+from .models import (
+    Patient, Alert, Wound, WoundAssessment, Task, ClinicalRecord,
+    ImageProcessingJob, ChunkedUpload
+)
 from .serializers import (
-    PatientSerializer, AlertSerializer, WoundAssessmentSerializer, 
-    WoundSerializer, TaskSerializer, ClinicalRecordSerializer
+    PatientSerializer, PatientListSerializer, AlertSerializer, WoundAssessmentSerializer, 
+    WoundSerializer, TaskSerializer, ClinicalRecordSerializer,
+    ImageProcessingJobSerializer, ChunkedUploadSerializer
+)
+from .storage import get_blob_store, BlobNotFound
+from .imaging import render_upload, is_valid_rendition, sniff_format, sniff_content_type
+from .processing import (
+    spool_upload, discard_spool, enqueue_image_job, record_upload, find_duplicate_assessment,
+    QueueFull, start_chunked_upload, write_chunk
 )
-import random
-import base64
+from .guardrails import (
+    install_upload_guard, check_image_header, check_format, too_large_error,
+    record_rejection, get_rejection_counts, UploadRejected
+)
+from .analysis import get_analyzer, get_timing_stats, get_readiness
+from .counters import get_counters
+from users.authentication import ClaimsJWTAuthentication
+from users.permissions import IsAdmin
 import io
-from PIL import Image
 
 # --- Shared Viewsets ---
 
@@ -23,7 +45,55 @@ class PatientViewSet(viewsets.ModelViewSet):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
 
+    def get_serializer_class(self):
+        # Compact rows for the list; the full nested record for everything else
+        if self.action == 'list':
+            return PatientListSerializer
+        return PatientSerializer
+
     def get_queryset(self):
+        # Prefetch plan per action, so serializing N patients takes a
+        # fixed number of queries instead of several per patient
+        queryset = self.get_patient_queryset()
+        if self.action == 'destroy':
+            return queryset
+
+        queryset = queryset.select_related('assigned_physician')
+        if self.action == 'list':
+            expand = PatientListSerializer.parse_list(self.request.query_params.get('expand'))
+            lookups = [self.latest_assessment_prefetch()]
+            if 'wounds' in expand:
+                lookups.append(self.wounds_prefetch())
+            if 'clinical_history' in expand:
+                lookups.append(self.clinical_records_prefetch())
+        else:
+            lookups = [self.wounds_prefetch(), self.clinical_records_prefetch()]
+        return queryset.prefetch_related(*lookups)
+
+    @staticmethod
+    def wounds_prefetch():
+        # Prefetching back-fills assessment.wound and wound.patient, only
+        # the nurse has to be joined
+        assessments = WoundAssessment.objects.select_related('nurse')
+        return Prefetch('wounds', queryset=Wound.objects.prefetch_related(
+            Prefetch('assessments', queryset=assessments)
+        ))
+
+    @staticmethod
+    def clinical_records_prefetch():
+        return Prefetch('clinical_records', queryset=ClinicalRecord.objects.select_related('recorded_by'))
+
+    @staticmethod
+    def latest_assessment_prefetch():
+        # Each wound's most recent assessment, for latest_assessment
+        latest = WoundAssessment.objects.annotate(
+            recency=Window(RowNumber(), partition_by=F('wound_id'), order_by=F('created_at').desc())
+        ).filter(recency=1)
+        return Prefetch('wounds', queryset=Wound.objects.prefetch_related(
+            Prefetch('assessments', queryset=latest, to_attr='latest_assessments')
+        ), to_attr='latest_wounds')
+
+    def get_patient_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             return Patient.objects.none()
@@ -39,14 +109,14 @@ class PatientViewSet(viewsets.ModelViewSet):
                     severity='Warning',
                     ip_address=get_client_ip(self.request)
                 )
-            return Patient.objects.all().order_by('name')
+            return Patient.objects.all().order_by('name', 'id')
 
         # Nurses see patients assigned to them via tasks by default
         if user.role == 'Nurse':
-            return Patient.objects.filter(tasks__assigned_to=user).distinct()
+            return Patient.objects.filter(tasks__assigned_to=user).distinct().order_by('id')
         
         # Doctors and Admins see all
-        return Patient.objects.all()
+        return Patient.objects.all().order_by('id')
 
     def perform_create(self, serializer):
         # Save the patient record
@@ -71,8 +141,9 @@ class PatientViewSet(viewsets.ModelViewSet):
             )
 
 class AlertViewSet(viewsets.ModelViewSet):
-    queryset = Alert.objects.filter(is_dismissed=False).order_by('-timestamp')
+    queryset = Alert.objects.filter(is_dismissed=False).select_related('patient', 'triggered_by').order_by('-timestamp')
     serializer_class = AlertSerializer
+    pagination_class = TimestampCursorPagination
 
     @action(detail=True, methods=['post'])
     def dismiss(self, request, pk=None):
@@ -84,9 +155,13 @@ class AlertViewSet(viewsets.ModelViewSet):
 # --- Doctor Specific Views ---
 
 class DoctorDashboardSummaryView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @cached_response('tasks', 'alerts', per_user=True)
     def get(self, request):
-        active_count = Patient.objects.filter(tasks__isnull=False).distinct().count() or 3
-        critical_cases = Alert.objects.filter(severity='Critical', is_dismissed=False).count() or 1
+        counts = get_counters(('patients_with_tasks', '', ''), ('alerts_active_critical', '', ''))
+        active_count = counts['patients_with_tasks', '', ''] or 3
+        critical_cases = counts['alerts_active_critical', '', ''] or 1
         
         return Response({
             'active_patients': active_count,
@@ -102,27 +177,32 @@ class DoctorDashboardSummaryView(APIView):
         })
 
 class DoctorDashboardStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @cached_response('tasks', 'assessments', per_user=True)
     def get(self, request):
-        today = timezone.now().date()
-        active_patients = Patient.objects.filter(tasks__isnull=False).distinct().count()
-        pending_tasks = Task.objects.filter(status='PENDING').count()
-        completed_today = Task.objects.filter(status='COMPLETED', completed_at__date=today).count()
-        scans = WoundAssessment.objects.filter(created_at__date=today).count()
+        today = timezone.localdate().isoformat()
+        counts = get_counters(
+            ('patients_with_tasks', '', ''), ('tasks_pending', '', ''),
+            ('tasks_completed', '', today), ('assessments', '', today)
+        )
 
         return Response({
-            'active_patients': active_patients,
-            'pending_tasks': pending_tasks,
-            'completed_today': completed_today,
-            'scans': scans,
+            'active_patients': counts['patients_with_tasks', '', ''],
+            'pending_tasks': counts['tasks_pending', '', ''],
+            'completed_today': counts['tasks_completed', '', today],
+            'scans': counts['assessments', '', today],
             'active_patients_trend': '+12%',
             'healing_rate': '84%',
             'greeting': f'Good Morning, {request.user.name}'
         })
 
 class DoctorScheduledTasksView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
     def get(self, request):
         # Fetch pending tasks for doctor's ward
-        tasks = Task.objects.filter(status='PENDING').order_by('due_time')[:5]
+        tasks = Task.objects.filter(status='PENDING').select_related('patient').order_by('due_time')[:5]
         
         if not tasks.exists():
             return Response([
@@ -150,6 +230,9 @@ class DoctorScheduledTasksView(APIView):
         ])
 
 class WoundStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @cached_response('alerts', 'patients')
     def get(self, request):
         # Keep mock metrics for visual charts
         return Response({
@@ -165,48 +248,256 @@ class WoundStatsView(APIView):
                     'patient_name': a.patient.name,
                     'risk_level': 'HIGH RISK' if a.severity == 'Critical' else 'MODERATE',
                     'description': a.description or "High Severity Detected: Immediate review recommended."
-                } for a in Alert.objects.filter(is_resolved=False)[:3]
+                } for a in Alert.objects.filter(is_resolved=False).select_related('patient')[:3]
             ]
         })
 
 class DoctorTaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
-    queryset = Task.objects.all()
+    queryset = Task.objects.select_related('patient', 'assigned_to').order_by('id')
 
 class AlertStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @cached_response('alerts')
     def get(self, request):
-        total_active = Alert.objects.filter(is_dismissed=False).count()
+        counts = get_counters(('alerts_active', '', ''), ('alerts_resolved_critical', '', ''))
         return Response({
-            'total_active': total_active,
+            'total_active': counts['alerts_active', '', ''],
             'avg_response_time': '42m',
-            'critical_resolved': Alert.objects.filter(severity='Critical', is_resolved=True).count(),
+            'critical_resolved': counts['alerts_resolved_critical', '', ''],
             'trend': '8% from yesterday'
         })
 
+# --- Wound Imaging ---
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """
+    Lets clients that only accept image/* pass content negotiation;
+    image responses bypass rendering entirely.
+    """
+    media_type = 'image/*'
+    format = 'jpg'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return renderers.JSONRenderer().render(data, 'application/json', renderer_context)
+
+
+class WoundAssessmentImageView(APIView):
+    """
+    Streams the raw image for an assessment (?rendition= selects a derivative).
+    Supports strong ETags (content hash), If-None-Match, single byte Range
+    requests and long-lived caching, since a stored image never changes.
+    """
+    renderer_classes = [renderers.JSONRenderer, PassthroughRenderer]
+    chunk_size = 64 * 1024
+
+    def get(self, request, pk):
+        assessment = get_object_or_404(WoundAssessment, pk=pk)
+        if not assessment.has_image():
+            return Response({"error": "Assessment has no image"}, status=status.HTTP_404_NOT_FOUND)
+
+        rendition = request.query_params.get('rendition')
+        if rendition and not is_valid_rendition(rendition):
+            return Response({"error": f"Unknown rendition: {rendition}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1. Resolve the image source (blob store, or legacy inline data)
+        try:
+            content_hash = assessment.get_image_key(rendition)
+            if content_hash:
+                store = get_blob_store()
+                size = store.size(content_hash)
+                open_image = lambda: store.open(content_hash)
+            else:
+                data = assessment.get_image_bytes()
+                content_hash = get_blob_store().compute_key(data)
+                size = len(data)
+                open_image = lambda: io.BytesIO(data)
+        except BlobNotFound:
+            return Response({"error": "Image file is missing"}, status=status.HTTP_404_NOT_FOUND)
+
+        etag = f'"{content_hash}"'
+
+        # 2. Conditional GET
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            candidates = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+            if '*' in candidates or etag in candidates:
+                response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+                return self._with_cache_headers(response, etag)
+
+        # 3. Byte ranges (ignored when If-Range no longer matches)
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if range_header and request.headers.get('If-Range', etag) == etag:
+            byte_range = self._parse_range(range_header, size)
+            if byte_range is False:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return self._with_cache_headers(response, etag)
+
+        # 4. Open the image once; the content type comes from its first bytes
+        try:
+            fh = open_image()
+        except BlobNotFound:
+            return Response({"error": "Image file is missing"}, status=status.HTTP_404_NOT_FOUND)
+        content_type = sniff_content_type(fh.read(16))
+        fh.seek(0)
+
+        if byte_range is None:
+            response = FileResponse(fh, content_type=content_type)
+            response['Content-Length'] = size
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                self._iter_range(fh, start, length),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = length
+
+        return self._with_cache_headers(response, etag)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors are JSON even when the client only accepts image/*
+        if isinstance(response, Response) and response.status_code >= 400:
+            request.accepted_renderer = renderers.JSONRenderer()
+            request.accepted_media_type = request.accepted_renderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def _with_cache_headers(self, response, etag):
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = settings.WOUND_IMAGE_CACHE_CONTROL
+        return response
+
+    @staticmethod
+    def _parse_range(header, size):
+        """
+        Parses a single 'bytes=start-end' range.
+        Returns (start, end), None to serve the full body, or False if unsatisfiable.
+        """
+        unit, _, spec = header.partition('=')
+        if unit.strip() != 'bytes' or ',' in spec:
+            return None
+        first, _, last = spec.strip().partition('-')
+        try:
+            if not first:
+                # Suffix range: the final N bytes
+                suffix = int(last)
+                if suffix <= 0:
+                    return False
+                return max(size - suffix, 0), size - 1
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if start >= size or end < start:
+            return False
+        return start, min(end, size - 1)
+
+    def _iter_range(self, fh, start, length):
+        with fh:
+            fh.seek(start)
+            while length > 0:
+                chunk = fh.read(min(self.chunk_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+
+class UploadGuardrailStatsView(APIView):
+    """
+    Configured upload limits and how many uploads each one has rejected.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'limits': {
+                'max_bytes': settings.WOUND_UPLOAD_MAX_BYTES,
+                'max_pixels': settings.WOUND_IMAGE_MAX_PIXELS,
+                'allowed_formats': settings.WOUND_IMAGE_ALLOWED_FORMATS,
+            },
+            'rejections': get_rejection_counts()
+        })
+
+class AnalysisStatsView(APIView):
+    """
+    Active wound analyzer and its mean per-stage latency per batch.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'analyzer': get_analyzer().name,
+            'batching': {
+                'max_batch_size': settings.WOUND_ANALYSIS_BATCH_SIZE,
+                'max_wait_ms': settings.WOUND_ANALYSIS_BATCH_WAIT_MS,
+            },
+            'latency': get_timing_stats()
+        })
+
+class ResponseCacheStatsView(APIView):
+    """
+    Dashboard response cache hits, misses and coalesced waits.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.RESPONSE_CACHE_ENABLED,
+            'backend': settings.CACHES[settings.RESPONSE_CACHE_ALIAS]['BACKEND'],
+            'timeout': settings.RESPONSE_CACHE_TIMEOUT,
+            'stats': get_cache_stats()
+        })
+
+class AnalyzerReadinessView(APIView):
+    """
+    Readiness probe: 200 once this worker's analyzer is loaded and warm,
+    503 while it is still warming up.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        readiness = get_readiness()
+        readiness['analyzer'] = settings.WOUND_ANALYZER['BACKEND'].rsplit('.', 1)[-1]
+        if readiness['state'] != 'ready':
+            return Response(readiness, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
+        return Response(readiness)
+
 # --- Nurse Specific Views ---
 
 class NurseDashboardStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    @cached_response('tasks', 'assessments', per_user=True)
     def get(self, request):
-        user = request.user
-        today = timezone.now().date()
-        
-        active_patients = Patient.objects.filter(tasks__assigned_to=user).distinct().count()
-        doc_due = Task.objects.filter(assigned_to=user, status='PENDING').count()
-        completed = Task.objects.filter(assigned_to=user, status='COMPLETED').count()
-        scans = WoundAssessment.objects.filter(created_at__date=today).count()
+        nurse = f'nurse:{request.user.id}'
+        today = timezone.localdate().isoformat()
+        counts = get_counters(
+            ('patients_with_tasks', nurse, ''), ('tasks_pending', nurse, ''),
+            ('tasks_completed', nurse, ''), ('assessments', '', today)
+        )
 
         return Response({
-            'active_patients': active_patients,
-            'doc_due': doc_due,
-            'completed': completed,
-            'scans': scans
+            'active_patients': counts['patients_with_tasks', nurse, ''],
+            'doc_due': counts['tasks_pending', nurse, ''],
+            'completed': counts['tasks_completed', nurse, ''],
+            'scans': counts['assessments', '', today]
         })
 
 class NurseTaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
 
     def get_queryset(self):
-        return Task.objects.filter(assigned_to=self.request.user)
+        return Task.objects.filter(assigned_to=self.request.user).select_related('patient', 'assigned_to').order_by('id')
 
     def perform_update(self, serializer):
         instance = serializer.save()
@@ -218,68 +509,220 @@ class NurseTaskViewSet(viewsets.ModelViewSet):
 class NurseClinicalViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['post'], url_path='upload-wound')
     def upload_wound(self, request):
+        # Guardrails: reject oversized / non-image uploads before they are decoded
+        try:
+            guard = install_upload_guard(request)
+        except UploadRejected as e:
+            return self.reject_upload(e)
+
         user = request.user
         patient_pk = request.data.get('patient')
         image = request.FILES.get('image')
         notes = request.data.get('notes', '')
+
+        if guard.rejection:
+            return self.reject_upload(guard.rejection)
         
         try:
             patient = Patient.objects.get(id=patient_pk)
-            wound, _ = Wound.objects.get_or_create(patient=patient)
         except Patient.DoesNotExist:
             return Response({"error": "Patient not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Advanced Image Processing Pipeline
+        if image is None:
+            return Response({"error": "Image file is required"}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            # 1. Open and Verify Image
-            img = Image.open(image)
-            
-            # 2. Clinical Compression & Resizing
-            # Maintains clinical detail while reducing DB bloat
-            max_size = (1200, 1200)
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # 3. Handle Color Profiles (Convert PNG/RGBA to JPEG friendly RGB)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            
-            # 4. Binary to Base64 Conversion
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=70, optimize=True)
-            encoded_string = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            base64_image_uri = f"data:image/jpeg;base64,{encoded_string}"
-            
-        except Exception as e:
-            return Response({"error": f"Image processing failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+            check_image_header(image)
+        except UploadRejected as e:
+            return self.reject_upload(e)
 
-        # Mock AI Analysis (Placeholder for Actual ML Model)
-        width = round(random.uniform(2.0, 10.0), 1)
-        depth = round(random.uniform(0.5, 3.0), 1)
-        stage = random.choice(['Stage 1', 'Stage 2', 'Stage 3'])
-        
-        assessment = WoundAssessment.objects.create(
-            nurse=user,
-            wound=wound,
-            image=base64_image_uri, # Store the compressed string directly
-            notes=notes,
-            width=width,
-            depth=depth,
-            stage=stage
+        return self.submit_upload(request, patient, notes, spool_upload(image))
+
+    def submit_upload(self, request, patient, notes, upload_path):
+        """
+        Processes a spooled, validated upload: queued for the image worker,
+        or inline when WOUND_IMAGE_ASYNC is off. Re-uploads of a recent
+        photo are resolved against the existing assessment (?idempotent=).
+        """
+        idempotent = request.query_params.get('idempotent', request.data.get('idempotent'))
+        if idempotent is None:
+            idempotent = settings.WOUND_IMAGE_DEDUP_IDEMPOTENT
+        else:
+            idempotent = str(idempotent).lower() in ('1', 'true', 'yes')
+
+        # Exact re-upload (double tap / client retry): answer before decoding anything
+        if idempotent:
+            duplicate = find_duplicate_assessment(patient, get_blob_store().compute_file_key(upload_path))
+            if duplicate:
+                discard_spool(upload_path)
+                return Response(WoundAssessmentSerializer(duplicate, context={'request': request}).data, status=status.HTTP_200_OK)
+
+        if not settings.WOUND_IMAGE_ASYNC:
+            # Inline pipeline (development / tests): decode, store and analyse now
+            try:
+                renditions, perceptual_hash = render_upload(upload_path)
+                assessment, created = record_upload(
+                    patient, request.user, notes, upload_path,
+                    renditions, perceptual_hash, idempotent=idempotent
+                )
+            except Exception as e:
+                return Response({"error": f"Image processing failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+            finally:
+                discard_spool(upload_path)
+
+            return Response(
+                WoundAssessmentSerializer(assessment, context={'request': request}).data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+            )
+
+        # Hand the CPU-bound Pillow work to the image worker (run_image_worker)
+        try:
+            job = enqueue_image_job(patient, request.user, notes, upload_path, idempotent=idempotent)
+        except QueueFull:
+            discard_spool(upload_path)
+            return Response(
+                {"error": "Image processing queue is full, please retry shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.WOUND_IMAGE_QUEUE_RETRY_AFTER)}
+            )
+
+        data = ImageProcessingJobSerializer(job, context={'request': request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': data['status_url']})
+
+    # --- Resumable uploads: initiate, PUT chunks at offsets, finalize ---
+
+    @action(detail=False, methods=['post'], url_path='uploads')
+    def start_upload(self, request):
+        try:
+            patient = Patient.objects.get(id=request.data.get('patient'))
+        except Patient.DoesNotExist:
+            return Response({"error": "Patient not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            total_size = int(request.data.get('total_size'))
+        except (TypeError, ValueError):
+            return Response({"error": "total_size is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if total_size <= 0:
+            return Response({"error": "total_size must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+        if total_size > settings.WOUND_UPLOAD_MAX_BYTES:
+            return self.reject_upload(too_large_error())
+
+        upload = start_chunked_upload(patient, request.user, request.data.get('notes', ''), total_size)
+        return Response(ChunkedUploadSerializer(upload, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get', 'put'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{32,36})')
+    def upload_chunk(self, request, upload_id=None):
+        """
+        GET reports received / missing byte ranges so an interrupted client
+        can resume. PUT writes the raw request body at the offset given by
+        `Content-Range: bytes <start>-<end>/<total>` (or ?offset=). A chunk
+        may overlap what was already received but not leave a gap.
+        """
+        upload = get_object_or_404(ChunkedUpload, upload_id=upload_id, nurse=request.user)
+        if request.method == 'GET':
+            return Response(ChunkedUploadSerializer(upload, context={'request': request}).data)
+
+        if upload.status != 'UPLOADING':
+            return Response({"error": "Upload already finalized"}, status=status.HTTP_409_CONFLICT)
+
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_length > settings.WOUND_UPLOAD_CHUNK_MAX_BYTES:
+            return Response(
+                {"error": f"Chunks may not exceed {settings.WOUND_UPLOAD_CHUNK_MAX_BYTES} bytes"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        data = request.body
+        offset = self._chunk_offset(request, len(data), upload.total_size)
+        if offset is None:
+            return Response({"error": "Invalid or missing Content-Range"}, status=status.HTTP_400_BAD_REQUEST)
+        if not data or offset + len(data) > upload.total_size:
+            return Response({"error": "Chunk is outside the declared total_size"}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        if offset > upload.next_offset:
+            return Response(
+                {"error": f"Chunk starts past the bytes received so far ({upload.next_offset})",
+                 "missing_ranges": upload.missing_ranges()},
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+
+        # Reject non-images as soon as the first bytes arrive
+        if offset == 0:
+            try:
+                check_format(sniff_format(data[:16]))
+            except UploadRejected as e:
+                return self.reject_upload(e)
+
+        upload = write_chunk(upload, offset, data)
+        return Response(ChunkedUploadSerializer(upload, context={'request': request}).data)
+
+    @action(detail=False, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{32,36})/finalize')
+    def finalize_upload(self, request, upload_id=None):
+        upload = get_object_or_404(
+            ChunkedUpload.objects.select_related('patient'), upload_id=upload_id, nurse=request.user
         )
-        
-        if stage == 'Stage 3' or stage == 'Unstageable':
-            assessment.is_escalated = True
-            assessment.save()
-            Alert.objects.create(
-                patient=patient,
-                assessment=assessment,
-                triggered_by=user,
-                alert_type="High Severity Detected",
-                description=f"AI classified as {stage}",
-                severity="Critical"
+        if upload.status != 'UPLOADING':
+            return Response({"error": "Upload already finalized"}, status=status.HTTP_409_CONFLICT)
+
+        missing = upload.missing_ranges()
+        if missing:
+            return Response(
+                {"error": "Upload is incomplete", "missing_ranges": missing},
+                status=status.HTTP_409_CONFLICT
             )
 
-        return Response(WoundAssessmentSerializer(assessment).data, status=status.HTTP_201_CREATED)
+        try:
+            with open(upload.spool_path, 'rb') as fh:
+                check_image_header(fh)
+        except UploadRejected as e:
+            discard_spool(upload.spool_path)
+            upload.delete()
+            return self.reject_upload(e)
+
+        # Claim the upload so a retried finalize can't process it twice
+        claimed = ChunkedUpload.objects.filter(pk=upload.pk, status='UPLOADING').update(status='FINALIZED')
+        if not claimed:
+            return Response({"error": "Upload already finalized"}, status=status.HTTP_409_CONFLICT)
+
+        return self.submit_upload(request, upload.patient, upload.notes, upload.spool_path)
+
+    @staticmethod
+    def _chunk_offset(request, length, total_size):
+        # None for anything malformed, including negative offsets
+        content_range = request.headers.get('Content-Range')
+        if not content_range:
+            try:
+                offset = int(request.query_params.get('offset'))
+            except (TypeError, ValueError):
+                return None
+            return offset if offset >= 0 else None
+
+        unit, _, spec = content_range.partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, _, end = byte_range.partition('-')
+        try:
+            start, end = int(start), int(end)
+        except ValueError:
+            return None
+        if unit != 'bytes' or end - start + 1 != length or total not in ('*', str(total_size)):
+            return None
+        return start
+
+    def reject_upload(self, error):
+        record_rejection(error.reason)
+        return Response({"error": str(error), "reason": error.reason}, status=error.status_code)
+
+    @action(detail=False, methods=['get'], url_path=r'upload-jobs/(?P<job_id>\d+)')
+    def upload_job(self, request, job_id=None):
+        """
+        Poll the status of one of your queued uploads; includes the
+        assessment once completed.
+        """
+        # select_related bypasses the assessment manager, so defer the legacy column here
+        job = get_object_or_404(
+            ImageProcessingJob.objects.select_related('assessment').defer('assessment__image'),
+            id=job_id, nurse=request.user
+        )
+        return Response(ImageProcessingJobSerializer(job, context={'request': request}).data)
 
     @action(detail=False, methods=['post'], url_path='record-vitals')
     def record_vitals(self, request):
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from clinical.storage import get_blob_store
+from .models import StorageSample
+
+# Where the storage goes: every Django table's size on disk (heap, indexes
+# and TOAST, summed over partitions, so the partitioned system log counts
+# in full) and the bytes in the wound image blob store. Computed by the
+# storage sampler each interval and saved with the StorageSample, which
+# every process serves from the cache; requests never compute it. The
+# blob store only re-lists directories that changed since the last pass
+# (LocalBlobStore.usage).
+BREAKDOWN_KEY = 'storage:breakdown'
+LOG_TABLE = 'users_systemlog'
+
+TABLE_SIZES_SQL = """
+    SELECT root.relname,
+           SUM(GREATEST(c.reltuples, 0))::bigint,
+           SUM(pg_total_relation_size(c.oid))::bigint,
+           SUM(pg_indexes_size(c.oid))::bigint,
+           SUM(CASE WHEN c.reltoastrelid <> 0 THEN pg_total_relation_size(c.reltoastrelid) ELSE 0 END)::bigint
+    FROM pg_class root
+    CROSS JOIN LATERAL pg_partition_tree(root.oid) tree
+    JOIN pg_class c ON c.oid = tree.relid
+    WHERE root.relname = ANY(%s) AND root.relkind IN ('r', 'p') AND pg_table_is_visible(root.oid)
+    GROUP BY root.relname
+"""
+
+
+def size_gb(size_bytes):
+    return round(size_bytes / (1024**3), 2) if size_bytes is not None else None
+
+
+def table_sizes():
+    """
+    Per table: estimated rows and total, heap, index and TOAST bytes,
+    biggest first. One catalog query; empty on databases other than
+    PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    tables = connection.introspection.django_table_names(only_existing=False, include_views=False)
+    with connection.cursor() as cursor:
+        cursor.execute(TABLE_SIZES_SQL, [sorted(tables)])
+        rows = cursor.fetchall()
+
+    sizes = [
+        {
+            'table': table,
+            'rows': rows_estimate,
+            'total_bytes': total,
+            'heap_bytes': total - indexes - toast,
+            'index_bytes': indexes,
+            'toast_bytes': toast,
+        }
+        for table, rows_estimate, total, indexes, toast in rows
+    ]
+    return sorted(sizes, key=lambda size: size['total_bytes'], reverse=True)
+
+
+def blob_usage():
+    """(blobs, bytes) in the wound image store, or None if it can't tell."""
+    try:
+        return get_blob_store().usage()
+    except NotImplementedError:
+        return None
+
+
+def compute_breakdown():
+    """
+    Table sizes, blob store totals and the per-category sums the dashboards
+    show. Sums are None when the sizes aren't available.
+    """
+    tables = table_sizes()
+    images = blob_usage()
+
+    def total(field, include):
+        return sum(t[field] for t in tables if include(t['table'])) if tables else None
+
+    return {
+        'computed_at': timezone.now(),
+        'tables': tables,
+        'image_blobs': images[0] if images else None,
+        'image_bytes': images[1] if images else None,
+        'records_bytes': total('total_bytes', lambda table: table.startswith('clinical_')),
+        'log_bytes': total('total_bytes', lambda table: table == LOG_TABLE),
+        'toast_bytes': total('toast_bytes', lambda table: True),
+    }
+
+
+def sample_breakdown(sample):
+    """The breakdown saved with a StorageSample, or None for older samples."""
+    if not sample or not sample.breakdown:
+        return None
+    return {**sample.breakdown, 'computed_at': sample.timestamp}
+
+
+def pending_breakdown():
+    """Placeholder until the sampler has stored a breakdown: sizes unknown."""
+    return {
+        'computed_at': None,
+        'tables': [],
+        'image_blobs': None,
+        'image_bytes': None,
+        'records_bytes': None,
+        'log_bytes': None,
+        'toast_bytes': None,
+    }
+
+
+def get_storage_breakdown():
+    """
+    The breakdown from the cache, else from the latest sample that has
+    one. Never computed on the spot: pending_breakdown() until sampled.
+    """
+    breakdown = cache.get(BREAKDOWN_KEY)
+    if breakdown is None:
+        latest = StorageSample.objects.exclude(breakdown={}).order_by('-timestamp').first()
+        breakdown = sample_breakdown(latest)
+        if breakdown is None:
+            return pending_breakdown()
+        cache.set(BREAKDOWN_KEY, breakdown, settings.STORAGE_SAMPLE_INTERVAL_SECONDS)
+    return breakdown
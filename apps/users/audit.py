@@ -0,0 +1,204 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.dispatch import Signal, receiver
+
+from .models import SystemLog
+
+logger = logging.getLogger(__name__)
+
+# Sent after each batch is saved, with the logs=[...] that were saved
+audit_logs_flushed = Signal()
+
+# Errors that mean the database is unreachable rather than a bad row
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+
+class AuditWriter:
+    """
+    Buffers SystemLog rows in memory and saves them with bulk_create from a
+    background thread, once batch_size rows are waiting or flush_interval
+    seconds after the first one arrived. Callers never wait on the database.
+    Rows that fail because the database is unreachable are queued again
+    after retry_delay seconds, up to max_retries times.
+    """
+
+    def __init__(self, batch_size=100, flush_interval=1.0, max_pending=10000, max_retries=5, retry_delay=2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def write(self, log):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(log)
+        except queue.Full:
+            # Never drop audit events; under backpressure write inline
+            if save_logs([log]):
+                logger.error("Audit log lost, database unavailable: %s", log.action)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until everything written so far by this process is saved.
+        Returns False on timeout.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _ensure_thread(self):
+        # Threads don't survive fork(); restart the writer in each worker
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue(self.max_pending)
+                threading.Thread(target=self._run, args=(self._queue,), name='audit-writer', daemon=True).start()
+
+    def _run(self, pending):
+        while True:
+            batch, waiters = [], []
+            item = pending.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    # flush(): save what we have now
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                # Long-lived thread: drop connections that are stale or broken
+                close_old_connections()
+                unsaved = save_logs(batch)
+                if unsaved:
+                    # flush() callers keep waiting until the retry
+                    self._requeue(pending, unsaved + waiters)
+                    continue
+            for done in waiters:
+                done.set()
+
+    def _requeue(self, pending, items):
+        time.sleep(self.retry_delay)
+        dropped = 0
+        for item in items:
+            if not isinstance(item, threading.Event):
+                item._audit_attempts = getattr(item, '_audit_attempts', 0) + 1
+                if item._audit_attempts > self.max_retries:
+                    dropped += 1
+                    continue
+            try:
+                pending.put_nowait(item)
+            except queue.Full:
+                if isinstance(item, threading.Event):
+                    item.set()
+                else:
+                    dropped += 1
+        if dropped:
+            logger.error("Dropped %d audit logs, database unavailable after %d retries", dropped, self.max_retries)
+
+
+def save_logs(logs):
+    """
+    Saves a batch with one bulk_create, falling back to one row at a time
+    so a bad row doesn't take the rest of the batch with it. Returns the
+    logs that weren't saved because the database is unreachable.
+    """
+    try:
+        # In a savepoint, so a failure doesn't break a surrounding transaction
+        with transaction.atomic():
+            SystemLog.objects.bulk_create(logs)
+        saved, unsaved = logs, []
+    except CONNECTION_ERRORS:
+        logger.warning("Database unavailable, %d audit logs not saved", len(logs), exc_info=True)
+        return logs
+    except Exception:
+        logger.warning("Saving %d audit logs in bulk failed, saving them one by one", len(logs), exc_info=True)
+        saved, unsaved = [], []
+        for index, log in enumerate(logs):
+            # A rolled back bulk_create may have assigned ids already
+            log.pk = None
+            try:
+                with transaction.atomic():
+                    log.save(force_insert=True)
+            except CONNECTION_ERRORS:
+                unsaved = logs[index:]
+                break
+            except Exception:
+                logger.exception("Audit log could not be saved: %s", log.action)
+            else:
+                saved.append(log)
+
+    if saved:
+        audit_logs_flushed.send(sender=SystemLog, logs=saved)
+    return unsaved
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL_MS / 1000,
+                    max_retries=settings.AUDIT_LOG_MAX_RETRIES,
+                    retry_delay=settings.AUDIT_LOG_RETRY_DELAY
+                )
+    return _writer
+
+
+def write_audit_log(log):
+    """
+    Queues an unsaved SystemLog for the background writer, or saves it
+    right away when AUDIT_LOG_ASYNC is off.
+    """
+    if settings.AUDIT_LOG_ASYNC:
+        get_audit_writer().write(log)
+    elif save_logs([log]):
+        logger.error("Audit log lost, database unavailable: %s", log.action)
+
+
+def flush_audit_logs(timeout=None):
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+
+@atexit.register
+def flush_on_exit():
+    # Daemon threads still run during atexit, give the writer time to drain
+    if not flush_audit_logs(timeout=settings.AUDIT_LOG_SHUTDOWN_TIMEOUT):
+        logger.error("Audit writer did not finish flushing before shutdown")
+
+
+@receiver(setting_changed)
+def reset_audit_writer(setting, **kwargs):
+    global _writer
+    if setting in ('AUDIT_LOG_BATCH_SIZE', 'AUDIT_LOG_FLUSH_INTERVAL_MS', 'AUDIT_LOG_MAX_RETRIES', 'AUDIT_LOG_RETRY_DELAY'):
+        flush_audit_logs()
+        _writer = None
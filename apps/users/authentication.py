@@ -1,6 +1,166 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
 
+TOKEN_VERSION_CLAIM = 'token_version'
+REVOKED_USER = -1  # published version for deleted users, matches no token
+
+
+def get_tokens_for_user(user):
+    """
+    A refresh token (and, via .access_token, an access token) carrying the
+    claims the API authorizes on: user id, role, name, email and the user's
+    token version.
+    """
+    refresh = RefreshToken()
+    refresh['email'] = user.email
+    refresh['role'] = user.role
+    refresh['name'] = user.name
+    refresh['user_id'] = user.id
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    return refresh
+
+
+def token_version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def token_version_timeout():
+    # A per-process cache never hears of changes made in other processes,
+    # so there a version is only trusted as long as the user cache's users
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return settings.AUTH_USER_CACHE_TTL_SECONDS
+    return settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+
+
+def publish_token_version(user_id, version):
+    """
+    Records a user's current token version in the cache, where the
+    claims-only authentication checks it. With a shared cache it is kept
+    as long as an access token lives; older tokens have expired by then.
+    """
+    cache.set(token_version_key(user_id), version, token_version_timeout())
+
+
+def current_token_version(user_id):
+    """
+    The user's token version from the cache, or read from the database and
+    published on a miss. REVOKED_USER for deleted or inactive users.
+    """
+    version = cache.get(token_version_key(user_id))
+    if version is None:
+        version = (
+            User.objects.filter(pk=user_id, isActive=True)
+            .values_list('token_version', flat=True).first()
+        )
+        if version is None:
+            version = REVOKED_USER
+        publish_token_version(user_id, version)
+    return version
+
+
+class UserCache:
+    """
+    Per-process LRU of active users by id, each entry valid for `ttl`
+    seconds. Saving or deleting a user drops their entry in this process
+    (users/signals.py); other processes see the change within the TTL.
+    """
+
+    def __init__(self, max_size=1024, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user id: (expires_at, user)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # A copy per request, so changes to request.user stay in that request
+        return copy.copy(entry[1])
+
+    def set(self, user):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[user.pk] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._entries.move_to_end(user.pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                _user_cache = UserCache(
+                    max_size=settings.AUTH_USER_CACHE_SIZE,
+                    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS
+                )
+    return _user_cache
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    global _user_cache
+    if setting in ('AUTH_USER_CACHE_SIZE', 'AUTH_USER_CACHE_TTL_SECONDS'):
+        _user_cache = None
+
+
+class ClaimsUser:
+    """
+    The authenticated user as described by a validated access token, for
+    views that only need the id, role and name. Not a model instance: it
+    can't be saved or used in queries (use .id).
+    """
+    is_authenticated = True
+    is_anonymous = False
+    isActive = True
+
+    def __init__(self, token):
+        self.id = self.pk = token['user_id']
+        self.role = token['role']
+        self.name = token.get('name', '')
+        self.email = token.get('email', '')
+        self.token_version = token.get(TOKEN_VERSION_CLAIM, 0)
+
+    def __str__(self):
+        return self.email
+
+    def __eq__(self, other):
+        return isinstance(other, (ClaimsUser, User)) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
 
 class CustomJWTAuthentication(JWTAuthentication):
     """
@@ -9,15 +169,43 @@ class CustomJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         """
         Attempts to find and return a user using the given validated token.
+        Active users come from the per-process user cache when possible.
         """
-        try:
-            user_id = validated_token.get('user_id')
-            user = User.objects.get(id=user_id)
-            
+        user_id = validated_token.get('user_id')
+        user_cache = get_user_cache()
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                return None
+
             # Check if user is still active
             if not user.isActive:
                 return None
-                
-            return user
-        except User.DoesNotExist:
+            user_cache.set(user)
+
+        # Issued before a role change or deactivation
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            return None
+        return user
+
+
+class ClaimsJWTAuthentication(CustomJWTAuthentication):
+    """
+    Authorizes from the token's claims alone (a ClaimsUser), without loading
+    the user. Revocation is checked against the user's current token
+    version (current_token_version): one query per user on a cache miss,
+    none after. With a per-process cache, a change made in another process
+    is seen within AUTH_USER_CACHE_TTL_SECONDS. Falls back to loading the
+    user when AUTH_CLAIMS_FAST_PATH is off or the token predates the role
+    claim.
+    """
+    def get_user(self, validated_token):
+        if not settings.AUTH_CLAIMS_FAST_PATH or 'role' not in validated_token:
+            return super().get_user(validated_token)
+
+        current = current_token_version(validated_token.get('user_id'))
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != current:
             return None
+        return ClaimsUser(validated_token)
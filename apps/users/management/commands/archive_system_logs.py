@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from users.retention import ensure_partitions, expired_months, archive_month, is_partitioned
+from clinical.counters import compute_log_counters, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Archive system logs older than the retention window to compressed CSV and drop them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.SYSTEM_LOG_RETENTION_MONTHS,
+                            help='Keep this many whole months before the current one')
+        parser.add_argument('--archive-dir', default=settings.SYSTEM_LOG_ARCHIVE_DIR,
+                            help='Directory for the .csv.gz archives')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only list the months that would be archived')
+
+    def handle(self, *args, **options):
+        # 1. Upcoming partitions, so new logs stay out of the default one
+        if is_partitioned() and not options['dry_run']:
+            for name in ensure_partitions(settings.SYSTEM_LOG_PARTITIONS_AHEAD):
+                self.stdout.write(f"Created partition {name}")
+
+        # 2. Archive and drop expired months, oldest first
+        months = expired_months(options['months'])
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f"Would archive {month:%Y-%m}")
+            return
+
+        total = 0
+        for month in months:
+            path, rows = archive_month(month, options['archive_dir'])
+            total += rows
+            self.stdout.write(f"Archived {month:%Y-%m}: {rows} logs -> {path}")
+
+        # 3. Dropping partitions bypasses signals, recount the dashboard totals
+        if months:
+            rebuild_counters(compute_log_counters, names=['logs', 'logs_security'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Archived {len(months)} months ({total} logs), keeping {options['months']} months"
+        ))
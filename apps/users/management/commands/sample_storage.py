@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from users.sampler import take_sample
+
+
+class Command(BaseCommand):
+    help = 'Record the current disk and database size (for cron when STORAGE_SAMPLER_ENABLED is off)'
+
+    def handle(self, *args, **options):
+        sample = take_sample()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Sampled storage: {sample.disk_used_bytes / 1024**3:.1f} GB disk used, "
+            f"{sample.database_bytes / 1024**3:.2f} GB database"
+        ))
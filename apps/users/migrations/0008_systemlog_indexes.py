@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_last_login_alter_user_password'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='systemlog_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['severity', '-timestamp'], name='systemlog_severity_idx'),
+        ),
+    ]
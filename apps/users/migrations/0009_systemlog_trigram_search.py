@@ -0,0 +1,42 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# GIN trigram indexes on the exact expressions Django generates for
+# icontains on PostgreSQL (UPPER(col::text) LIKE '%...%'), so log search can
+# use them. PostgreSQL only; other databases keep scanning.
+TRIGRAM_INDEXES = [
+    ('systemlog_action_trgm_idx', 'users_systemlog', 'UPPER("action"::text)'),
+    ('systemlog_ip_trgm_idx', 'users_systemlog', 'UPPER(HOST("ip_address"))'),
+    ('user_name_trgm_idx', 'users_user', 'UPPER("name"::text)'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, expression in TRIGRAM_INDEXES:
+        # CONCURRENTLY: don't lock the log table while the index builds
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" USING gin (({expression}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('users', '0008_systemlog_indexes'),
+    ]
+
+    operations = [
+        # No-op on databases other than PostgreSQL
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
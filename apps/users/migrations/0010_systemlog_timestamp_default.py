@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_systemlog_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,177 @@
+import re
+from datetime import date, datetime, time
+
+from django.db import migrations, transaction
+from django.utils import timezone
+
+# Rebuilds users_systemlog as a table range partitioned by month on
+# timestamp (PostgreSQL only; a no-op elsewhere).
+#
+# A partitioned table's primary key must include the partition key, so the
+# key becomes (id, timestamp); ids still come from one sequence. Indexes and
+# foreign keys are recreated from the old table's definitions, keeping
+# their names. Ongoing partition upkeep: users/retention.py.
+#
+# The migration is not atomic so the copy doesn't hold locks for its whole
+# run:
+#   1. The partitioned table and its indexes are created next to the old one.
+#   2. Existing rows are copied COPY_BATCH_SIZE ids per transaction while the
+#      API keeps reading and writing the old table.
+#   3. One transaction locks the old table against writes (reads go on),
+#      copies the rows added since, drops the copies of rows deleted since
+#      (a user deleted meanwhile), adds the foreign keys and swaps tables.
+# If it is interrupted, running it again resumes the copy. Don't run
+# `archive_system_logs` until it has finished.
+TABLE = 'users_systemlog'
+NEW_TABLE = f'{TABLE}_partitioned'
+COLUMNS = 'id, timestamp, ip_address, action, severity, user_id'
+MONTHS_AHEAD = 2
+COPY_BATCH_SIZE = 50000
+INDEX_RE = re.compile(r'^(CREATE (?:UNIQUE )?INDEX )("?[\w$]+"?)( ON (?:ONLY )?)(\S+)')
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(month):
+    return timezone.make_aware(datetime.combine(month, time.min), timezone.get_current_timezone())
+
+
+def index_names(cursor):
+    """{name: definition} of the old table's indexes, except the primary key."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [TABLE, f'{TABLE}_pkey']
+    )
+    return dict(cursor.fetchall())
+
+
+def create_partitioned_table(cursor):
+    cursor.execute(f'SELECT MIN(timestamp) FROM "{TABLE}"')
+    oldest = cursor.fetchone()[0]
+
+    # Ids from a standalone sequence, moved past the old one at the swap
+    cursor.execute(f'CREATE SEQUENCE "{NEW_TABLE}_id_seq"')
+    cursor.execute(
+        f'CREATE TABLE "{NEW_TABLE}" (LIKE "{TABLE}" INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (timestamp)'
+    )
+    cursor.execute(
+        f'ALTER TABLE "{NEW_TABLE}" '
+        f"ALTER COLUMN id SET DEFAULT nextval('\"{NEW_TABLE}_id_seq\"'), "
+        f'ADD CONSTRAINT "{TABLE}_pkey_partitioned" PRIMARY KEY (id, timestamp)'
+    )
+    cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{NEW_TABLE}" DEFAULT')
+
+    # One partition per month from the oldest log to MONTHS_AHEAD out
+    month = timezone.localdate().replace(day=1)
+    if oldest is not None:
+        month = min(month, timezone.localtime(oldest).date().replace(day=1))
+    last = add_months(timezone.localdate().replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}_y{month.year}m{month.month:02d}" PARTITION OF "{NEW_TABLE}" '
+            'FOR VALUES FROM (%s) TO (%s)', [month_start(month), month_start(add_months(month, 1))]
+        )
+        month = add_months(month, 1)
+
+    # Indexes now, so the swap doesn't build them under the lock. Names
+    # get a _p suffix until the old table (holding the names) is dropped.
+    for name, definition in index_names(cursor).items():
+        cursor.execute(INDEX_RE.sub(
+            lambda match: f'{match[1]}"{name}_p"{match[3]}"{NEW_TABLE}"', definition
+        ))
+
+
+def copy_batches(connection, cursor):
+    """
+    Copies rows up to the current max id, COPY_BATCH_SIZE ids at a time.
+    Returns that max id; later rows are copied at the swap.
+    """
+    with transaction.atomic(using=connection.alias):
+        # Waits for inserts in flight, so every id up to the max is committed
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN SHARE MODE')
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{TABLE}"')
+        max_id = cursor.fetchone()[0]
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{NEW_TABLE}"')
+    copied = cursor.fetchone()[0]
+
+    while copied < max_id:
+        upper = min(copied + COPY_BATCH_SIZE, max_id)
+        with transaction.atomic(using=connection.alias):
+            cursor.execute(
+                f'INSERT INTO "{NEW_TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{TABLE}" '
+                'WHERE id > %s AND id <= %s', [copied, upper]
+            )
+        copied = upper
+    return max_id
+
+
+def swap_tables(cursor, copied):
+    indexes = index_names(cursor)
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE]
+    )
+    foreign_keys = cursor.fetchall()
+
+    # Reads carry on; writes wait until the swap commits
+    cursor.execute(f'LOCK TABLE "{TABLE}" IN EXCLUSIVE MODE')
+    cursor.execute(
+        f'INSERT INTO "{NEW_TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{TABLE}" WHERE id > %s', [copied]
+    )
+    cursor.execute(
+        f'DELETE FROM "{NEW_TABLE}" n WHERE NOT EXISTS (SELECT 1 FROM "{TABLE}" o WHERE o.id = n.id)'
+    )
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{TABLE}"')
+    cursor.execute(f"SELECT setval('\"{NEW_TABLE}_id_seq\"', %s, false)", [cursor.fetchone()[0] + 1])
+
+    cursor.execute(f'DROP TABLE "{TABLE}"')
+    cursor.execute(f'ALTER TABLE "{NEW_TABLE}" RENAME TO "{TABLE}"')
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{TABLE}_pkey_partitioned" TO "{TABLE}_pkey"')
+    cursor.execute(f'ALTER SEQUENCE "{NEW_TABLE}_id_seq" RENAME TO "{TABLE}_id_seq"')
+    cursor.execute(f'ALTER SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+    for name in indexes:
+        cursor.execute(f'ALTER INDEX "{name}_p" RENAME TO "{name}"')
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        if cursor.fetchone():
+            return
+
+        # 1. Partitioned table next to the old one (kept from an interrupted run)
+        cursor.execute("SELECT to_regclass(%s)", [NEW_TABLE])
+        if cursor.fetchone()[0] is None:
+            with transaction.atomic(using=connection.alias):
+                create_partitioned_table(cursor)
+
+        # 2. Copy in batches, 3. catch up and swap
+        copied = copy_batches(connection, cursor)
+        with transaction.atomic(using=connection.alias):
+            swap_tables(cursor, copied)
+
+
+class Migration(migrations.Migration):
+    # Commits per batch, see above
+    atomic = False
+
+    dependencies = [
+        ('users', '0010_systemlog_timestamp_default'),
+    ]
+
+    operations = [
+        # Reversing leaves the table partitioned, which the model works with
+        migrations.RunPython(partition_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_systemlog_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('disk_total_bytes', models.BigIntegerField()),
+                ('disk_used_bytes', models.BigIntegerField()),
+                ('disk_free_bytes', models.BigIntegerField()),
+                ('database_bytes', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_storagesample'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagesample',
+            name='image_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='storagesample',
+            name='log_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
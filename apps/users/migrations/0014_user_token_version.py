@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_storagesample_breakdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagesample',
+            name='breakdown',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -38,12 +38,37 @@ class User(AbstractBaseUser):
     activity = models.CharField(max_length=50, blank=True)  # Deprecated - kept for backward compatibility
     last_activity = models.DateTimeField(null=True, blank=True)  # New field for tracking actual activity
     isActive = models.BooleanField(default=True)
+    # Sent as the token_version claim. Changing the role or deactivating the
+    # account bumps it, which revokes every token issued before.
+    token_version = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
+    REVOKING_FIELDS = ('role', 'isActive')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name', 'role']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._saved_access = user.access_fields()
+        return user
+
+    def access_fields(self):
+        # Loaded values only; reading a deferred field would cost a query
+        return {name: self.__dict__[name] for name in self.REVOKING_FIELDS if name in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        saved = getattr(self, '_saved_access', {})
+        current = self.access_fields()
+        if any(name in current and current[name] != value for name, value in saved.items()):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._saved_access = self.access_fields()
+
     # Keep verify_password for backward compatibility with existing code
     def verify_password(self, raw_password):
         """Check if the provided password matches the hashed password"""
@@ -94,11 +119,43 @@ class SystemLog(models.Model):
         ('Error', 'Error'),
     ]
 
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the audit writer saves it
+    timestamp = models.DateTimeField(default=timezone.now)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='logs', null=True, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     action = models.CharField(max_length=255)
     severity = models.CharField(max_length=20, choices=SEVERITY_CHOICES, default='Info')
 
+    class Meta:
+        indexes = [
+            # Log listing, newest first (matches the cursor ordering)
+            models.Index(fields=['-timestamp', '-id'], name='systemlog_recent_idx'),
+            # Severity filter and the security alert count on the dashboard
+            models.Index(fields=['severity', '-timestamp'], name='systemlog_severity_idx'),
+        ]
+        # The search indexes (pg_trgm GIN on action, ip_address and user
+        # name) are PostgreSQL only and live in migration 0009
+
     def __str__(self):
         return f"{self.timestamp} - {self.user.name if self.user else 'System'} - {self.action}"
+
+
+class StorageSample(models.Model):
+    """
+    Disk and database size at one point in time, recorded by the storage
+    sampler (users/sampler.py). Old samples are pruned after
+    STORAGE_SAMPLE_RETENTION_DAYS.
+    """
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    disk_total_bytes = models.BigIntegerField()
+    disk_used_bytes = models.BigIntegerField()
+    disk_free_bytes = models.BigIntegerField()
+    database_bytes = models.BigIntegerField()
+    # From the storage breakdown (users/accounting.py); null if unknown
+    image_bytes = models.BigIntegerField(null=True, blank=True)
+    log_bytes = models.BigIntegerField(null=True, blank=True)
+    # The full breakdown (per-table sizes, blob counts) as measured
+    breakdown = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.timestamp} - disk {self.disk_used_bytes} / db {self.database_bytes}"
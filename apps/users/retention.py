@@ -0,0 +1,158 @@
+import csv
+import gzip
+import os
+import re
+import tempfile
+from datetime import date, datetime, time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import SystemLog
+
+# On PostgreSQL users_systemlog is range partitioned by month on timestamp
+# (migration 0011): users_systemlog_y2025m01, ... plus a default partition
+# catching anything outside them. Elsewhere it is a plain table and
+# retention deletes rows instead of dropping partitions.
+TABLE = 'users_systemlog'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_RE = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+ARCHIVE_COLUMNS = ['id', 'timestamp', 'ip_address', 'action', 'severity', 'user_id']
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month():
+    return timezone.localdate().replace(day=1)
+
+
+def month_bounds(month):
+    """[start, end) of a month as aware datetimes."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(month, time.min), tz)
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), time.min), tz)
+    return start, end
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Monthly partitions currently attached, oldest first: [(month, name)]."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(month):
+    """
+    Adds the partition for `month`. Rows for that month already sitting
+    in the default partition are moved into it first, otherwise PostgreSQL
+    refuses to attach it.
+    """
+    name = partition_name(month)
+    start, end = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE timestamp >= %s AND timestamp < %s RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved', [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end]
+        )
+    return name
+
+
+def ensure_partitions(months_ahead):
+    """
+    Makes sure partitions exist from the current month to `months_ahead`
+    months out, so new logs never land in the default partition.
+    """
+    existing = {month for month, _ in list_partitions()}
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current_month(), offset)
+        if month not in existing:
+            created.append(create_partition(month))
+    return created
+
+
+def write_archive(month, archive_dir):
+    """
+    Writes the month's logs to <archive_dir>/users_systemlog_yYYYYmMM.csv.gz
+    and returns (path, rows). The file only appears once it is complete.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f'{partition_name(month)}.csv.gz')
+    start, end = month_bounds(month)
+    logs = SystemLog.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by('id')
+
+    rows = 0
+    fd, tmp_path = tempfile.mkstemp(dir=archive_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(ARCHIVE_COLUMNS)
+            for row in logs.values_list(*ARCHIVE_COLUMNS).iterator(chunk_size=5000):
+                writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+                rows += 1
+        os.chmod(tmp_path, 0o640)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path, rows
+
+
+def expired_months(retention_months):
+    """Months entirely older than the retention window, oldest first."""
+    cutoff = add_months(current_month(), -retention_months)
+    if is_partitioned():
+        return [month for month, _ in list_partitions() if month < cutoff]
+
+    # Only months that actually have logs
+    expired = SystemLog.objects.filter(timestamp__lt=month_bounds(cutoff)[0])
+    return list(expired.dates('timestamp', 'month'))
+
+
+def archive_month(month, archive_dir):
+    """
+    Archives one month and removes it from the database: the partition is
+    detached and dropped on PostgreSQL, rows are deleted elsewhere.
+    Returns (path, rows).
+    """
+    path, rows = write_archive(month, archive_dir)
+    if is_partitioned():
+        name = partition_name(month)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+    else:
+        start, end = month_bounds(month)
+        SystemLog.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+    return path, rows
@@ -0,0 +1,175 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .accounting import BREAKDOWN_KEY, compute_breakdown, sample_breakdown
+from .models import StorageSample
+from .utils import get_database_size, disk_metrics, database_size_metrics
+
+logger = logging.getLogger(__name__)
+
+# Disk usage and pg_database_size() (which stats every relation file) are
+# too slow to run per request. A background thread records them every
+# STORAGE_SAMPLE_INTERVAL_SECONDS as StorageSample rows; the dashboards
+# read a snapshot built from the latest sample, with growth measured
+# against the sample from STORAGE_GROWTH_WINDOW_DAYS earlier.
+#
+# Every worker process runs a sampler, but one only measures when the
+# latest sample (from any worker) is older than the interval. Each sampler
+# refreshes its process's cached snapshot and breakdown from the latest
+# sample, so requests never measure or compute them. Until the first
+# sample exists the snapshot is 'pending' (zeros, growth 'N/A').
+DISK_PATH = '/'
+SNAPSHOT_KEY = 'storage:snapshot'
+
+
+class StorageSampler:
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        # Threads don't survive fork(); restart the sampler in each worker
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name='storage-sampler', daemon=True).start()
+
+    def _run(self):
+        while True:
+            # Long-lived thread: drop connections that are stale or broken
+            close_old_connections()
+            try:
+                sample = sample_if_due(self.interval)
+                # Outlive the sleep, so the entries never expire in between
+                cache.set(SNAPSHOT_KEY, build_snapshot(), 2 * self.interval)
+                breakdown = sample_breakdown(sample)
+                if breakdown:
+                    cache.set(BREAKDOWN_KEY, breakdown, 2 * self.interval)
+            except Exception:
+                logger.exception("Storage sampling failed")
+            time.sleep(self.interval)
+
+
+def take_sample():
+    """
+    Measures disk and database size and the storage breakdown now and
+    stores them as a sample.
+    """
+    total, used, free = shutil.disk_usage(DISK_PATH)
+    breakdown = compute_breakdown()
+    sample = StorageSample.objects.create(
+        disk_total_bytes=total,
+        disk_used_bytes=used,
+        disk_free_bytes=free,
+        database_bytes=get_database_size()['size_bytes'],
+        image_bytes=breakdown['image_bytes'],
+        log_bytes=breakdown['log_bytes'],
+        breakdown={key: value for key, value in breakdown.items() if key != 'computed_at'}
+    )
+    cutoff = sample.timestamp - timedelta(days=settings.STORAGE_SAMPLE_RETENTION_DAYS)
+    StorageSample.objects.filter(timestamp__lt=cutoff).delete()
+    return sample
+
+
+def sample_if_due(interval):
+    latest = StorageSample.objects.order_by('-timestamp').first()
+    if latest and timezone.now() - latest.timestamp < timedelta(seconds=interval):
+        return latest
+    return take_sample()
+
+
+def growth(current, baseline):
+    """Percentage change as shown on the dashboards, e.g. '+1.5%'."""
+    if current is None or not baseline:
+        return 'N/A'
+    return f"{(current - baseline) / baseline * 100:+.1f}%"
+
+
+def build_snapshot():
+    """
+    Storage figures for the dashboards from the latest sample, however old
+    (sampled_at tells), or a 'pending' snapshot before the first one.
+    Never measures anything itself.
+    """
+    latest = StorageSample.objects.order_by('-timestamp').first()
+    if latest is None:
+        return {
+            'state': 'pending',
+            'sampled_at': None,
+            'growth_since': None,
+            'disk': disk_metrics(0, 0, 0),
+            'database': database_size_metrics(0),
+            'growth': {'database': 'N/A', 'files': 'N/A', 'images': 'N/A', 'logs': 'N/A'},
+        }
+
+    # Growth over the window, or since the oldest sample if that is younger
+    window_start = timezone.now() - timedelta(days=settings.STORAGE_GROWTH_WINDOW_DAYS)
+    baseline = (
+        StorageSample.objects.filter(timestamp__lte=window_start).order_by('-timestamp').first()
+        or StorageSample.objects.order_by('timestamp').first()
+    )
+    if baseline.pk == latest.pk:
+        baseline = None
+
+    files_bytes = latest.disk_used_bytes - latest.database_bytes
+    return {
+        'state': 'sampled',
+        'sampled_at': latest.timestamp,
+        'growth_since': baseline.timestamp if baseline else None,
+        'disk': disk_metrics(latest.disk_total_bytes, latest.disk_used_bytes, latest.disk_free_bytes),
+        'database': database_size_metrics(latest.database_bytes),
+        'growth': {
+            'database': growth(latest.database_bytes, baseline.database_bytes if baseline else 0),
+            'files': growth(files_bytes, baseline.disk_used_bytes - baseline.database_bytes if baseline else 0),
+            'images': growth(latest.image_bytes, baseline.image_bytes if baseline else 0),
+            'logs': growth(latest.log_bytes, baseline.log_bytes if baseline else 0),
+        }
+    }
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_storage_sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = StorageSampler(settings.STORAGE_SAMPLE_INTERVAL_SECONDS)
+    return _sampler
+
+
+def get_storage_snapshot():
+    """
+    The current storage snapshot, cached for one sampling interval. Starts
+    this process's sampler when STORAGE_SAMPLER_ENABLED is on.
+    """
+    if settings.STORAGE_SAMPLER_ENABLED:
+        get_storage_sampler().start()
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = build_snapshot()
+        # Not cached while pending, so the first sample shows up at once
+        if snapshot['state'] != 'pending':
+            cache.set(SNAPSHOT_KEY, snapshot, settings.STORAGE_SAMPLE_INTERVAL_SECONDS)
+    return snapshot
+
+
+@receiver(setting_changed)
+def reset_storage_sampler(setting, **kwargs):
+    global _sampler
+    if setting == 'STORAGE_SAMPLE_INTERVAL_SECONDS':
+        _sampler = None
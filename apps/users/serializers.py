@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import get_tokens_for_user, TOKEN_VERSION_CLAIM
 from .models import User, SystemLog
 import re
 
@@ -103,13 +106,7 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
                 raise serializers.ValidationError('Invalid credentials')
             
             # Generate tokens using simplejwt
-            from rest_framework_simplejwt.tokens import RefreshToken
-            
-            refresh = RefreshToken()
-            refresh['email'] = user.email
-            refresh['role'] = user.role
-            refresh['name'] = user.name
-            refresh['user_id'] = user.id
+            refresh = get_tokens_for_user(user)
             
             data = {
                 'refresh': str(refresh),
@@ -130,6 +127,18 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
             raise serializers.ValidationError('Invalid credentials')
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to refresh tokens of disabled or deleted users, and tokens
+    issued before the user's role or status changed.
+    """
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        user = User.objects.filter(id=refresh.get('user_id')).first()
+        if user is None or not user.isActive or refresh.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
+
 class ChangePasswordSerializer(serializers.Serializer):
     """
     Serializer for password change endpoint.
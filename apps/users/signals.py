@@ -1,7 +1,27 @@
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import User
 from .utils import log_system_event
+from .authentication import get_user_cache, publish_token_version, REVOKED_USER
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    # Role or isActive may have changed; the next request reloads the user
+    get_user_cache().invalidate(instance.pk)
+
+@receiver(post_save, sender=User)
+def revoke_old_tokens(sender, instance, **kwargs):
+    # Claims-only authentication compares tokens with the published version
+    if instance.token_version:
+        user_id, version = instance.pk, instance.token_version
+        transaction.on_commit(lambda: publish_token_version(user_id, version))
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: publish_token_version(user_id, REVOKED_USER))
 
 @receiver(post_save, sender=User)
 def log_user_save(sender, instance, created, **kwargs):
@@ -1,3 +1,372 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users import audit
+from users.audit import AuditWriter, audit_logs_flushed, save_logs
+from users.authentication import ClaimsJWTAuthentication, CustomJWTAuthentication, UserCache, get_tokens_for_user
+from users.models import StorageSample, SystemLog, User
+from users.accounting import get_storage_breakdown
+from users.retention import (
+    add_months, archive_month, create_partition, current_month, ensure_partitions,
+    expired_months, list_partitions, month_bounds, partition_name
+)
+from users.sampler import StorageSampler, build_snapshot, get_storage_snapshot, sample_if_due
+from core.testing import background_features_off
+
+background_settings = background_features_off()
+
+
+def setUpModule():
+    background_settings.enable()
+
+
+def tearDownModule():
+    background_settings.disable()
+
+
+GB = 1024 ** 3
+
+
+class StorageSamplerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def add_sample(self, days_ago, used_gb, database_gb):
+        return StorageSample.objects.create(
+            timestamp=timezone.now() - timedelta(days=days_ago),
+            disk_total_bytes=100 * GB, disk_used_bytes=used_gb * GB,
+            disk_free_bytes=(100 - used_gb) * GB, database_bytes=database_gb * GB
+        )
+
+    def test_growth_against_window(self):
+        self.add_sample(30, 20, 2)
+        self.add_sample(8, 30, 4)  # baseline: last sample before the 7 day window
+        self.add_sample(3, 40, 5)
+        self.add_sample(0, 51, 5)
+
+        snapshot = build_snapshot()
+        self.assertEqual(snapshot['database']['size_gb'], 5)
+        self.assertEqual(snapshot['growth']['database'], '+25.0%')
+        self.assertEqual(snapshot['growth']['files'], '+76.9%')
+
+    def test_pending_without_samples(self):
+        with mock.patch('shutil.disk_usage', side_effect=AssertionError('measured')), \
+                mock.patch('users.accounting.compute_breakdown', side_effect=AssertionError('computed')):
+            snapshot = get_storage_snapshot()
+            self.assertEqual(snapshot['state'], 'pending')
+            self.assertIsNone(snapshot['sampled_at'])
+            self.assertEqual(snapshot['growth']['database'], 'N/A')
+            self.assertIsNone(get_storage_breakdown()['image_bytes'])
+
+            client = APIClient()
+            client.force_authenticate(User.objects.create(name='Ad Min', email='admin@example.com', role='Admin'))
+            response = client.get('/api/storage/summary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['state'], 'pending')
+        self.assertFalse(StorageSample.objects.exists())
+
+    def test_old_sample_served_as_is(self):
+        sample = self.add_sample(2, 40, 5)
+        with mock.patch('shutil.disk_usage', side_effect=AssertionError('measured')):
+            snapshot = build_snapshot()
+        self.assertEqual(snapshot['state'], 'sampled')
+        self.assertEqual(snapshot['sampled_at'], sample.timestamp)
+        self.assertEqual(snapshot['database']['size_gb'], 5)
+
+    def test_sampler_logs_failures(self):
+        sampler = StorageSampler(300)
+        with mock.patch('users.sampler.sample_if_due', side_effect=OSError('disk gone')), \
+                mock.patch('time.sleep', side_effect=StopIteration), \
+                self.assertLogs('users.sampler', 'ERROR') as logs, self.assertRaises(StopIteration):
+            sampler._run()
+        self.assertIn('OSError: disk gone', logs.output[0])
+
+    def test_sample_only_when_due(self):
+        first = sample_if_due(300)
+        self.assertEqual(sample_if_due(300), first)
+        self.assertEqual(StorageSample.objects.count(), 1)
+
+    def test_breakdown_served_from_latest_sample(self):
+        sample = sample_if_due(300)
+        cache.clear()  # e.g. another worker process
+        with mock.patch('users.accounting.compute_breakdown', side_effect=AssertionError('recomputed')), \
+                self.assertNumQueries(1):
+            breakdown = get_storage_breakdown()
+        self.assertEqual(breakdown['computed_at'], sample.timestamp)
+        self.assertEqual(breakdown['image_bytes'], sample.image_bytes)
+
+    def test_storage_stats_percentages(self):
+        sample = self.add_sample(0, 50, 5)
+        sample.breakdown = {
+            'tables': [], 'image_blobs': 3, 'image_bytes': 20 * GB,
+            'records_bytes': None, 'log_bytes': None, 'toast_bytes': None
+        }
+        sample.save()
+        client = APIClient()
+        client.force_authenticate(User.objects.create(name='Ad Min', email='admin@example.com', role='Admin'))
+        data = client.get('/api/storage/summary/').data
+        self.assertEqual((data['database_usage_gb'], data['file_storage_gb']), (5, 20))
+        self.assertEqual((data['database_percentage'], data['file_storage_percentage']), (10, 40))
+
+
+@override_settings(AUTH_USER_CACHE_TTL_SECONDS=30)
+class UserCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='Nur Se', email='nurse@example.com', role='Nurse')
+        self.token = {'user_id': self.user.id}
+        self.auth = CustomJWTAuthentication()
+
+    def test_cached_after_first_lookup(self):
+        self.assertEqual(self.auth.get_user(self.token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.auth.get_user(self.token), self.user)
+
+    def test_save_invalidates(self):
+        self.auth.get_user(self.token)
+        self.user.isActive = False
+        self.user.save()
+        self.assertIsNone(self.auth.get_user(self.token))
+
+    def test_requests_get_their_own_copy(self):
+        self.auth.get_user(self.token).role = 'Admin'
+        self.assertEqual(self.auth.get_user(self.token).role, 'Nurse')
+
+    def test_lru_bound_and_ttl(self):
+        user_cache = UserCache(max_size=2, ttl=30)
+        users = [User(id=i, name='U', email=f'u{i}@example.com') for i in range(3)]
+        for user in users:
+            user_cache.set(user)
+        self.assertIsNone(user_cache.get(0))
+        self.assertEqual(user_cache.get(2).email, 'u2@example.com')
+
+        with mock.patch('users.authentication.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertIsNone(user_cache.get(2))
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(name='Doc Tor', email='doctor@example.com', role='Doctor')
+        self.token = AccessToken(str(get_tokens_for_user(self.user).access_token))
+
+    def test_authorizes_without_queries(self):
+        # The first request reads the token version, later ones use the cache
+        with self.assertNumQueries(1):
+            ClaimsJWTAuthentication().get_user(self.token)
+        with self.assertNumQueries(0):
+            user = ClaimsJWTAuthentication().get_user(self.token)
+        self.assertEqual((user.id, user.role, user.name), (self.user.id, 'Doctor', 'Doc Tor'))
+
+    def test_role_change_revokes_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'Nurse'
+            self.user.save()
+        self.assertEqual(self.user.token_version, 1)
+        self.assertIsNone(ClaimsJWTAuthentication().get_user(self.token))
+        self.assertIsNone(CustomJWTAuthentication().get_user(self.token))
+
+        fresh = AccessToken(str(get_tokens_for_user(self.user).access_token))
+        self.assertEqual(ClaimsJWTAuthentication().get_user(fresh).role, 'Nurse')
+
+    def test_revocation_survives_cache_loss(self):
+        # Another process (or a restart) without the published version
+        ClaimsJWTAuthentication().get_user(self.token)
+        self.user.role = 'Admin'
+        self.user.save()
+        cache.clear()
+        self.assertIsNone(ClaimsJWTAuthentication().get_user(self.token))
+
+    def test_deleted_user_refused(self):
+        self.user.delete()
+        cache.clear()
+        self.assertIsNone(ClaimsJWTAuthentication().get_user(self.token))
+
+    @override_settings(AUTH_USER_CACHE_TTL_SECONDS=30)
+    def test_local_cache_bounds_version_lifetime(self):
+        ClaimsJWTAuthentication().get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(token_version=1)  # changed elsewhere
+        later = time.time() + 31
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertIsNone(ClaimsJWTAuthentication().get_user(self.token))
+
+    def test_other_changes_keep_tokens(self):
+        self.user.update_activity()
+        self.user.name = 'Doc Torr'
+        self.user.save()
+        self.assertEqual(self.user.token_version, 0)
+        self.assertIsNotNone(CustomJWTAuthentication().get_user(self.token))
+
+    def test_refresh_refused_after_deactivation(self):
+        refresh = str(get_tokens_for_user(self.user))
+        user = User.objects.get(pk=self.user.pk)
+        user.isActive = False
+        user.save()
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class LogCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(name='Ad Min', email='admin@example.com', role='Admin'))
+        now = timezone.now()
+        # Runs of equal timestamps, longer than a page, across page boundaries
+        for seconds, count in ((0, 5), (1, 1), (2, 3)):
+            SystemLog.objects.bulk_create(
+                SystemLog(action=f'Event at {seconds}s', timestamp=now - timedelta(seconds=seconds)) for _ in range(count)
+            )
+        self.expected = list(SystemLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).data
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages
+
+    def test_pages_through_equal_timestamps(self):
+        pages = self.walk('/api/logs/?page_size=2', 'next')
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+
+        # And back again from the last page
+        last = self.client.get('/api/logs/?page_size=2')
+        while last.data['next']:
+            last = self.client.get(last.data['next'])
+        back = self.walk(last.data['previous'], 'previous')
+        self.assertEqual([pk for page in reversed(back) for pk in page] + pages[-1], self.expected)
+
+    def test_rows_inserted_while_paging(self):
+        first = self.client.get('/api/logs/?page_size=2').data
+        newest = SystemLog.objects.get(pk=self.expected[0])
+        SystemLog.objects.create(action='Late event', timestamp=newest.timestamp)
+        pages = self.walk(first['next'], 'next')
+        self.assertEqual([row['id'] for row in first['results']] + [pk for page in pages for pk in page], self.expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/logs/?cursor=bogus').status_code, 404)
+
+
+class AuditWriterTests(TransactionTestCase):
+    """The writer thread saves on its own connection, outside any test transaction."""
+
+    def setUp(self):
+        self.batches = []
+        self.flushed = threading.Event()
+        audit_logs_flushed.connect(self.on_flushed)
+        self.addCleanup(audit_logs_flushed.disconnect, self.on_flushed)
+
+    def on_flushed(self, logs, **kwargs):
+        self.batches.append(len(logs))
+        self.flushed.set()
+
+    def write(self, writer, count):
+        for i in range(count):
+            writer.write(SystemLog(action=f'Event {i}'))
+
+    def test_flushes_at_batch_size(self):
+        writer = AuditWriter(batch_size=3, flush_interval=60)
+        self.write(writer, 3)
+        self.assertTrue(self.flushed.wait(5))
+        self.assertEqual(self.batches, [3])
+        self.assertEqual(SystemLog.objects.count(), 3)
+
+    def test_flushes_after_interval(self):
+        writer = AuditWriter(batch_size=100, flush_interval=0.05)
+        self.write(writer, 2)
+        self.assertTrue(self.flushed.wait(5))
+        self.assertEqual(self.batches, [2])
+
+    def test_flush_on_shutdown(self):
+        writer = AuditWriter(batch_size=100, flush_interval=60)
+        self.write(writer, 2)
+        with mock.patch.object(audit, '_writer', writer):
+            audit.flush_on_exit()
+        self.assertEqual(SystemLog.objects.count(), 2)
+
+    def test_bad_row_keeps_the_rest(self):
+        logs = [SystemLog(action='Before'), SystemLog(action=None), SystemLog(action='After')]
+        with self.assertLogs('users.audit', 'ERROR'):
+            self.assertEqual(save_logs(logs), [])
+        self.assertEqual(list(SystemLog.objects.values_list('action', flat=True).order_by('id')), ['Before', 'After'])
+        self.assertEqual(self.batches, [2])
+
+    def test_retries_when_database_unavailable(self):
+        bulk_create = SystemLog.objects.bulk_create
+        failures = [OperationalError('server closed the connection')]
+
+        def flaky_bulk_create(logs):
+            if failures:
+                raise failures.pop()
+            return bulk_create(logs)
+
+        writer = AuditWriter(batch_size=100, flush_interval=60, retry_delay=0.01)
+        with mock.patch.object(SystemLog.objects, 'bulk_create', side_effect=flaky_bulk_create), \
+                self.assertLogs('users.audit', 'WARNING'):
+            self.write(writer, 2)
+            self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(SystemLog.objects.count(), 2)
+
+    def test_gives_up_after_max_retries(self):
+        writer = AuditWriter(batch_size=100, flush_interval=60, max_retries=2, retry_delay=0.01)
+        with mock.patch.object(SystemLog.objects, 'bulk_create', side_effect=OperationalError('down')) as bulk_create, \
+                self.assertLogs('users.audit', 'WARNING') as logs:
+            self.write(writer, 1)
+            self.assertTrue(writer.flush(timeout=5))
+        self.assertIn('Dropped 1 audit logs', logs.output[-1])
+        self.assertEqual(bulk_create.call_count, 3)
+        self.assertFalse(SystemLog.objects.exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "System logs are only partitioned on PostgreSQL")
+class SystemLogPartitionTests(TestCase):
+    """Monthly partitions made by migration 0011 and kept up by users/retention.py."""
+
+    def partition_of(self, log):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM users_systemlog WHERE id = %s", [log.id])
+            return cursor.fetchone()[0]
+
+    def test_upcoming_months_have_partitions(self):
+        names = [name for _, name in list_partitions()]
+        for offset in range(3):
+            self.assertIn(partition_name(add_months(current_month(), offset)), names)
+
+        log = SystemLog.objects.create(action='Now')
+        self.assertEqual(self.partition_of(log), partition_name(current_month()))
+
+    def test_new_partition_takes_rows_from_default(self):
+        month = add_months(current_month(), 6)
+        log = SystemLog.objects.create(action='Later', timestamp=month_bounds(month)[0] + timedelta(days=1))
+        self.assertEqual(self.partition_of(log), 'users_systemlog_default')
+
+        self.assertIn(partition_name(month), ensure_partitions(6))
+        self.assertEqual(self.partition_of(log), partition_name(month))
+        self.assertEqual(ensure_partitions(6), [])
+
+    def test_archive_drops_expired_partition(self):
+        archive_dir = tempfile.mkdtemp(prefix='log-archive-')
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        month = add_months(current_month(), -14)
+        create_partition(month)
+        SystemLog.objects.create(action='Old', timestamp=month_bounds(month)[0] + timedelta(days=1))
+        self.assertIn(month, expired_months(12))
+
+        path, rows = archive_month(month, archive_dir)
+        self.assertEqual(rows, 1)
+        self.assertNotIn(month, [m for m, _ in list_partitions()])
+        self.assertFalse(SystemLog.objects.filter(action='Old').exists())
+        with gzip.open(path, 'rt') as fh:
+            self.assertIn('Old', fh.read())
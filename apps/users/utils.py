@@ -1,7 +1,9 @@
 import shutil
 import os
 from django.db import connection
-from .models import SystemLog
+from django.db.models import Q
+from .models import User, SystemLog
+from .audit import write_audit_log
 from django.utils import timezone
 from datetime import timedelta
 
@@ -31,12 +33,17 @@ def get_storage_metrics():
     """
     # Get stats for the root directory (or wherever the project is stored)
     total, used, free = shutil.disk_usage("/")
-    
+    return disk_metrics(total, used, free)
+
+def disk_metrics(total, used, free):
+    """
+    Disk usage in bytes as the GB/TB figures shown on the dashboards.
+    """
     # Convert bytes to GB/TB for human readability
     total_gb = total / (1024**3)
     used_gb = used / (1024**3)
     free_gb = free / (1024**3)
-    used_percentage = (used / total) * 100
+    used_percentage = (used / total) * 100 if total else 0
     
     return {
         'total_capacity_gb': total_gb,
@@ -56,40 +63,48 @@ def get_database_size():
         with connection.cursor() as cursor:
             # This query is specific to PostgreSQL
             cursor.execute("SELECT pg_database_size(current_database())")
-            size_bytes = cursor.fetchone()[0]
-            
-            size_mb = size_bytes / (1024**2)
-            size_gb = size_bytes / (1024**3)
-            
-            return {
-                'size_bytes': size_bytes,
-                'size_mb': round(size_mb, 2),
-                'size_gb': round(size_gb, 2)
-            }
+            return database_size_metrics(cursor.fetchone()[0])
     except Exception as e:
         print(f"Error calculating DB size: {e}")
         # Fallback for other DBs or errors
-        return {
-            'size_bytes': 0,
-            'size_mb': 0,
-            'size_gb': 0
-        }
+        return database_size_metrics(0)
+
+def database_size_metrics(size_bytes):
+    return {
+        'size_bytes': size_bytes,
+        'size_mb': round(size_bytes / (1024**2), 2),
+        'size_gb': round(size_bytes / (1024**3), 2)
+    }
 
 def log_system_event(user, action, severity='Info', ip_address=None):
     """
-    Helper to log system events to the database.
+    Helper to log system events to the database. The row is saved in the
+    background by the audit writer (see users/audit.py), stamped now.
     """
     try:
-        SystemLog.objects.create(
+        write_audit_log(SystemLog(
             user=user,
             action=action,
             severity=severity,
             ip_address=ip_address,
             timestamp=timezone.now()
-        )
+        ))
     except Exception as e:
         print(f"Failed to log event: {e}")
 
+def search_system_logs(queryset, term):
+    """
+    Case-insensitive substring search over action, IP address and user name.
+    Matching users are looked up first so the log query is a plain OR of
+    three indexed conditions; on PostgreSQL each one can use its trigram
+    index (see migration 0009) instead of scanning the whole table.
+    """
+    condition = Q(action__icontains=term) | Q(ip_address__icontains=term)
+    user_ids = list(User.objects.filter(name__icontains=term).values_list('id', flat=True))
+    if user_ids:
+        condition |= Q(user_id__in=user_ids)
+    return queryset.filter(condition)
+
 def get_client_ip(request):
     """
     Extracts IP address from the request object.
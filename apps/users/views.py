@@ -6,17 +6,21 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
-from django.db import models
 from .models import User, SystemLog
-from clinical.models import Alert
-from .serializers import UserSerializer, SystemLogSerializer, CustomTokenObtainPairSerializer, ChangePasswordSerializer
+from clinical.counters import get_counters
+from .serializers import UserSerializer, SystemLogSerializer, CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer, ChangePasswordSerializer
+from .authentication import get_tokens_for_user, ClaimsJWTAuthentication
 from .permissions import IsAdmin, IsAdminOrDoctor
-from .utils import get_storage_metrics, get_database_size, log_system_event, get_client_ip, get_uptime
+from .utils import log_system_event, get_client_ip, get_uptime, search_system_logs
+from .sampler import get_storage_snapshot
+from .accounting import get_storage_breakdown, size_gb
+from core.pagination import TimestampCursorPagination
+from core.response_cache import cached_response
 from django.utils import timezone
 from datetime import timedelta
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -62,18 +66,15 @@ class SystemLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SystemLog.objects.all().order_by('-timestamp')
     serializer_class = SystemLogSerializer
     permission_classes = [IsAdminOrDoctor]  # Admins and Doctors can view logs
+    pagination_class = TimestampCursorPagination
     
     def get_queryset(self):
-        queryset = SystemLog.objects.all().order_by('-timestamp')
+        queryset = SystemLog.objects.select_related('user').order_by('-timestamp')
         
         # Search by user name, action, or IP address
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                models.Q(user__name__icontains=search) |
-                models.Q(action__icontains=search) |
-                models.Q(ip_address__icontains=search)
-            )
+            queryset = search_system_logs(queryset, search)
         
         # Filter by severity
         severity = self.request.query_params.get('severity', None)
@@ -91,15 +92,21 @@ class SystemLogViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 class DashboardSummaryView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
+    # Log counts, uptime and storage may lag by up to RESPONSE_CACHE_TIMEOUT
+    @cached_response('alerts', 'users')
     def get(self, request):
         try:
             # Calculate dashboard metrics
-            active_users = User.objects.filter(isActive=True).count()
-            total_logs = SystemLog.objects.count()
-            clinical_alerts = Alert.objects.filter(is_dismissed=False).count()
-            security_alerts = SystemLog.objects.filter(severity__in=['Error', 'Warning']).count()
+            counts = get_counters(
+                ('users_active', '', ''), ('logs', '', ''), ('alerts_active', '', ''), ('logs_security', '', '')
+            )
+            active_users = counts['users_active', '', '']
+            total_logs = counts['logs', '', '']
+            clinical_alerts = counts['alerts_active', '', '']
+            security_alerts = counts['logs_security', '', '']
             
             # Total alerts displayed on dashboard
             display_alerts = clinical_alerts + security_alerts
@@ -109,7 +116,7 @@ class DashboardSummaryView(APIView):
             last_7_days = now - timedelta(days=7)
             previous_7_days = now - timedelta(days=14)
             
-            current_users_count = User.objects.filter(isActive=True).count()
+            current_users_count = active_users
             # Note: In a real system, we might look at 'date_joined' or 'last_login' 
             # For simplicity, we compare total active users today vs a static baseline for now
             # or we could count users joined in those periods if we had a join_date
@@ -122,15 +129,19 @@ class DashboardSummaryView(APIView):
             elif security_alerts > 0:
                 security_status = "Action Required"
 
-            # Real storage metrics with error handling
+            # Real storage metrics (latest background sample) with error handling
             try:
-                metrics = get_storage_metrics()
-                db_size = get_database_size()
+                snapshot = get_storage_snapshot()
+                metrics = snapshot['disk']
+                db_size = snapshot['database']
+                image_gb = size_gb(get_storage_breakdown()['image_bytes'])
+                if image_gb is None:
+                    image_gb = round(metrics['used_capacity_gb'] - db_size['size_gb'], 1)
                 
                 storage_stats = {
                     'used_percentage': metrics['used_percentage'],
                     'patient_records_size': f"{db_size['size_gb']} GB",
-                    'imaging_data_size': f"{round(metrics['used_capacity_gb'] - db_size['size_gb'], 1)} GB",
+                    'imaging_data_size': f"{image_gb} GB",
                     'free_space': f"{round(metrics['free_space_gb'], 1)} GB",
                     'total_capacity_tb': metrics['total_capacity_tb'],
                     'used_capacity_tb': metrics['used_capacity_tb']
@@ -165,11 +176,24 @@ class DashboardSummaryView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class StorageStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrDoctor]
     
     def get(self, request):
-        metrics = get_storage_metrics()
-        db_size = get_database_size()
+        snapshot = get_storage_snapshot()
+        metrics = snapshot['disk']
+        db_size = snapshot['database']
+        accounting = get_storage_breakdown()
+
+        # Measured sizes where available; otherwise files are whatever
+        # part of the disk the database doesn't use
+        records_gb = size_gb(accounting['records_bytes'])
+        log_gb = size_gb(accounting['log_bytes'])
+        image_gb = size_gb(accounting['image_bytes'])
+        image_growth = snapshot['growth']['images']
+        if image_gb is None:
+            image_gb = round(metrics['used_capacity_gb'] - db_size['size_gb'], 1)
+            image_growth = snapshot['growth']['files']
         
         data = {
             'total_capacity': metrics['total_capacity_tb'],
@@ -177,15 +201,25 @@ class StorageStatsView(APIView):
             'used_percentage': metrics['used_percentage'],
             'database_usage_gb': db_size['size_gb'],
             'database_percentage': round((db_size['size_gb'] / metrics['used_capacity_gb']) * 100, 1) if metrics['used_capacity_gb'] > 0 else 0,
-            'file_storage_gb': round(metrics['used_capacity_gb'] - db_size['size_gb'], 1),
-            'file_storage_percentage': 100 - (round((db_size['size_gb'] / metrics['used_capacity_gb']) * 100, 1) if metrics['used_capacity_gb'] > 0 else 0),
+            'file_storage_gb': image_gb,
+            'file_storage_percentage': round((image_gb / metrics['used_capacity_gb']) * 100, 1) if metrics['used_capacity_gb'] > 0 else 0,
+            'state': snapshot['state'],
+            'sampled_at': snapshot['sampled_at'],
+            'growth_since': snapshot['growth_since'],
+            'accounting': {
+                'computed_at': accounting['computed_at'],
+                'image_blobs': accounting['image_blobs'],
+                'image_bytes': accounting['image_bytes'],
+                'toast_bytes': accounting['toast_bytes'],
+                'tables': accounting['tables'],
+            },
             'breakdown': [
                 {
                     'id': 1,
                     'category': 'Patient Clinical Records (DB)',
                     'description': 'Structured EHR Data',
-                    'size': f"{db_size['size_gb']} GB",
-                    'growth': '+0.0%',
+                    'size': f"{records_gb if records_gb is not None else db_size['size_gb']} GB",
+                    'growth': snapshot['growth']['database'],
                     'lastBackup': 'Auto-synced',
                     'status': 'SECURE',
                     'statusType': 'secure'
@@ -194,8 +228,8 @@ class StorageStatsView(APIView):
                     'id': 2,
                     'category': 'Wound Imaging Data (Disk)',
                     'description': 'High-Res Clinical Photos',
-                    'size': f"{round(metrics['used_capacity_gb'] - db_size['size_gb'], 1)} GB",
-                    'growth': '+0.0%',
+                    'size': f"{image_gb} GB",
+                    'growth': image_growth,
                     'lastBackup': 'Daily',
                     'status': 'SECURE',
                     'statusType': 'secure'
@@ -204,8 +238,8 @@ class StorageStatsView(APIView):
                     'id': 3,
                     'category': 'System Audit Logs',
                     'description': 'Activity & Compliance Logs',
-                    'size': '0.1 GB',
-                    'growth': '+0.1%',
+                    'size': f"{log_gb} GB" if log_gb is not None else 'N/A',
+                    'growth': snapshot['growth']['logs'],
                     'lastBackup': 'Instant',
                     'status': 'SECURE',
                     'statusType': 'secure'
@@ -275,11 +309,7 @@ class CustomTokenObtainPairView(APIView):
             user.update_activity()
             
             # Generate JWT tokens
-            refresh = RefreshToken()
-            refresh['email'] = user.email
-            refresh['role'] = user.role
-            refresh['name'] = user.name
-            refresh['user_id'] = user.id
+            refresh = get_tokens_for_user(user)
             
             # Removed successful login logging to reduce noise
             # log_system_event(...)
@@ -342,6 +372,7 @@ class CustomTokenRefreshView(BaseTokenRefreshView):
     Custom token refresh view.
     """
     permission_classes = [AllowAny]
+    serializer_class = CustomTokenRefreshSerializer
 
 
 class ChangePasswordView(APIView):
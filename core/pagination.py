@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Default for every list endpoint: ?page=N, with ?page_size= up to
+    API_MAX_PAGE_SIZE.
+    """
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class TimestampCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first, for append-only tables (system logs,
+    alerts). The cursor holds the (timestamp, id) of the row it stops at
+    and a page is fetched with WHERE timestamp < t OR (timestamp = t AND
+    id < i) instead of OFFSET, so deep pages cost the same as the first,
+    rows sharing a timestamp are neither skipped nor repeated, and rows
+    inserted while paging don't shift the results. ?cursor= comes from
+    next/previous.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination only compares the first ordering field and pages
+        # through ties with an offset; this compares the whole key. Every
+        # position is unique, so the base class's next/previous links never
+        # need an offset either.
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        # A "previous" cursor walks back in the opposite order
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = True, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def keyset_filter(self, ordering, position):
+        """Rows after `position` in `ordering` (both fields sorted the same way)."""
+        timestamp_field, id_field = [field.lstrip('-') for field in ordering]
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        timestamp, _, pk = position.rpartition('|')
+        timestamp = parse_datetime(timestamp)
+        if timestamp is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+
+        # The plain range on the timestamp lets the index bound the scan
+        return Q(**{f'{timestamp_field}__{lookup}e': timestamp}) & (
+            Q(**{f'{timestamp_field}__{lookup}': timestamp}) |
+            Q(**{timestamp_field: timestamp, f'{id_field}__{lookup}': int(pk)})
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        timestamp_field, id_field = [field.lstrip('-') for field in ordering]
+        return f"{getattr(instance, timestamp_field).isoformat()}|{getattr(instance, id_field)}"
@@ -0,0 +1,144 @@
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework.response import Response
+
+# Cached dashboard responses. A view's entry is keyed by endpoint, role
+# (plus the user id for per-user responses) and the current version of
+# every data group it depends on. Saving or deleting a model bumps its
+# group's version, which makes every dependent entry unreachable at once;
+# the old entries simply expire.
+#
+# A miss is recomputed by one request only: the first takes a lock in the
+# cache and computes, the others wait for its result (single flight). With
+# a shared backend (file, db, redis) that holds across worker processes.
+
+# model: data group its changes invalidate
+INVALIDATED_BY = {
+    'clinical.Patient': 'patients',
+    'clinical.Alert': 'alerts',
+    'clinical.Task': 'tasks',
+    'clinical.WoundAssessment': 'assessments',
+    'users.User': 'users',
+}
+POLL_INTERVAL = 0.05  # seconds between checks while another request computes
+METRICS = ('hits', 'misses', 'waits')
+ENDPOINTS = []  # views using cached_response, for the stats
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(group):
+    return f'response:version:{group}'
+
+
+def incr(key):
+    # Same add/incr counters as the upload guardrails
+    cache = get_cache()
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def count(metric, endpoint):
+    incr(f'response:metrics:{metric}')
+    incr(f'response:metrics:{metric}:{endpoint}')
+
+
+def invalidate(group):
+    """Drops every cached response that depends on `group`."""
+    incr(version_key(group))
+    incr('response:metrics:invalidations')
+
+
+def response_key(endpoint, request, groups, per_user):
+    cache = get_cache()
+    versions = cache.get_many([version_key(group) for group in groups])
+    parts = [endpoint, getattr(request.user, 'role', '') or 'anonymous']
+    if per_user:
+        parts.append(f'user:{request.user.pk}')
+    parts += [f'{group}:{versions.get(version_key(group), 0)}' for group in groups]
+    query = request.GET.urlencode()
+    if query:
+        parts.append(query)
+    return 'response:' + ':'.join(parts)
+
+
+def cached_response(*groups, per_user=False, timeout=None):
+    """
+    Caches a view's successful GET responses until one of `groups` changes
+    (or RESPONSE_CACHE_TIMEOUT passes). Responses that mention the user
+    need per_user=True; otherwise everyone with the same role shares one.
+    """
+    def decorator(get):
+        endpoint = get.__qualname__.split('.')[0]
+        ENDPOINTS.append(endpoint)
+
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return get(view, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = response_key(endpoint, request, groups, per_user)
+            cached = cache.get(key)
+            if cached is not None:
+                count('hits', endpoint)
+                return Response(cached)
+
+            # 1. Someone else is computing it: wait for their result
+            lock_timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT
+            if not cache.add(f'{key}:lock', 1, timeout=lock_timeout):
+                count('waits', endpoint)
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(POLL_INTERVAL)
+                    cached = cache.get(key)
+                    if cached is not None:
+                        return Response(cached)
+                # They failed or are too slow, compute it ourselves
+
+            # 2. Compute and share it
+            count('misses', endpoint)
+            try:
+                response = get(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(key, response.data, timeout or settings.RESPONSE_CACHE_TIMEOUT)
+            finally:
+                cache.delete(f'{key}:lock')
+            return response
+        return wrapper
+    return decorator
+
+
+def get_cache_stats():
+    """Hit/miss/wait counts, in total and per endpoint."""
+    cache = get_cache()
+    stats = {metric: cache.get(f'response:metrics:{metric}', 0) for metric in METRICS}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+    stats['invalidations'] = cache.get('response:metrics:invalidations', 0)
+    stats['endpoints'] = {
+        endpoint: {metric: cache.get(f'response:metrics:{metric}:{endpoint}', 0) for metric in METRICS}
+        for endpoint in ENDPOINTS
+    }
+    return stats
+
+
+def invalidate_for(sender, **kwargs):
+    # After commit, or a request could re-cache the old data in between
+    group = INVALIDATED_BY[sender._meta.label]
+    transaction.on_commit(lambda: invalidate(group))
+
+
+for model in INVALIDATED_BY:
+    post_save.connect(invalidate_for, sender=model, dispatch_uid=f'response_cache:{model}:save')
+    post_delete.connect(invalidate_for, sender=model, dispatch_uid=f'response_cache:{model}:delete')
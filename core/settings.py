@@ -100,6 +100,29 @@ DATABASES = {
     }
 }
 
+# Cache
+# CACHE_BACKEND is 'locmem' (per process), 'file' (shared by the workers
+# of one host), 'db' (shared, run `manage.py createcachetable` first) or a
+# backend's dotted path, e.g. django.core.cache.backends.redis.RedisCache
+# with CACHE_LOCATION=redis://127.0.0.1:6379.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_DEFAULT_LOCATIONS = {
+    'file': os.path.join(BASE_DIR, 'var', 'cache'),
+    'db': 'django_cache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS.get(CACHE_BACKEND, '')),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +170,141 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Wound image blob storage (content-addressed by SHA-256)
+WOUND_IMAGE_STORAGE = {
+    'BACKEND': 'clinical.storage.LocalBlobStore',
+    'OPTIONS': {
+        'root': os.getenv('WOUND_IMAGE_ROOT', os.path.join(MEDIA_ROOT, 'wound_images')),
+    },
+}
+
+# Upload guardrails, enforced while the upload streams in and from the
+# image header before any pixel data is decoded (413 / 415 on violation)
+WOUND_UPLOAD_MAX_BYTES = int(os.getenv('WOUND_UPLOAD_MAX_BYTES', str(25 * 1024 * 1024)))
+WOUND_IMAGE_MAX_PIXELS = int(os.getenv('WOUND_IMAGE_MAX_PIXELS', str(60_000_000)))
+WOUND_IMAGE_ALLOWED_FORMATS = ['JPEG', 'PNG', 'WEBP']
+
+# Resumable uploads: recommended chunk size handed to clients, and the hard
+# per-request cap (must stay below DATA_UPLOAD_MAX_MEMORY_SIZE, 2.5 MB)
+WOUND_UPLOAD_CHUNK_SIZE = 512 * 1024
+WOUND_UPLOAD_CHUNK_MAX_BYTES = 2 * 1024 * 1024
+WOUND_CHUNKED_UPLOAD_TTL_HOURS = int(os.getenv('WOUND_CHUNKED_UPLOAD_TTL_HOURS', '24'))
+
+# Derivatives generated at upload time: {name: longest edge in px}.
+# The largest one is the clinical image.
+WOUND_IMAGE_RENDITIONS = {
+    'thumbnail': 128,
+    'preview': 512,
+    'clinical': 1200,
+}
+
+# JPEG draft decoding keeps at least this factor of the target size before
+# the final LANCZOS pass (Pillow's reducing_gap). Lower is faster and uses
+# less memory; 3.0+ is indistinguishable from a full decode.
+# See scripts/bench_image_pipeline.py.
+WOUND_IMAGE_REDUCING_GAP = float(os.getenv('WOUND_IMAGE_REDUCING_GAP', '1.5'))
+
+# Wound photo processing queue (see `manage.py run_image_worker`).
+# With WOUND_IMAGE_ASYNC=False uploads are processed inside the request.
+WOUND_IMAGE_ASYNC = os.getenv('WOUND_IMAGE_ASYNC', 'True') == 'True'
+WOUND_UPLOAD_SPOOL_DIR = os.getenv('WOUND_UPLOAD_SPOOL_DIR', os.path.join(MEDIA_ROOT, 'upload_spool'))
+WOUND_IMAGE_QUEUE_LIMIT = int(os.getenv('WOUND_IMAGE_QUEUE_LIMIT', '200'))
+WOUND_IMAGE_QUEUE_RETRY_AFTER = 30  # seconds, sent with 503 when the queue is full
+WOUND_IMAGE_WORKER_CONCURRENCY = int(os.getenv('WOUND_IMAGE_WORKER_CONCURRENCY', '2'))
+
+# Duplicate uploads (double taps, client retries) of the same wound within
+# the window are detected by exact SHA-256 or by a 64-bit difference hash
+# no more than WOUND_IMAGE_DEDUP_MAX_DISTANCE bits apart. Idempotent uploads
+# return the existing assessment; otherwise the new assessment reuses the
+# stored blobs. Clients can override per request with ?idempotent=.
+WOUND_IMAGE_DEDUP_WINDOW_SECONDS = int(os.getenv('WOUND_IMAGE_DEDUP_WINDOW_SECONDS', '600'))
+WOUND_IMAGE_DEDUP_MAX_DISTANCE = 6
+WOUND_IMAGE_DEDUP_IDEMPOTENT = os.getenv('WOUND_IMAGE_DEDUP_IDEMPOTENT', 'True') == 'True'
+
+# Wound analysis engine (see clinical/analysis.py). The reference analyzer
+# is CPU-only: NumPy colour segmentation at `resolution` px, with photos
+# assumed to frame `frame_width_cm` of skin. Its weights file is built on
+# first use (or by `manage.py build_analyzer_weights`) and memory-mapped
+# read-only, so worker processes share one copy. Concurrent uploads are
+# coalesced into batches of up to WOUND_ANALYSIS_BATCH_SIZE, waiting at most
+# WOUND_ANALYSIS_BATCH_WAIT_MS for the batch to fill.
+WOUND_ANALYZER = {
+    'BACKEND': 'clinical.analysis.ClassicalWoundAnalyzer',
+    'OPTIONS': {
+        'resolution': 256,
+        'frame_width_cm': float(os.getenv('WOUND_ANALYSIS_FRAME_WIDTH_CM', '20')),
+        'weights': os.getenv('WOUND_ANALYZER_WEIGHTS', os.path.join(BASE_DIR, 'var', 'wound_analyzer', 'tissue_lut.npy')),
+    },
+}
+WOUND_ANALYSIS_BATCH_SIZE = int(os.getenv('WOUND_ANALYSIS_BATCH_SIZE', '8'))
+WOUND_ANALYSIS_BATCH_WAIT_MS = int(os.getenv('WOUND_ANALYSIS_BATCH_WAIT_MS', '10'))
+# Load the weights and run one inference in the background at startup;
+# /api/clinical/analysis/ready/ answers 503 until that has finished.
+WOUND_ANALYZER_WARM_UP = os.getenv('WOUND_ANALYZER_WARM_UP', 'True') == 'True'
+
+# System audit logs (users/audit.py) are buffered and saved with
+# bulk_create from a background thread: every AUDIT_LOG_FLUSH_INTERVAL_MS or
+# once AUDIT_LOG_BATCH_SIZE events are waiting, and on shutdown. If the
+# database is unreachable a batch is retried every AUDIT_LOG_RETRY_DELAY
+# seconds, up to AUDIT_LOG_MAX_RETRIES times. Tests write them inline
+# (core/testing.py) so they see them immediately.
+AUDIT_LOG_ASYNC = os.getenv('AUDIT_LOG_ASYNC', 'True') == 'True'
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '100'))
+AUDIT_LOG_FLUSH_INTERVAL_MS = int(os.getenv('AUDIT_LOG_FLUSH_INTERVAL_MS', '1000'))
+AUDIT_LOG_SHUTDOWN_TIMEOUT = 5  # seconds to wait for the last flush at exit
+AUDIT_LOG_MAX_RETRIES = int(os.getenv('AUDIT_LOG_MAX_RETRIES', '5'))
+AUDIT_LOG_RETRY_DELAY = 2  # seconds
+
+# On PostgreSQL system logs are partitioned by month. `manage.py
+# archive_system_logs` (run it daily) creates upcoming partitions and moves
+# months older than the retention window to gzipped CSV in the archive dir,
+# then drops them.
+SYSTEM_LOG_RETENTION_MONTHS = int(os.getenv('SYSTEM_LOG_RETENTION_MONTHS', '12'))
+SYSTEM_LOG_ARCHIVE_DIR = os.getenv('SYSTEM_LOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'var', 'log_archive'))
+SYSTEM_LOG_PARTITIONS_AHEAD = 2
+
+# Dashboard responses (core/response_cache.py) are cached per endpoint and
+# role (or user) for RESPONSE_CACHE_TIMEOUT seconds, and dropped as soon as
+# an alert, task, assessment or user they depend on is saved. One request
+# recomputes a missing entry; concurrent ones wait up to
+# RESPONSE_CACHE_LOCK_TIMEOUT for it. Off in tests (core/testing.py),
+# whose database rolls back under the cache.
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '60'))
+RESPONSE_CACHE_LOCK_TIMEOUT = 10  # seconds
+
+# Disk and database size for the admin dashboards are measured by a
+# background thread in each worker (users/sampler.py) every
+# STORAGE_SAMPLE_INTERVAL_SECONDS and kept as a time series for
+# STORAGE_SAMPLE_RETENTION_DAYS; growth compares the latest sample with the
+# one STORAGE_GROWTH_WINDOW_DAYS earlier. Without the thread, run
+# `manage.py sample_storage` from cron instead.
+STORAGE_SAMPLER_ENABLED = os.getenv('STORAGE_SAMPLER_ENABLED', 'True') == 'True'
+STORAGE_SAMPLE_INTERVAL_SECONDS = int(os.getenv('STORAGE_SAMPLE_INTERVAL_SECONDS', '300'))
+STORAGE_SAMPLE_RETENTION_DAYS = int(os.getenv('STORAGE_SAMPLE_RETENTION_DAYS', '90'))
+STORAGE_GROWTH_WINDOW_DAYS = int(os.getenv('STORAGE_GROWTH_WINDOW_DAYS', '7'))
+
+# Stored images never change, so clients may cache them indefinitely.
+# Kept 'private' by default because images are patient data behind auth.
+WOUND_IMAGE_CACHE_CONTROL = os.getenv('WOUND_IMAGE_CACHE_CONTROL', 'private, max-age=31536000, immutable')
+
+# Authenticated users are cached per process by id (users/authentication.py)
+# so most requests skip the user lookup. Saving or deleting a user drops
+# the entry in the process that did it; other processes pick up changes,
+# such as deactivation, within AUTH_USER_CACHE_TTL_SECONDS (0 disables).
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1024'))
+AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv('AUTH_USER_CACHE_TTL_SECONDS', '30'))
+
+# Read-only dashboard and stats views authorize from the access token's
+# claims (users.authentication.ClaimsJWTAuthentication) without loading the
+# user. Role changes and deactivation revoke older tokens through the
+# token_version claim, checked against the version in the cache (read from
+# the database on a miss). A shared CACHE_BACKEND revokes in every process
+# at once; with locmem other processes catch up within
+# AUTH_USER_CACHE_TTL_SECONDS. Off loads the user as usual.
+AUTH_CLAIMS_FAST_PATH = os.getenv('AUTH_CLAIMS_FAST_PATH', 'True') == 'True'
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -158,7 +316,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Every list endpoint is paginated; logs and alerts use cursors
+    # (see core/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '50')),
 }
+# Upper bound for ?page_size=
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
 
 # Simple JWT Configuration
 SIMPLE_JWT = {
@@ -0,0 +1,15 @@
+from django.test import override_settings
+
+
+def background_features_off():
+    """
+    Settings for test modules, enabled from setUpModule() so they apply
+    under any test runner: audit logs are written inline, and neither the
+    response cache nor the storage sampler thread runs. Tests that cover
+    one of them turn it back on with override_settings.
+    """
+    return override_settings(
+        AUDIT_LOG_ASYNC=False,
+        RESPONSE_CACHE_ENABLED=False,
+        STORAGE_SAMPLER_ENABLED=False,
+    )
@@ -0,0 +1,131 @@
+"""
+Benchmark the wound photo decode pipeline on synthetic phone-sized JPEGs.
+
+Compares peak RSS and wall time of:
+  - full:   EXIF-correct full decode (exif_transpose, then thumbnail)
+  - legacy: the original upload_wound code (thumbnail + convert, EXIF ignored)
+  - draft:  clinical.imaging.process_wound_image (draft decode, then EXIF)
+
+Each measurement runs in a fresh subprocess so peak RSS is not polluted by
+earlier runs. Linux only (reads peak RSS from /proc/self/status).
+
+Usage:
+    python scripts/bench_image_pipeline.py [--megapixels 12 24 50] [--repeat 3]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'apps'))
+
+MODES = ['full', 'legacy', 'draft']
+
+
+def make_corpus(directory, megapixels):
+    """
+    Writes one synthetic photo per size: smooth gradients plus noise so the
+    JPEG encoder produces camera-like file sizes, tagged with EXIF
+    orientation 6 (rotated 90 degrees) like most portrait phone shots.
+    """
+    from PIL import Image
+
+    paths = []
+    for mp in megapixels:
+        width = int((mp * 1_000_000 * 4 / 3) ** 0.5)
+        height = int(width * 3 / 4)
+        gradient = Image.linear_gradient('L').resize((width, height))
+        noise = Image.effect_noise((width, height), 40)
+        img = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation
+        path = os.path.join(directory, f'synthetic_{mp}mp.jpg')
+        img.save(path, 'JPEG', quality=92, exif=exif)
+        paths.append(path)
+    return paths
+
+
+def read_status_kb(field):
+    """
+    Reads VmRSS / VmHWM from /proc. VmHWM is the peak of this process image
+    only, unlike ru_maxrss which survives exec() from the parent.
+    """
+    with open('/proc/self/status') as fh:
+        for line in fh:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def run_once(mode, path):
+    """Executed in the child process; prints a JSON result line."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from PIL import Image, ImageOps
+    from clinical.imaging import process_wound_image
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+
+    baseline_kb = read_status_kb('VmRSS')
+    start = time.perf_counter()
+
+    if mode == 'full':
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        img.thumbnail((1200, 1200), Image.Resampling.LANCZOS)
+        img.convert('RGB').save(io.BytesIO(), format='JPEG', quality=70, optimize=True)
+    elif mode == 'legacy':
+        img = Image.open(io.BytesIO(data))
+        img.thumbnail((1200, 1200), Image.Resampling.LANCZOS)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+        img.save(io.BytesIO(), format='JPEG', quality=70, optimize=True)
+    else:
+        process_wound_image(data)
+
+    elapsed = time.perf_counter() - start
+    peak_kb = read_status_kb('VmHWM')
+    print(json.dumps({'seconds': elapsed, 'peak_delta_mb': (peak_kb - baseline_kb) / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', type=int, nargs='+', default=[12, 24, 50])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_once(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print("Generating synthetic corpus...")
+        paths = make_corpus(directory, args.megapixels)
+
+        print(f"{'image':<20}{'mode':<8}{'file MB':>9}{'time ms':>10}{'peak RSS MB':>13}")
+        for path in paths:
+            size_mb = os.path.getsize(path) / (1024 ** 2)
+            for mode in MODES:
+                runs = []
+                for _ in range(args.repeat):
+                    out = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                        capture_output=True, text=True, check=True
+                    )
+                    runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+                best_time = min(r['seconds'] for r in runs) * 1000
+                peak = max(r['peak_delta_mb'] for r in runs)
+                print(f"{os.path.basename(path):<20}{mode:<8}{size_mb:>9.1f}{best_time:>10.0f}{peak:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark system log search (/api/logs/?search=) on a large synthetic table.
+
+Runs against a throwaway test database created with Django's test runner
+machinery (the configured database is never touched), bulk-loads --rows
+log entries and times the first page of results, newest first, for a rare,
+a medium and a common search term:
+  - search:  users.utils.search_system_logs, as the API runs it
+  - legacy:  the original query, an OR across a JOIN to users_user
+On PostgreSQL both are timed again with the pg_trgm indexes dropped.
+
+Usage:
+    python scripts/bench_log_search.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, 'apps'))
+
+PAGE_SIZE = 50
+TRIGRAM_INDEXES = ['systemlog_action_trgm_idx', 'systemlog_ip_trgm_idx', 'user_name_trgm_idx']
+
+
+def load_rows(rows, batch_size=10000):
+    """
+    Staff accounts plus `rows` log entries over the last year, with the mix
+    of actions the API writes (failed logins dominate).
+    """
+    from django.utils import timezone
+    from users.models import User, SystemLog
+
+    users = User.objects.bulk_create([
+        User(name=f"Staff Member {i:03d}", email=f"staff{i:03d}@hospital.example", role='Nurse')
+        for i in range(200)
+    ])
+    users[17].name = "Quentin Zephyr"
+    users[17].save(update_fields=['name'])
+
+    actions = [
+        ("Failed login attempt for {email}", 'Warning'),
+        ("Failed login attempt for {email}", 'Warning'),
+        ("Updated user profile: {email}", 'Info'),
+        ("Accessed Global Patient Registry (Break-the-Glass Protocol)", 'Warning'),
+        ("System: User created - {email}", 'Success'),
+    ]
+    now = timezone.now()
+    rng = random.Random(42)
+    for start in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - start)):
+            user = rng.choice(users)
+            action, severity = rng.choice(actions)
+            batch.append(SystemLog(
+                user=user if rng.random() < 0.9 else None,
+                action=action.format(email=user.email),
+                severity=severity,
+                ip_address=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+                timestamp=now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            ))
+        SystemLog.objects.bulk_create(batch)
+        print(f"\rLoaded {start + len(batch):,} rows", end='', flush=True)
+    print()
+
+
+def legacy_search(queryset, term):
+    from django.db.models import Q
+    return queryset.filter(
+        Q(user__name__icontains=term) | Q(action__icontains=term) | Q(ip_address__icontains=term)
+    )
+
+
+def time_query(search, term, repeat):
+    from users.models import SystemLog
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        queryset = SystemLog.objects.select_related('user').order_by('-timestamp', '-id')
+        results = list(search(queryset, term)[:PAGE_SIZE])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, len(results)
+
+
+def run(terms, repeat, label):
+    from users.utils import search_system_logs
+
+    for name, search in (('search', search_system_logs), ('legacy', legacy_search)):
+        for term in terms:
+            ms, found = time_query(search, term, repeat)
+            print(f"{label:<10}{name:<8}{term:<20}{found:>6}{ms:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        load_rows(args.rows)
+        postgres = connection.vendor == 'postgresql'
+        if postgres:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE users_systemlog")
+                cursor.execute("ANALYZE users_user")
+
+        # rare: one IP prefix, medium: one user's name, common: most rows
+        terms = ['10.200.7.', 'Quentin Zephyr', 'failed login']
+        print(f"{'indexes':<10}{'query':<8}{'term':<20}{'rows':>6}{'best ms':>12}")
+        run(terms, args.repeat, 'trigram' if postgres else 'none')
+
+        if postgres:
+            with connection.cursor() as cursor:
+                for name in TRIGRAM_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            run(terms, args.repeat, 'none')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()